@@ -0,0 +1,134 @@
+"""
+Incremental Analytics State
+
+Per-ticker IncrementalAnalytics states persisted in the price store's SQLite
+file, next to the bars they summarize. refresh() reads only the bars stored
+since the state's last month and folds them in; the full stored history is
+replayed only when the price store reports a backfill or correction (a new
+revision) for the ticker or its benchmark.
+"""
+
+import json
+import threading
+from contextlib import closing
+
+import pandas as pd
+
+from assets.incremental import IncrementalAnalytics
+from assets.returns import month_end_labels
+
+
+class AnalyticsStateStore:
+    def __init__(self, store, benchmark="SPY", interval="1month", top_n=5):
+        """
+        Parameters:
+        - store : PriceStore
+            Source of the bars; states live in the same database file
+        - benchmark : str, default "SPY"
+            Benchmark symbol for beta and the market return
+        - interval : str, default "1month"
+        - top_n : int, default 5
+            Drawdown episodes kept per state
+        """
+        self.store = store
+        self.benchmark = benchmark
+        self.interval = interval
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        with closing(self.store._connect()) as conn, conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS analytics_state (
+                    symbol TEXT NOT NULL,
+                    benchmark TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    revision INTEGER NOT NULL,
+                    benchmark_revision INTEGER NOT NULL,
+                    PRIMARY KEY (symbol, benchmark, interval)
+                )"""
+            )
+
+    def load(self, symbol):
+        """Return (IncrementalAnalytics, revision, benchmark_revision) as last saved, or None"""
+        with closing(self.store._connect()) as conn:
+            row = conn.execute(
+                """SELECT state, revision, benchmark_revision FROM analytics_state
+                WHERE symbol = ? AND benchmark = ? AND interval = ?""",
+                (symbol, self.benchmark, self.interval),
+            ).fetchone()
+        if row is None:
+            return None
+        return IncrementalAnalytics.from_dict(json.loads(row[0])), row[1], row[2]
+
+    def save(self, symbol, state, revision, benchmark_revision):
+        with closing(self.store._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analytics_state VALUES (?, ?, ?, ?, ?, ?)",
+                (symbol, self.benchmark, self.interval, json.dumps(state.to_dict()), revision, benchmark_revision),
+            )
+
+    def benchmark_monthly(self):
+        """Benchmark monthly returns over its full stored history (datetime at month end, monthly_return)"""
+        bars = self.store.load(self.benchmark, self.interval)
+        return pd.DataFrame({'datetime': month_end_labels(bars['datetime'].to_numpy()),
+                             'monthly_return': bars['close'].pct_change()})
+
+    def refresh(self, symbol, benchmark_monthly=None):
+        """
+        Bring a ticker's state up to date with the price store
+
+        Parameters:
+        - symbol : str
+        - benchmark_monthly : DataFrame, optional
+            Benchmark monthly returns over its full history (datetime at month
+            end, monthly_return); default: benchmark_monthly(), read from the
+            same store as the ticker's bars. Bars after the benchmark's last
+            month wait for a later refresh so no pair is lost.
+
+        Returns:
+        - tuple : (IncrementalAnalytics, bars appended, whether the state was rebuilt)
+        """
+        with self._lock:
+            revision = self.store.revision(symbol, self.interval)
+            benchmark_revision = self.store.revision(self.benchmark, self.interval)
+            saved = self.load(symbol)
+
+            rebuilt = saved is None or saved[1:] != (revision, benchmark_revision)
+            if rebuilt:
+                state = IncrementalAnalytics(self.top_n)
+                bars = self.store.load(symbol, self.interval)
+            else:
+                state = saved[0]
+                # Monthly bars are stamped inside their month, so start the day after the last month end
+                after = pd.Timestamp(state.last_date) + pd.Timedelta(days=1) if state.last_date else None
+                bars = self.store.load(symbol, self.interval, start_date=after)
+
+            if benchmark_monthly is None:
+                benchmark_monthly = self.benchmark_monthly()
+            months = month_end_labels(bars['datetime'].to_numpy())
+            benchmark_returns = pd.Series(benchmark_monthly['monthly_return'].to_numpy(dtype=float),
+                                          index=pd.to_datetime(benchmark_monthly['datetime']))
+            last_benchmark_month = benchmark_returns.index.max() if len(benchmark_returns) else None
+
+            appended = 0
+            for month, close in zip(months, bars['close'].to_numpy(dtype=float)):
+                month = pd.Timestamp(month)
+                if last_benchmark_month is None or month > last_benchmark_month:
+                    break
+                state.append(month.strftime('%Y-%m-%d'), close, benchmark_returns.get(month, float('nan')))
+                appended += 1
+
+            if appended or rebuilt:
+                self.save(symbol, state, revision, benchmark_revision)
+            return state, appended, rebuilt
+
+
+# Example usage
+if __name__ == "__main__":
+    from price_store import PriceStore
+
+    store = PriceStore()
+    states = AnalyticsStateStore(store)
+    state, appended, rebuilt = states.refresh("MSFT")
+    print(f"MSFT through {state.last_date}: {appended} bars appended (rebuilt: {rebuilt})")
+    print(f"Max drawdown {state.max_drawdown:.2f}%, beta {state.beta}, market return {state.market_return:.2f}")
@@ -0,0 +1,49 @@
+"""
+Arrow IPC Responses
+
+Named tables written back to back as Arrow IPC streams in one response
+body. Clients read each table as record batches and hand them to pandas
+without any JSON float formatting or parsing on either side.
+"""
+
+import pandas as pd
+import pyarrow as pa
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def write_tables(tables):
+    """
+    Serialize {name: DataFrame} as consecutive IPC streams
+
+    Each stream's schema metadata carries its table name under b"name".
+    """
+    sink = pa.BufferOutputStream()
+    for name, df in tables.items():
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"name": name.encode()})
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def read_tables(data):
+    """Read a body written by write_tables back into {name: DataFrame}"""
+    source = pa.BufferReader(data)
+    tables = {}
+    while source.tell() < source.size():
+        table = pa.ipc.open_stream(source).read_all()
+        tables[table.schema.metadata[b"name"].decode()] = table.to_pandas()
+    return tables
+
+
+# Example usage
+if __name__ == "__main__":
+    body = write_tables({
+        "timeseries": pd.DataFrame({"datetime": pd.date_range("2024-01-31", periods=3, freq="M"),
+                                    "close": [100.0, 103.5, 99.2]}),
+        "wacc_curve": pd.DataFrame({"debt_ratio": [0.0, 0.5], "wacc": [0.08, 0.07]}),
+    })
+    for name, df in read_tables(body).items():
+        print(name)
+        print(df)
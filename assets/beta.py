@@ -0,0 +1,135 @@
+"""
+Beta Calculation Module
+
+This module computes market beta, alpha and R² for a whole cross-section of
+assets at once from an aligned (dates × tickers) returns matrix.
+"""
+
+import numpy as np
+
+
+def calculate_betas(returns_matrix, benchmark_returns, min_observations=2):
+    """
+    Calculate beta, alpha and R² for every column in one vectorized pass
+
+    Missing values (NaN) are handled per column: each ticker only uses the
+    dates where both it and the benchmark have a return, exactly like an
+    inner merge followed by dropna.
+
+    Beta follows the API's original convention: sample covariance (ddof=1)
+    over population variance of the benchmark (ddof=0), and 0 when the
+    benchmark variance is 0.
+
+    Parameters:
+    - returns_matrix : 2-D array-like (dates × tickers)
+        Periodic asset returns as decimals, NaN where missing
+    - benchmark_returns : 1-D array-like (dates) or 2-D (dates × tickers)
+        Benchmark returns aligned to the same dates; a 2-D array gives each
+        column its own benchmark series (e.g. bootstrap resamples)
+    - min_observations : int, default 2
+        Columns with fewer overlapping observations get NaN results
+
+    Returns:
+    - dict : Arrays of length n_tickers
+        - beta: Covariance with benchmark / benchmark variance
+        - alpha: Mean excess return not explained by beta (per period)
+        - r_squared: Squared correlation with the benchmark
+        - observations: Number of overlapping dates used
+    """
+    R = np.asarray(returns_matrix, dtype=float)
+    if R.ndim == 1:
+        R = R[:, None]
+    m = np.asarray(benchmark_returns, dtype=float)
+    if m.ndim == 1:
+        m = m.reshape(-1, 1)
+
+    mask = ~np.isnan(R) & ~np.isnan(m)
+    n = mask.sum(axis=0)
+    n_safe = np.maximum(n, 1)
+
+    # Zero out missing points so they drop out of every sum
+    m_masked = np.where(mask, m, 0.0)
+    r_masked = np.where(mask, R, 0.0)
+
+    mean_m = m_masked.sum(axis=0) / n_safe
+    mean_r = r_masked.sum(axis=0) / n_safe
+
+    dm = np.where(mask, m - mean_m, 0.0)
+    dr = np.where(mask, R - mean_r, 0.0)
+
+    sxy = (dm * dr).sum(axis=0)
+    sxx = (dm * dm).sum(axis=0)
+    syy = (dr * dr).sum(axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = sxy / (n - 1)
+        benchmark_variance = sxx / n
+        beta = np.where(benchmark_variance != 0, covariance / benchmark_variance, 0.0)
+        alpha = mean_r - beta * mean_m
+        r_squared = np.where((sxx != 0) & (syy != 0), sxy * sxy / (sxx * syy), np.nan)
+
+    insufficient = n < min_observations
+    beta = np.where(insufficient, np.nan, beta)
+    alpha = np.where(insufficient, np.nan, alpha)
+    r_squared = np.where(insufficient, np.nan, r_squared)
+
+    return {
+        'beta': beta,
+        'alpha': alpha,
+        'r_squared': r_squared,
+        'observations': n,
+    }
+
+
+def calculate_rolling_beta(asset_returns, benchmark_returns, window):
+    """
+    Calculate rolling beta in O(n) from running sums
+
+    Window sums of x, y, x² and xy are updated incrementally (as differences
+    of cumulative sums), so each step costs the same regardless of window
+    length. Uses the same covariance/variance convention as calculate_betas.
+
+    Parameters:
+    - asset_returns : 1-D array-like
+        Asset returns, already aligned with the benchmark and without NaNs
+    - benchmark_returns : 1-D array-like
+        Benchmark returns for the same dates
+    - window : int
+        Number of periods per beta estimate
+
+    Returns:
+    - ndarray : Beta for each window end; NaN for the first window-1 positions
+    """
+    y = np.asarray(asset_returns, dtype=float)
+    x = np.asarray(benchmark_returns, dtype=float)
+    beta = np.full(len(x), np.nan)
+    if window < 2 or len(x) < window:
+        return beta
+
+    def window_sums(values):
+        cumulative = np.concatenate(([0.0], np.cumsum(values)))
+        return cumulative[window:] - cumulative[:-window]
+
+    sx, sy = window_sums(x), window_sums(y)
+    sxx, sxy = window_sums(x * x), window_sums(x * y)
+
+    covariance = (sxy - sx * sy / window) / (window - 1)
+    benchmark_variance = (sxx - sx * sx / window) / window
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta[window - 1:] = np.where(benchmark_variance > 0, covariance / benchmark_variance, 0.0)
+    return beta
+
+
+# Example usage
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    market = rng.normal(0.01, 0.04, 60)
+    true_betas = np.array([0.5, 1.0, 1.5])
+    stocks = market[:, None] * true_betas + rng.normal(0, 0.02, (60, 3))
+    stocks[:5, 2] = np.nan  # Late listing
+
+    stats = calculate_betas(stocks, market)
+    for i, b in enumerate(true_betas):
+        print(f"True beta {b:.1f} -> beta {stats['beta'][i]:.3f}, "
+              f"R² {stats['r_squared'][i]:.3f}, n={stats['observations'][i]}")
@@ -0,0 +1,207 @@
+"""
+Incremental Analytics Module
+
+Running state for one ticker against its benchmark that absorbs one new
+monthly bar in O(1): the rebased growth product and running peak for
+drawdowns, Welford co-moments for beta and the benchmark growth product
+for the market return. Appending every bar of a history gives the same
+numbers as the full recomputation done by /analytics/run over it.
+"""
+
+import math
+
+import numpy as np
+
+from assets.wacc import calculate_optimal_wacc, calculate_unlevered_beta_array
+
+
+class IncrementalAnalytics:
+    """
+    Drawdown, beta, market return and WACC inputs maintained bar by bar
+
+    Follows the /analytics/run conventions for a window: the first bar only
+    seeds the return, drawdowns are measured from the second bar (rebased to
+    100 there) and beta pairs start at the third bar, where the first
+    in-window return exists.
+    """
+
+    def __init__(self, top_n=5):
+        self.top_n = top_n
+        self.n_bars = 0
+        self.first_date = None
+        self.last_date = None
+        self.last_close = None
+
+        # Drawdown: growth product since the second bar, running peak and extremes
+        self.growth = 1.0
+        self.peak = None
+        self.last_peak_date = None
+        self.max_drawdown = 0.0
+        self.peak_date = None
+        self.trough_date = None
+        self.recovery_date = None
+        self.mdd_peak_value = None
+        self.underwater_run = 0
+        self.time_under_water = 0
+        self.open_episode = None  # Current underwater stretch, not yet recovered
+        self.episodes = []  # Deepest recovered episodes, at most top_n
+
+        # Beta and market return over (benchmark, stock) return pairs
+        self.observations = 0
+        self.mean_benchmark = 0.0
+        self.mean_stock = 0.0
+        self.co_moment = 0.0
+        self.benchmark_moment = 0.0
+        self.market_growth = 1.0
+
+    def append(self, date, close, benchmark_return=np.nan):
+        """
+        Absorb the next monthly bar
+
+        Parameters:
+        - date : str
+            Bar label (month end, YYYY-MM-DD); must be after the previous bar
+        - close : float
+            Closing price; NaN carries the previous close forward
+        - benchmark_return : float, optional
+            Benchmark return for the same month as a decimal; NaN leaves the
+            month out of beta and the market return
+        """
+        if self.last_date is not None and date <= self.last_date:
+            raise ValueError(f"Bar {date} is not after the last bar {self.last_date}; rebuild the state")
+
+        close = float(close)
+        if math.isnan(close):
+            close = self.last_close if self.last_close is not None else close
+        previous_close = self.last_close
+        self.n_bars += 1
+        self.first_date = self.first_date or date
+        self.last_date = date
+        self.last_close = close
+        if self.n_bars == 1:
+            return
+
+        stock_return = close / previous_close - 1 if self.n_bars > 2 else math.nan
+        if not math.isnan(stock_return):
+            self.growth *= 1 + stock_return
+        self._update_drawdown(date, self.growth * 100)
+
+        if not math.isnan(stock_return) and not math.isnan(benchmark_return):
+            self._update_beta(float(benchmark_return), stock_return)
+
+    def _update_drawdown(self, date, rebase):
+        first = self.peak is None
+        self.peak = rebase if first else max(self.peak, rebase)
+        drawdown = (rebase - self.peak) / self.peak * 100
+
+        if drawdown == 0:
+            self.last_peak_date = date
+        if first or drawdown < self.max_drawdown:
+            self.max_drawdown = drawdown
+            self.trough_date = date
+            self.peak_date = self.last_peak_date
+            self.mdd_peak_value = self.peak
+            self.recovery_date = date if first else None
+        elif self.recovery_date is None and rebase >= self.mdd_peak_value:
+            self.recovery_date = date
+
+        if drawdown < 0:
+            self.underwater_run += 1
+            self.time_under_water = max(self.time_under_water, self.underwater_run)
+            if self.open_episode is None:
+                self.open_episode = {'peak_date': self.last_peak_date, 'trough_date': date, 'depth': drawdown,
+                                     'start': self.n_bars, 'duration': 1}
+            else:
+                self.open_episode['duration'] += 1
+                if drawdown < self.open_episode['depth']:
+                    self.open_episode['depth'] = drawdown
+                    self.open_episode['trough_date'] = date
+        else:
+            self.underwater_run = 0
+            if self.open_episode is not None:
+                episode = self.open_episode
+                episode['recovery_date'] = date
+                episode['duration'] += 1  # Counted through the recovery month
+                self.episodes = sorted(self.episodes + [episode],
+                                       key=lambda e: (e['depth'], e['start']))[:self.top_n]
+                self.open_episode = None
+
+    def _update_beta(self, benchmark_return, stock_return):
+        self.observations += 1
+        delta_benchmark = benchmark_return - self.mean_benchmark
+        self.mean_benchmark += delta_benchmark / self.observations
+        self.mean_stock += (stock_return - self.mean_stock) / self.observations
+        self.co_moment += delta_benchmark * (stock_return - self.mean_stock)
+        self.benchmark_moment += delta_benchmark * (benchmark_return - self.mean_benchmark)
+        self.market_growth *= 1 + benchmark_return
+
+    @property
+    def beta(self):
+        """Sample covariance over population benchmark variance (as calculate_betas); None below 2 pairs"""
+        if self.observations < 2:
+            return None
+        covariance = self.co_moment / (self.observations - 1)
+        benchmark_variance = self.benchmark_moment / self.observations
+        return covariance / benchmark_variance if benchmark_variance != 0 else 0.0
+
+    @property
+    def market_return(self):
+        """calculate_market_return over the paired benchmark returns, from the running product"""
+        return (self.market_growth ** (self.observations / 12) - 1) * 100
+
+    def drawdown_episodes(self):
+        """Deepest top_n episodes (recovered and the current one), deepest first"""
+        episodes = list(self.episodes)
+        if self.open_episode is not None:
+            episodes.append({**self.open_episode, 'recovery_date': None})
+        episodes.sort(key=lambda e: (e['depth'], e['start']))
+        return [{key: value for key, value in e.items() if key != 'start'} for e in episodes[:self.top_n]]
+
+    def optimal_wacc(self, de_ratio, risk_free=0.04, tax_rate=0.30, debt_ratios=None):
+        """
+        Unlevered beta and the minimum of the WACC curve for the current state
+
+        Parameters:
+        - de_ratio : float
+            Debt / equity used to unlever beta
+        - risk_free : float, default 0.04
+        - tax_rate : float, default 0.30
+        - debt_ratios : array-like, optional
+            Debt / total capital grid (default 1% steps)
+
+        Returns:
+        - tuple : (unlevered_beta, optimal_wacc, optimal_debt_ratio), all None below 2 pairs
+        """
+        if self.beta is None:
+            return None, None, None
+        unlevered_beta = float(calculate_unlevered_beta_array(self.beta, de_ratio, 1.0, tax_rate))
+        optimal_wacc, optimal_debt_ratio = calculate_optimal_wacc(unlevered_beta, self.market_return,
+                                                                  debt_ratios, risk_free, tax_rate)
+        return unlevered_beta, float(optimal_wacc), float(optimal_debt_ratio)
+
+    def to_dict(self):
+        """JSON-serializable snapshot of the state"""
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data.get('top_n', 5))
+        state.__dict__.update(data)
+        return state
+
+
+# Example usage
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    market = rng.normal(0.01, 0.04, 60)
+    closes = 100 * np.cumprod(1 + 1.2 * market + rng.normal(0, 0.03, 60))
+    dates = np.arange('2020-01', '2025-01', dtype='datetime64[M]').astype('datetime64[D]').astype(str)
+
+    state = IncrementalAnalytics()
+    for date, close, benchmark_return in zip(dates, closes, market):
+        state.append(date, close, benchmark_return)
+
+    print(f"Max drawdown: {state.max_drawdown:.2f}% ({state.peak_date} -> {state.trough_date})")
+    print(f"Beta: {state.beta:.3f} over {state.observations} months")
+    print(f"Market return: {state.market_return:.2f}")
+    print(f"Unlevered beta, optimal WACC, debt ratio: {state.optimal_wacc(de_ratio=0.25)}")
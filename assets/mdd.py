@@ -8,6 +8,7 @@ which measures the largest peak-to-trough decline in an investment.
 import pandas as pd
 import numpy as np
 import yfinance as yf
+from collections import deque
 
 
 def get_monthly_data(tickers, start, end):
@@ -47,20 +48,153 @@ def calculate_drawdown_analysis(prices):
         - Peak: Running maximum value
         - Drawdown: Percentage below peak
     """
-    df = pd.DataFrame()
+    prices = pd.Series(prices)
+    df = pd.DataFrame(index=prices.index)
+    if len(prices) == 0:
+        return df.assign(Close=prices, Return=np.nan, Rebase=np.nan, Peak=np.nan, Drawdown=np.nan)
+    
+    stats = calculate_drawdown_statistics(prices.to_numpy(dtype=float), top_n=0)
+    
     df['Close'] = prices
-    df['Return'] = prices.pct_change() * 100
+    df['Return'] = stats['returns'] * 100
+    df['Rebase'] = stats['rebase']
+    df['Peak'] = stats['peak']
+    df['Drawdown'] = stats['drawdown']
     
-    # Rebase to 100
-    df['Rebase'] = (1 + prices.pct_change().fillna(0)).cumprod() * 100
+    return df
+
+
+def _forward_fill(values):
+    """Carry the last valid price forward along axis 0 (as pct_change pads gaps)"""
+    valid = ~np.isnan(values)
+    index = np.where(valid, np.arange(len(values)).reshape(-1, *([1] * (values.ndim - 1))), 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    return np.take_along_axis(values, index, axis=0)
+
+
+def _drawdown_episodes(drawdown, top_n):
+    """Top-N drawdown episodes (deepest first) of one drawdown column"""
+    underwater = np.concatenate(([False], drawdown < 0, [False]))
+    changes = np.flatnonzero(np.diff(underwater.astype(np.int8)))
+    starts, ends = changes[0::2], changes[1::2]  # First underwater index, first index back at peak
+    if len(starts) == 0:
+        return []
     
-    # Calculate running peak
-    df['Peak'] = df['Rebase'].expanding().max()
+    depths = np.minimum.reduceat(drawdown, starts)
+    order = np.argsort(depths, kind='stable')[:top_n]
     
-    # Calculate drawdown percentage
-    df['Drawdown'] = ((df['Rebase'] - df['Peak']) / df['Peak']) * 100
+    episodes = []
+    for i in order:
+        start, end = starts[i], ends[i]
+        recovered = end < len(drawdown)
+        episodes.append({
+            'peak_index': int(start - 1) if start > 0 else 0,
+            'trough_index': int(start + np.argmin(drawdown[start:end])),
+            'recovery_index': int(end) if recovered else None,
+            'depth': float(depths[i]),
+            'duration': int(end - start + 1) if recovered else int(len(drawdown) - start)
+        })
+    return episodes
+
+
+def calculate_drawdown_statistics(prices, top_n=5):
+    """
+    Single-pass drawdown kernel with recovery and duration statistics
     
-    return df
+    Everything is derived from one vectorized pass over the prices: returns,
+    rebased curve, running peak, drawdown, maximum drawdown with its peak,
+    trough and recovery points, time under water and the deepest episodes.
+    A 2-D input (periods × tickers) processes a whole universe at once.
+    
+    Parameters:
+    - prices : array-like, 1-D (periods) or 2-D (periods × tickers)
+        Price levels in time order; NaN gaps are carried forward
+    - top_n : int, default 5
+        Number of drawdown episodes to report (deepest first)
+    
+    Returns:
+    - dict : For 1-D input scalars/lists, for 2-D input one entry per column
+        - returns: Period returns as decimals (NaN in the first row)
+        - rebase: Cumulative returns rebased to 100
+        - peak: Running maximum of rebase
+        - drawdown: Percentage below peak (<= 0)
+        - max_drawdown: Minimum of drawdown (percentage)
+        - peak_index: Position of the peak before the maximum drawdown
+        - trough_index: Position of the maximum drawdown
+        - recovery_index: First position back at that peak, None if not recovered
+        - time_under_water: Longest run of periods spent below a prior peak
+        - episodes: Up to top_n dicts with peak/trough/recovery index, depth and duration
+    """
+    prices = np.asarray(prices, dtype=float)
+    squeeze = prices.ndim == 1
+    if squeeze:
+        prices = prices[:, None]
+    n_periods, n_columns = prices.shape
+    if n_periods == 0:
+        raise ValueError("Need at least one price to analyse drawdowns")
+    
+    filled = _forward_fill(prices)
+    returns = np.full(prices.shape, np.nan)
+    returns[1:] = filled[1:] / filled[:-1] - 1
+    
+    growth = 1 + np.nan_to_num(returns, nan=0.0)
+    rebase = np.cumprod(growth, axis=0) * 100
+    peak = np.maximum.accumulate(rebase, axis=0)
+    drawdown = ((rebase - peak) / peak) * 100
+    
+    columns = np.arange(n_columns)
+    trough_index = np.argmin(drawdown, axis=0)
+    max_drawdown = drawdown[trough_index, columns]
+    peak_value = peak[trough_index, columns]
+    
+    # Peak: last time at the running peak on or before the trough
+    at_peak = (drawdown == 0) & (np.arange(n_periods)[:, None] <= trough_index)
+    peak_index = n_periods - 1 - np.argmax(at_peak[::-1], axis=0)
+    
+    # Recovery: first time back at that peak on or after the trough
+    after_trough = np.arange(n_periods)[:, None] >= trough_index
+    recovered = (rebase >= peak_value) & after_trough
+    has_recovery = recovered.any(axis=0)
+    recovery_index = np.argmax(recovered, axis=0)
+    
+    # Longest underwater run: count resets whenever the series is back at a peak
+    underwater = drawdown < 0
+    run_ids = np.cumsum(~underwater, axis=0)
+    time_under_water = np.zeros(n_columns, dtype=int)
+    episodes = []
+    for j in columns:
+        if underwater[:, j].any():
+            time_under_water[j] = np.bincount(run_ids[underwater[:, j], j]).max()
+        episodes.append(_drawdown_episodes(drawdown[:, j], top_n) if top_n else [])
+    
+    recovery = [int(r) if ok else None for r, ok in zip(recovery_index, has_recovery)]
+    
+    if squeeze:
+        return {
+            'returns': returns[:, 0],
+            'rebase': rebase[:, 0],
+            'peak': peak[:, 0],
+            'drawdown': drawdown[:, 0],
+            'max_drawdown': float(max_drawdown[0]),
+            'peak_index': int(peak_index[0]),
+            'trough_index': int(trough_index[0]),
+            'recovery_index': recovery[0],
+            'time_under_water': int(time_under_water[0]),
+            'episodes': episodes[0]
+        }
+    
+    return {
+        'returns': returns,
+        'rebase': rebase,
+        'peak': peak,
+        'drawdown': drawdown,
+        'max_drawdown': max_drawdown,
+        'peak_index': peak_index,
+        'trough_index': trough_index,
+        'recovery_index': recovery,
+        'time_under_water': time_under_water,
+        'episodes': episodes
+    }
 
 
 def calculate_max_drawdown(drawdown_series):
@@ -109,6 +243,98 @@ def calculate_recovery_time(prices, drawdown_df):
     return recovery_metrics
 
 
+def rolling_extreme(values, window, mode='max'):
+    """
+    Rolling max (or min) in O(n) using a monotonic deque
+    
+    Parameters:
+    - values : array-like
+        Input series
+    - window : int
+        Window length; the first window-1 results use the partial window
+    - mode : str, 'max' or 'min'
+    
+    Returns:
+    - ndarray : Rolling extreme for each position
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.empty(len(values))
+    better = (lambda a, b: a >= b) if mode == 'max' else (lambda a, b: a <= b)
+    candidates = deque()  # Indices whose values are monotonic from the front
+    
+    for i, value in enumerate(values):
+        while candidates and better(value, values[candidates[-1]]):
+            candidates.pop()
+        candidates.append(i)
+        if candidates[0] <= i - window:
+            candidates.popleft()
+        result[i] = values[candidates[0]]
+    
+    return result
+
+
+def rolling_max_drawdown(values, window):
+    """
+    Maximum drawdown inside each trailing window
+    
+    For position T the drawdown of every point in [T-window+1, T] is measured
+    against the running peak since the start of that window (not against
+    peaks before it), and the worst one is kept. The first window-1 results
+    use the partial window. Vectorized over an n × window view: O(n·window).
+    
+    Parameters:
+    - values : array-like
+        Price or rebased levels in time order
+    - window : int
+        Window length in periods
+    
+    Returns:
+    - ndarray : Maximum drawdown of each window as a percentage (<= 0)
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return np.empty(0)
+    window = max(int(window), 1)
+    # Repeating the first value in front leaves each partial window's drawdown unchanged
+    padded = np.concatenate((np.full(window - 1, values[0]), values))
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window)
+    peaks = np.maximum.accumulate(windows, axis=1)
+    return ((windows - peaks) / peaks).min(axis=1) * 100
+
+
+def calculate_rolling_drawdown(prices, window):
+    """
+    Calculate rolling drawdown and rolling maximum drawdown
+    
+    Builds on calculate_drawdown_analysis: the rebased series is compared with
+    its trailing `window`-period peak (O(n) with a monotonic deque), and the
+    rolling maximum drawdown is the largest peak-to-trough decline inside
+    each window (see rolling_max_drawdown).
+    
+    Parameters:
+    - prices : Series
+        Price series
+    - window : int
+        Number of periods in the rolling window
+    
+    Returns:
+    - DataFrame : calculate_drawdown_analysis columns plus
+        - Rolling Peak: Trailing window maximum of Rebase
+        - Rolling Drawdown: Percentage below the rolling peak
+        - Rolling Max Drawdown: Maximum drawdown within the trailing window (percentage)
+    """
+    df = calculate_drawdown_analysis(prices)
+    
+    rebase = df['Rebase'].to_numpy(dtype=float)
+    rolling_peak = rolling_extreme(rebase, window, 'max')
+    
+    df['Rolling Peak'] = rolling_peak
+    df['Rolling Drawdown'] = (rebase - rolling_peak) / rolling_peak * 100
+    df['Rolling Max Drawdown'] = rolling_max_drawdown(rebase, window)
+    
+    return df
+
+
 # Example usage
 if __name__ == "__main__":
     # Example: Download and analyze MSFT
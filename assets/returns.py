@@ -0,0 +1,64 @@
+"""
+Returns Calculation Module
+
+NumPy kernels for periodic returns on price series that are already at
+monthly frequency, used to skip pandas resampling on the hot path.
+"""
+
+import numpy as np
+
+
+def calculate_simple_returns(prices):
+    """
+    Calculate simple period-over-period returns
+
+    Parameters:
+    - prices : array-like, 1-D (periods) or 2-D (periods × tickers)
+        Price levels in time order
+
+    Returns:
+    - ndarray : Returns as decimals with one fewer row than prices
+        (same formula as pandas pct_change: p[t] / p[t-1] - 1)
+    """
+    prices = np.asarray(prices, dtype=float)
+    return prices[1:] / prices[:-1] - 1
+
+
+def is_consecutive_monthly(datetimes):
+    """
+    Check whether timestamps are strictly one per calendar month with no gaps
+
+    Parameters:
+    - datetimes : array-like of datetime64
+        Bar timestamps in the order given
+
+    Returns:
+    - bool : True when each timestamp falls in the month after the previous one
+    """
+    months = np.asarray(datetimes, dtype='datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+    return len(months) > 0 and bool(np.all(np.diff(months) == 1))
+
+
+def month_end_labels(datetimes):
+    """
+    Month-end timestamps for each bar, as pandas resample('M') labels them
+
+    Parameters:
+    - datetimes : array-like of datetime64
+
+    Returns:
+    - ndarray : datetime64[ns] at midnight on the last day of each month
+    """
+    months = np.asarray(datetimes, dtype='datetime64[ns]').astype('datetime64[M]')
+    return ((months + 1).astype('datetime64[D]') - 1).astype('datetime64[ns]')
+
+
+# Example usage
+if __name__ == "__main__":
+    prices = np.array([[100.0, 50.0], [110.0, 45.0], [99.0, 54.0]])
+    print("Returns (periods × tickers):")
+    print(calculate_simple_returns(prices))
+
+    dates = np.array(['2024-01-01', '2024-02-01', '2024-03-01'], dtype='datetime64[ns]')
+    print(f"Consecutive monthly: {is_consecutive_monthly(dates)}")
+    print(f"Month-end labels: {month_end_labels(dates)}")
@@ -9,7 +9,7 @@ import numpy as np
 
 def calculate_market_return(monthly_returns):
     m = len(monthly_returns)
-    total = np.prod(1 + monthly_returns)
+    total = np.prod(1 + monthly_returns, axis=0)  # Per column for a (months × samples) matrix
 
     # YOUR EXACT FORMULA: take (12/m)-th root → exponent = m/12
     Rm = (total ** (m / 12) - 1)*100
@@ -18,7 +18,25 @@ def calculate_market_return(monthly_returns):
 
 def calculate_cost_of_equity(beta, monthly_market_returns, risk_free=0.04):
     Rm = calculate_market_return(monthly_market_returns)
-    return risk_free +( beta * (Rm - risk_free))
+    return calculate_cost_of_equity_array(beta, Rm, risk_free)
+
+
+def calculate_cost_of_equity_array(beta, market_return, risk_free=0.04):
+    """
+    Calculate cost of equity (Ke) for one or many betas from a precomputed market return
+
+    Parameters:
+    - beta : float or array-like
+        Levered beta(s)
+    - market_return : float
+        Output of calculate_market_return (computed once by the caller)
+    - risk_free : float, default 0.04
+        Risk-free rate
+
+    Returns:
+    - float or ndarray : Cost of equity, same shape as beta
+    """
+    return risk_free + (np.asarray(beta, dtype=float) * (market_return - risk_free))
 
 
 def calculate_cost_of_debt(debt_percentage, tax_rate=0.30):
@@ -34,12 +52,29 @@ def calculate_cost_of_debt(debt_percentage, tax_rate=0.30):
     Returns:
     - float : After-tax Cost of debt as a decimal
     """
+    return float(calculate_cost_of_debt_array(debt_percentage, tax_rate))
+
+
+def calculate_cost_of_debt_array(debt_percentage, tax_rate=0.30):
+    """
+    Vectorized calculate_cost_of_debt over an array of debt percentages
+    
+    Parameters:
+    - debt_percentage : float or array-like
+        Debt as a percentage of total capital (0-1 or 0-100, per element)
+    - tax_rate : float, default 0.30
+        Corporate tax rate for tax shield calculation
+    
+    Returns:
+    - ndarray : After-tax cost of debt as decimals
+    """
+    debt_percentage = np.asarray(debt_percentage, dtype=float)
+    
     # Normalize input if percentage is 0-100 instead of 0-1
-    if debt_percentage > 1:
-        debt_percentage = debt_percentage / 100
+    debt_percentage = np.where(debt_percentage > 1, debt_percentage / 100, debt_percentage)
     
     # Ensure debt_percentage is within valid range
-    debt_percentage = max(0, min(1, debt_percentage))
+    debt_percentage = np.clip(debt_percentage, 0, 1)
     
     base_kd = 0.04  # Base cost of debt (4%)
     interest_rate = 0.001  # Interest rate spread per unit debt
@@ -83,20 +118,32 @@ def calculate_wacc(equity_value, debt_value, cost_of_equity, cost_of_debt, tax_r
     Returns:
     - float : WACC as a decimal
     """
-    
-    total_value = equity_value + debt_value
-    
-    if total_value == 0:
+    if equity_value + debt_value == 0:
         return 0
     
-    # Weight of equity and debt
-    weight_equity = equity_value / total_value
-    weight_debt = debt_value / total_value
+    return float(calculate_wacc_array(equity_value, debt_value, cost_of_equity, cost_of_debt, tax_rate))
+
+
+def calculate_wacc_array(equity_value, debt_value, cost_of_equity, cost_of_debt, tax_rate=0.30):
+    """
+    Vectorized calculate_wacc; all value/cost inputs broadcast against each other
     
-    # WACC calculation with tax shield
-    wacc = (weight_equity * cost_of_equity) + (weight_debt * cost_of_debt * (1 - tax_rate))
+    Returns:
+    - ndarray : WACC as decimals (0 where total value is 0)
+    """
+    equity_value = np.asarray(equity_value, dtype=float)
+    debt_value = np.asarray(debt_value, dtype=float)
+    total_value = equity_value + debt_value
     
-    return wacc
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Weight of equity and debt
+        weight_equity = equity_value / total_value
+        weight_debt = debt_value / total_value
+        
+        # WACC calculation with tax shield
+        wacc = (weight_equity * cost_of_equity) + (weight_debt * cost_of_debt * (1 - tax_rate))
+    
+    return np.where(total_value == 0, 0.0, wacc)
 
 
 def calculate_unlevered_beta(levered_beta, debt_value, equity_value, tax_rate=0.30):
@@ -122,10 +169,18 @@ def calculate_unlevered_beta(levered_beta, debt_value, equity_value, tax_rate=0.
     if equity_value == 0:
         return levered_beta
     
-    debt_to_equity = debt_value / equity_value
-    unlevered_beta = levered_beta / (1 + (1 - tax_rate) * debt_to_equity)
+    return float(calculate_unlevered_beta_array(levered_beta, debt_value, equity_value, tax_rate))
+
+
+def calculate_unlevered_beta_array(levered_beta, debt_value, equity_value, tax_rate=0.30):
+    """
+    Vectorized calculate_unlevered_beta; inputs broadcast against each other
     
-    return unlevered_beta
+    Returns:
+    - ndarray : Unlevered beta(s); levered beta is returned where equity is 0
+    """
+    debt_to_equity = _debt_to_equity(debt_value, equity_value)
+    return np.asarray(levered_beta, dtype=float) / (1 + (1 - tax_rate) * debt_to_equity)
 
 
 def calculate_levered_beta(unlevered_beta, debt_value, equity_value, tax_rate=0.30):
@@ -151,10 +206,283 @@ def calculate_levered_beta(unlevered_beta, debt_value, equity_value, tax_rate=0.
     if equity_value == 0:
         return unlevered_beta
     
-    debt_to_equity = debt_value / equity_value
-    levered_beta = unlevered_beta * (1 + (1 - tax_rate) * debt_to_equity)
+    return float(calculate_levered_beta_array(unlevered_beta, debt_value, equity_value, tax_rate))
+
+
+def calculate_levered_beta_array(unlevered_beta, debt_value, equity_value, tax_rate=0.30):
+    """
+    Vectorized calculate_levered_beta; inputs broadcast against each other
+    
+    Returns:
+    - ndarray : Levered beta(s); unlevered beta is returned where equity is 0
+    """
+    debt_to_equity = _debt_to_equity(debt_value, equity_value)
+    return np.asarray(unlevered_beta, dtype=float) * (1 + (1 - tax_rate) * debt_to_equity)
+
+
+def _debt_to_equity(debt_value, equity_value):
+    """D/E ratio with 0 wherever equity is 0 (matches the scalar early return)"""
+    debt_value = np.asarray(debt_value, dtype=float)
+    equity_value = np.asarray(equity_value, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        debt_to_equity = debt_value / equity_value
+    return np.where(equity_value == 0, 0.0, debt_to_equity)
+
+
+def calculate_wacc_curve(unlevered_beta, monthly_market_returns, debt_ratios=None,
+                         risk_free=0.04, tax_rate=0.30):
+    """
+    Calculate the full WACC curve over a grid of debt ratios in one NumPy pass
+    
+    The market return is computed once for the whole grid, then relevered beta,
+    cost of equity, cost of debt and WACC are evaluated as arrays.
+    
+    Parameters:
+    - unlevered_beta : float
+        Asset/unlevered beta
+    - monthly_market_returns : array-like
+        Monthly benchmark returns (decimal)
+    - debt_ratios : array-like, optional
+        Debt / total capital grid; defaults to 0% to 99% in 1% steps.
+        Any resolution works, e.g. np.linspace(0, 0.9999, 10_000)
+    - risk_free : float, default 0.04
+        Risk-free rate
+    - tax_rate : float, default 0.30
+        Corporate tax rate
+    
+    Returns:
+    - tuple : (curve, optimal_wacc, optimal_debt_ratio) where curve is a dict of
+      equal-length arrays: debt_ratio, equity_ratio, relevered_beta,
+      cost_of_equity, wacc
+    """
+    if debt_ratios is None:
+        debt_ratios = np.arange(0.0, 1.00, 0.01)
+    debt_ratios = np.asarray(debt_ratios, dtype=float)
+    
+    # Points with no equity are undefined for the curve
+    equity_ratios = 1 - debt_ratios
+    keep = equity_ratios != 0
+    debt_ratios = debt_ratios[keep]
+    equity_ratios = equity_ratios[keep]
+    
+    market_return = calculate_market_return(np.asarray(monthly_market_returns, dtype=float))
+    curve = _evaluate_wacc(unlevered_beta, market_return, debt_ratios, equity_ratios, risk_free, tax_rate)
+    wacc = curve['wacc']
+    
+    if len(wacc) == 0:
+        return curve, 0.0, 0.0
+    
+    optimal_index = int(np.argmin(wacc))
+    return curve, float(wacc[optimal_index]), float(debt_ratios[optimal_index])
+
+
+def calculate_optimal_wacc(unlevered_beta, market_return, debt_ratios=None, risk_free=0.04, tax_rate=0.30):
+    """
+    Minimum of the WACC curve for many scenarios at once
+    
+    unlevered_beta, market_return, risk_free and tax_rate broadcast against
+    each other; the debt-ratio grid is added as a trailing axis and reduced
+    away, so each scenario gets the same optimum as its own calculate_wacc_curve.
+    
+    Parameters:
+    - unlevered_beta : float or array-like
+        Asset/unlevered beta(s)
+    - market_return : float or array-like
+        Output(s) of calculate_market_return
+    - debt_ratios : array-like, optional
+        Debt / total capital grid; defaults to 0% to 99% in 1% steps
+    - risk_free : float or array-like, default 0.04
+        Risk-free rate(s)
+    - tax_rate : float or array-like, default 0.30
+        Corporate tax rate(s)
+    
+    Returns:
+    - tuple : (optimal_wacc, optimal_debt_ratio) arrays of the broadcast shape
+    """
+    if debt_ratios is None:
+        debt_ratios = np.arange(0.0, 1.00, 0.01)
+    debt_ratios = np.asarray(debt_ratios, dtype=float)
+    debt_ratios = debt_ratios[debt_ratios != 1]
+    
+    shape = np.broadcast_shapes(np.shape(unlevered_beta), np.shape(market_return),
+                                np.shape(risk_free), np.shape(tax_rate))
+    if len(debt_ratios) == 0:
+        return np.zeros(shape), np.zeros(shape)
+    
+    def with_grid_axis(values):
+        return np.asarray(values, dtype=float)[..., None]
+    
+    wacc = _evaluate_wacc(with_grid_axis(unlevered_beta), with_grid_axis(market_return), debt_ratios,
+                          1 - debt_ratios, with_grid_axis(risk_free), with_grid_axis(tax_rate))['wacc']
+    wacc = np.broadcast_to(wacc, shape + (len(debt_ratios),))
+    optimal_index = np.argmin(wacc, axis=-1)
+    
+    optimal_wacc = np.take_along_axis(wacc, optimal_index[..., None], axis=-1)[..., 0]
+    return optimal_wacc, debt_ratios[optimal_index]
+
+
+def calculate_wacc_sensitivity(levered_beta, monthly_market_returns, tax_rates, risk_free_rates,
+                               de_ratios, debt_ratios=None):
+    """
+    Optimal WACC over a (tax rate × risk-free rate × D/E) grid of assumptions
+    
+    The observed levered beta is unlevered at every (tax rate, D/E) pair, then
+    the WACC curve is evaluated for every scenario and debt ratio in a single
+    broadcasted pass over a 4-D (tax × risk-free × D/E × debt ratio) array.
+    Each scenario follows the same steps as a single calculate_wacc_curve run.
+    
+    Parameters:
+    - levered_beta : float
+        Observed (levered) beta of the stock
+    - monthly_market_returns : array-like
+        Monthly benchmark returns (decimal)
+    - tax_rates : array-like
+        Corporate tax rates to sweep
+    - risk_free_rates : array-like
+        Risk-free rates to sweep
+    - de_ratios : array-like
+        Current debt / equity ratios used to unlever the beta
+    - debt_ratios : array-like, optional
+        Debt / total capital grid searched for the optimum; defaults to 0% to
+        99% in 1% steps
+    
+    Returns:
+    - dict : Arrays of shape (len(tax_rates), len(risk_free_rates), len(de_ratios))
+        - unlevered_beta: Asset beta for each scenario
+        - optimal_wacc: Minimum WACC over the debt-ratio grid
+        - optimal_debt_ratio: Debt ratio where the minimum is reached
+    """
+    # Axes: tax × risk-free × D/E
+    tax = np.asarray(tax_rates, dtype=float).reshape(-1, 1, 1)
+    risk_free = np.asarray(risk_free_rates, dtype=float).reshape(1, -1, 1)
+    de = np.asarray(de_ratios, dtype=float).reshape(1, 1, -1)
+    shape = (tax.shape[0], risk_free.shape[1], de.shape[2])
+    
+    market_return = calculate_market_return(np.asarray(monthly_market_returns, dtype=float))
+    unlevered_beta = calculate_unlevered_beta_array(levered_beta, de, 1.0, tax)
+    optimal_wacc, optimal_debt_ratio = calculate_optimal_wacc(unlevered_beta, market_return, debt_ratios,
+                                                              risk_free, tax)
+    
+    return {
+        'unlevered_beta': np.broadcast_to(unlevered_beta, shape).copy(),
+        'optimal_wacc': optimal_wacc,
+        'optimal_debt_ratio': optimal_debt_ratio,
+    }
+
+
+def optimize_wacc(unlevered_beta, monthly_market_returns, bounds=(0.0, 0.99),
+                  risk_free=0.04, tax_rate=0.30, tol=1e-9, points=33):
+    """
+    Find the WACC-minimising debt ratio by coarse-to-fine refinement
+    
+    The curve is evaluated with the same formulas as calculate_wacc_curve, but
+    only on a small grid at a time: after each pass the search narrows to the
+    two grid cells around the current minimum, so the bracket shrinks by a
+    factor of (points - 1) / 2 per pass. With the defaults an interior optimum
+    takes 267 evaluations (35 on the first pass, which adds both sides of the
+    1% point, 7 refining passes of 33, and the parabola vertex); an optimum on
+    a bound or at the 1% point takes 200 to 233, instead of a dense grid.
+    
+    On either side of the 1% debt ratio (where calculate_cost_of_debt switches
+    between the 0-1 and 0-100 scales) the WACC is a quadratic in the debt
+    ratio, so a parabola through the first pass's minimum and its neighbours
+    gives the exact interior optimum even where the curve is too flat for the
+    grid to tell points apart. Both sides of the 1% point are always evaluated
+    so the jump in the cost of debt there cannot be stepped over.
+    
+    Parameters:
+    - unlevered_beta : float
+        Asset/unlevered beta
+    - monthly_market_returns : array-like
+        Monthly benchmark returns (decimal)
+    - bounds : tuple, default (0.0, 0.99)
+        Debt / total capital range to search (same span as the default curve)
+    - risk_free : float, default 0.04
+        Risk-free rate
+    - tax_rate : float, default 0.30
+        Corporate tax rate
+    - tol : float, default 1e-9
+        Width of the final bracket around the optimal debt ratio
+    - points : int, default 33
+        Grid points evaluated per pass (at least 3)
+    
+    Returns:
+    - tuple : (optimal_wacc, optimal_debt_ratio, evaluations)
+    """
+    lower, upper = float(bounds[0]), min(float(bounds[1]), np.nextafter(1.0, 0.0))
+    points = max(int(points), 3)
+    market_return = calculate_market_return(np.asarray(monthly_market_returns, dtype=float))
+    
+    def evaluate(debt_ratios):
+        return _evaluate_wacc(unlevered_beta, market_return, debt_ratios, 1 - debt_ratios,
+                              risk_free, tax_rate)['wacc']
+    
+    debt_ratios = np.linspace(lower, upper, points)
+    if lower < 0.01 < upper:
+        debt_ratios = np.union1d(debt_ratios, [0.01, np.nextafter(0.01, 1.0)])
+    
+    evaluations = 0
+    vertex = None
+    while True:
+        wacc = evaluate(debt_ratios)
+        evaluations += len(debt_ratios)
+        i = int(np.argmin(wacc))
+        best_wacc, best_debt_ratio = float(wacc[i]), float(debt_ratios[i])
+        
+        if evaluations == len(debt_ratios):
+            # First pass: three neighbouring points on the minimum's side of 1% debt
+            for j in (i - 1, i, i - 2):
+                if 0 <= j <= len(debt_ratios) - 3:
+                    vertex = _parabola_vertex(debt_ratios[j:j + 3], wacc[j:j + 3])
+                    if vertex is not None:
+                        break
+        
+        lower = debt_ratios[max(i - 1, 0)]
+        upper = debt_ratios[min(i + 1, len(debt_ratios) - 1)]
+        if upper - lower <= tol:
+            break
+        debt_ratios = np.linspace(lower, upper, points)
+    
+    # Keep the parabola's vertex unless the grid found a clearly lower WACC
+    if vertex is not None:
+        vertex_wacc = float(evaluate(np.array([vertex]))[0])
+        evaluations += 1
+        if vertex_wacc - best_wacc <= 1e-12 * max(1.0, abs(best_wacc)):
+            best_wacc, best_debt_ratio = vertex_wacc, vertex
+    
+    return best_wacc, best_debt_ratio, evaluations
+
+
+def _parabola_vertex(x, y):
+    """Minimum of the parabola through three points; None if it lies outside them or they straddle 1% debt"""
+    (x0, x1, x2), (y0, y1, y2) = x, y
+    if not (x2 <= 0.01 or x0 > 0.01):
+        return None
+    
+    d1 = (y1 - y0) / (x1 - x0)
+    d2 = (y2 - y1) / (x2 - x1)
+    curvature = (d2 - d1) / (x2 - x0)
+    if curvature <= 0:
+        return None
+    
+    vertex = (x0 + x1) / 2 - d1 / (2 * curvature)
+    return float(vertex) if x0 <= vertex <= x2 else None
+
+
+def _evaluate_wacc(unlevered_beta, market_return, debt_ratios, equity_ratios, risk_free, tax_rate):
+    """Relevered beta, cost of equity and WACC at each debt ratio (equity_ratios must be non-zero)"""
+    relevered_beta = calculate_levered_beta_array(unlevered_beta, debt_ratios, equity_ratios, tax_rate)
+    cost_of_equity = calculate_cost_of_equity_array(relevered_beta, market_return, risk_free)
+    cost_of_debt = calculate_cost_of_debt_array(debt_ratios * 100, tax_rate)  # Percentage input, as the scalar path
+    wacc = calculate_wacc_array(equity_ratios, debt_ratios, cost_of_equity, cost_of_debt, tax_rate)
     
-    return levered_beta
+    return {
+        'debt_ratio': debt_ratios,
+        'equity_ratio': equity_ratios,
+        'relevered_beta': relevered_beta,
+        'cost_of_equity': cost_of_equity,
+        'wacc': wacc,
+    }
 
 
 # Example usage
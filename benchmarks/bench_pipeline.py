@@ -0,0 +1,245 @@
+"""
+Analytics Pipeline Benchmarks
+
+Times each pipeline stage and the HTTP endpoints (through FastAPI's
+TestClient) against the offline fixture upstream, and records the results as
+JSON so runs on different commits can be compared. Run from the repo root:
+
+    python -m benchmarks.bench_pipeline                 # full run
+    python -m benchmarks.bench_pipeline --quick         # smaller datasets, fewer rounds
+    python -m benchmarks.bench_pipeline --compare benchmarks/results/OLD.json
+
+The batch benchmarks record the CPU executor; time the process pool with e.g.
+
+    CPU_EXECUTOR=process CPU_MAX_WORKERS=4 python -m benchmarks.bench_pipeline -k batch
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+import warnings
+from datetime import datetime
+
+# Keep the price store and any written outputs out of the working tree
+WORK_DIR = tempfile.mkdtemp(prefix="analytics-bench-")
+os.environ.setdefault("PRICE_STORE_DIR", os.path.join(WORK_DIR, "price_store"))
+os.environ.setdefault("ANALYTICS_OUTPUT_DIR", WORK_DIR)
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+import financial_analytics_api as api
+from benchmarks.fixtures import REPO_ROOT, bundled_universe, synthetic_universe, fixture_upstream
+
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+ARROW_HEADERS = {"Accept": "application/vnd.apache.arrow.stream"}
+
+
+def measure(func, rounds, min_time=0.05):
+    """
+    Per-call timing statistics in seconds
+
+    Calls per round are calibrated (timeit.autorange) so every round lasts at
+    least min_time; the statistics are over the rounds.
+    """
+    func()  # Warm-up
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    times = [t / number for t in timer.repeat(repeat=rounds, number=number)]
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "rounds": rounds,
+        "number": number,
+    }
+
+
+def quietly(func, *args, **kwargs):
+    """Call func with its progress prints swallowed"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def stage_benchmarks(ticker, start_date, end_date):
+    """(name, callable) for each pipeline stage, with inputs prepared by the previous stages"""
+    prices = api.datapull(ticker, start_date, end_date)
+    monthly = api.compute_monthly_returns(prices)
+    enhanced, _ = api.compute_max_drawdown(monthly)
+    spy_monthly = api.benchmark_cache.window("SPY", start_date, end_date)
+    beta, spy_returns = api.compute_beta(enhanced, start_date, end_date, spy_monthly)
+    unlevered_beta = api.compute_unlevered_beta(beta, ticker)
+    wacc_data, _, _ = api.compute_wacc_curve(unlevered_beta, spy_returns)
+
+    return [
+        ("compute_monthly_returns", lambda: api.compute_monthly_returns(prices)),
+        ("compute_max_drawdown", lambda: api.compute_max_drawdown(monthly)),
+        ("compute_beta", lambda: api.compute_beta(enhanced, start_date, end_date, spy_monthly)),
+        ("compute_wacc_curve", lambda: api.compute_wacc_curve(unlevered_beta, spy_returns)),
+        ("save_enhanced_csv", lambda: quietly(api.save_enhanced_csv, enhanced.copy(), ticker, wacc_data)),
+    ]
+
+
+def date_window(universe, symbol):
+    dates = universe[symbol]["datetime"]
+    return dates.min().strftime("%Y-%m-%d"), dates.max().strftime("%Y-%m-%d")
+
+
+def post(client, path, body, headers=None):
+    response = client.post(path, json=body, headers=headers)
+    response.raise_for_status()
+    return response
+
+
+def uncached_post(client, path, body, headers=None):
+    """POST with the result cache emptied first, so the pipeline actually runs"""
+    api.result_cache.clear()
+    return post(client, path, body, headers)
+
+
+def run_benchmarks(quick=False, rounds=None, pattern=None):
+    """Run every benchmark matching `pattern` and return the result records"""
+    rounds = rounds or (3 if quick else 7)
+    month_sizes = (60, 240) if quick else (60, 240, 1200)
+    batch_sizes = (10,) if quick else (10, 100)
+    results = []
+
+    def record(name, params, func):
+        label = f"{name} {json.dumps(params, sort_keys=True)}"
+        if pattern and pattern not in label:
+            return
+        stats = measure(func, rounds)
+        results.append({"name": name, "params": params, **stats})
+        print(f"{name:<26} {json.dumps(params, sort_keys=True):<48} "
+              f"median {stats['median'] * 1000:9.3f} ms   min {stats['min'] * 1000:9.3f} ms")
+
+    with TestClient(api.app) as client:
+        # Per-stage timings on the bundled CSVs and growing synthetic histories
+        datasets = [("bundled", "MSFT", bundled_universe())]
+        datasets += [("synthetic", "SYN0000", synthetic_universe(1, months)) for months in month_sizes]
+        for dataset, ticker, universe in datasets:
+            start_date, end_date = date_window(universe, ticker)
+            with fixture_upstream(api, universe):
+                params = {"dataset": dataset, "months": len(universe[ticker])}
+                for name, func in stage_benchmarks(ticker, start_date, end_date):
+                    record(name, params, func)
+
+        # End to end through the HTTP layer (SPY stays in the benchmark cache between calls)
+        universe = bundled_universe()
+        start_date, end_date = date_window(universe, "MSFT")
+        body = {"ticker": "MSFT", "start_date": start_date, "end_date": end_date, "persist": False}
+        with fixture_upstream(api, universe):
+            for output, headers in (("json", None), ("arrow", ARROW_HEADERS)):
+                record("POST /analytics/run", {"dataset": "bundled", "format": output},
+                       lambda: uncached_post(client, "/analytics/run", body, headers))
+                record("POST /analytics/run", {"dataset": "bundled", "format": output, "cache": "hit"},
+                       lambda: post(client, "/analytics/run", body, headers))
+
+        for n_tickers in batch_sizes:
+            universe = synthetic_universe(n_tickers, 120)
+            start_date, end_date = date_window(universe, "SPY")
+            tickers = [symbol for symbol in universe if symbol != "SPY"]
+            body = {"tickers": tickers, "start_date": start_date, "end_date": end_date}
+            with fixture_upstream(api, universe):
+                params = {"dataset": "synthetic", "tickers": n_tickers, "months": 120,
+                          "executor": f"{api.CPU_EXECUTOR}x{api.CPU_MAX_WORKERS}"}
+                record("POST /analytics/batch", params, lambda: post(client, "/analytics/batch", body))
+
+    return results
+
+
+def git_commit():
+    """(short commit hash, dirty flag) of the working tree, or (None, None) outside git"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        return commit, bool(status)
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def benchmark_key(result):
+    return result["name"], json.dumps(result["params"], sort_keys=True)
+
+
+def compare(previous, current, threshold):
+    """Print median ratios against a previous run; return the benchmarks slower by more than threshold"""
+    old = {benchmark_key(r): r for r in previous["benchmarks"]}
+    regressions = []
+    print(f"\nCompared with {previous.get('commit')} ({previous.get('created_at')}):")
+    for result in current["benchmarks"]:
+        before = old.get(benchmark_key(result))
+        if before is None:
+            continue
+        ratio = result["median"] / before["median"]
+        flag = "  SLOWER" if ratio > 1 + threshold else ("  faster" if ratio < 1 - threshold else "")
+        print(f"{result['name']:<26} {benchmark_key(result)[1]:<48} x{ratio:6.2f}{flag}")
+        if ratio > 1 + threshold:
+            regressions.append(result)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="smaller datasets and fewer rounds")
+    parser.add_argument("--rounds", type=int, help="timing rounds per benchmark")
+    parser.add_argument("-k", dest="pattern", help="only run benchmarks whose name/params contain this text")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>_<commit>.json)")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="relative median slowdown reported as a regression (default 0.25)")
+    args = parser.parse_args()
+    # save_enhanced_csv adds curve columns one at a time; its fragmentation warnings would drown the report
+    warnings.simplefilter("ignore", pd.errors.PerformanceWarning)
+
+    try:
+        commit, dirty = git_commit()
+        report = {
+            "commit": commit,
+            "dirty": dirty,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "quick": args.quick,
+            "machine": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "numpy": np.__version__,
+                "pandas": pd.__version__,
+            },
+            "benchmarks": run_benchmarks(args.quick, args.rounds, args.pattern),
+        }
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}_{commit or 'nogit'}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
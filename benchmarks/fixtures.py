@@ -0,0 +1,154 @@
+"""
+Offline Fixture Upstream
+
+Price data for benchmarks without touching Twelve Data: the bundled
+MSFT/NFLX/NVDA monthly CSVs plus seeded synthetic universes of any size,
+served through a StockDataPuller subclass that the API's datapull() and
+price store sync use in place of the real one. The test_*.py modules use the
+same universes and the comparison helpers at the end of this module.
+"""
+
+import glob
+import math
+import os
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from data_pull import StockDataPuller
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUNDLED_SYMBOLS = ["MSFT", "NFLX", "NVDA"]
+
+# Relative tolerance for comparing an optimized path with its baseline
+RTOL = 1e-12
+
+
+def load_bundled(symbol):
+    """Latest bundled {symbol}_monthly_*.csv as written by StockDataPuller.pull_data"""
+    files = sorted(glob.glob(os.path.join(REPO_ROOT, f"{symbol}_monthly_*.csv")))
+    if not files:
+        raise FileNotFoundError(f"No bundled monthly CSV for {symbol}")
+    df = pd.read_csv(files[-1])
+    df["datetime"] = pd.to_datetime(df["datetime"])
+    return df
+
+
+def synthetic_universe(n_tickers, n_months, start="2000-01-01", seed=0):
+    """
+    SPY plus n_tickers synthetic stocks with n_months monthly bars each
+
+    Stock returns are beta * market + noise with betas spread over 0.5-1.5,
+    so every pipeline stage sees realistic, non-degenerate data.
+
+    Returns:
+    - dict : {symbol: DataFrame} in the StockDataPuller layout
+      (datetime, open, high, low, close, volume, symbol)
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=n_months, freq="MS")
+    market = rng.normal(0.008, 0.045, n_months)
+
+    def bars(symbol, returns, first_close):
+        close = first_close * np.cumprod(1 + returns)
+        return pd.DataFrame({
+            "datetime": dates,
+            "open": close,
+            "high": close * 1.02,
+            "low": close * 0.98,
+            "close": close,
+            "volume": rng.integers(1_000_000, 50_000_000, n_months),
+            "symbol": symbol,
+        })
+
+    universe = {"SPY": bars("SPY", market, 300.0)}
+    betas = np.linspace(0.5, 1.5, n_tickers) if n_tickers > 1 else np.array([1.0])
+    for i, beta in enumerate(betas):
+        returns = beta * market + rng.normal(0.002, 0.06, n_months)
+        universe[f"SYN{i:04d}"] = bars(f"SYN{i:04d}", returns, rng.uniform(10, 500))
+    return universe
+
+
+def bundled_universe(seed=0):
+    """Bundled MSFT/NFLX/NVDA CSVs plus a synthetic SPY over the same months"""
+    universe = {symbol: load_bundled(symbol) for symbol in BUNDLED_SYMBOLS}
+    n_months = len(universe["MSFT"])
+    start = universe["MSFT"]["datetime"].min()
+    universe["SPY"] = synthetic_universe(0, n_months, start=start, seed=seed)["SPY"]
+    return universe
+
+
+class FixtureStockDataPuller(StockDataPuller):
+    """StockDataPuller that serves a fixed {symbol: DataFrame} universe"""
+
+    universe = {}
+    calls = 0
+
+    def get_monthly_data(self, symbol, end_date=None):
+        FixtureStockDataPuller.calls += 1
+        df = self.universe.get(symbol.upper())
+        if df is None:
+            print(f"No fixture data for {symbol}")
+            return None
+        if end_date is not None:
+            df = df[df["datetime"] <= pd.Timestamp(end_date)]
+        return df.copy()
+
+    def fetch_time_series(self, symbol, start_date, end_date, interval=StockDataPuller.INTERVAL):
+        """Fixture bars between two dates, for sync_store (the price store path)"""
+        FixtureStockDataPuller.calls += 1
+        df = self.universe.get(symbol.upper())
+        if df is None:
+            raise ValueError(f"No fixture data for {symbol}")
+        in_range = (df["datetime"] >= pd.Timestamp(start_date)) & (df["datetime"] <= pd.Timestamp(end_date))
+        return df[in_range].copy()
+
+
+@contextmanager
+def fixture_upstream(api, universe):
+    """Route `api.datapull` to `universe` and start from a cold benchmark cache"""
+    original = api.StockDataPuller
+    FixtureStockDataPuller.universe = universe
+    FixtureStockDataPuller.calls = 0
+    api.StockDataPuller = FixtureStockDataPuller
+    api.benchmark_cache.clear()
+    try:
+        yield FixtureStockDataPuller
+    finally:
+        api.StockDataPuller = original
+        api.benchmark_cache.clear()
+
+
+def parity_universes():
+    """(name, universe) pairs the regression checks compare old and new paths on"""
+    return [("bundled", bundled_universe()), ("synthetic", synthetic_universe(6, 120, seed=3))]
+
+
+def stock_symbols(universe):
+    """Every symbol of a universe except the SPY benchmark"""
+    return [symbol for symbol in universe if symbol != "SPY"]
+
+
+def date_window(universe):
+    """(start_date, end_date) strings spanning a universe's SPY bars"""
+    dates = universe["SPY"]["datetime"]
+    return dates.min().strftime("%Y-%m-%d"), dates.max().strftime("%Y-%m-%d")
+
+
+def assert_close(actual, expected, path="result", rtol=RTOL):
+    """Recursive equality with a relative tolerance for floats (NaN equals NaN)"""
+    if isinstance(expected, dict):
+        assert actual.keys() == expected.keys(), path
+        for key in expected:
+            assert_close(actual[key], expected[key], f"{path}.{key}", rtol)
+    elif isinstance(expected, (list, tuple)):
+        assert len(actual) == len(expected), path
+        for i, (a, e) in enumerate(zip(actual, expected)):
+            assert_close(a, e, f"{path}[{i}]", rtol)
+    elif isinstance(expected, float):
+        both_nan = math.isnan(expected) and isinstance(actual, float) and math.isnan(actual)
+        assert both_nan or math.isclose(actual, expected, rel_tol=rtol, abs_tol=1e-12), \
+            f"{path}: {actual} != {expected}"
+    else:
+        assert actual == expected, path
@@ -0,0 +1,14 @@
+"""
+Shared pytest setup
+
+The API module opens its price store and output directory at import, so
+both are pointed at a temporary directory before any test module imports it.
+"""
+
+import os
+import tempfile
+
+# Keep the price store and any written outputs out of the working tree
+WORK_DIR = tempfile.mkdtemp(prefix="analytics-tests-")
+os.environ.setdefault("PRICE_STORE_DIR", os.path.join(WORK_DIR, "price_store"))
+os.environ.setdefault("ANALYTICS_OUTPUT_DIR", os.path.join(WORK_DIR, "analytics_output"))
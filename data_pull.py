@@ -1,54 +1,112 @@
 import pandas as pd
-from twelvedata import TDClient
 from datetime import datetime
 import os
+from td_client import TwelveDataClient, RateLimitError
+from metrics import record_cache
 
 class StockDataPuller:
-    def __init__(self, api_key):
-        """Initialize the Twelve Data client with API key"""
-        self.td = TDClient(apikey=api_key)
+    START_DATE = "2019-12-01"
+    END_DATE = "2024-12-31"
+    INTERVAL = "1month"
+
+    def __init__(self, api_key, store=None, client=None):
+        """
+        Initialize the puller with an API key, an optional PriceStore and an
+        optional shared TwelveDataClient
+
+        Pass a long-lived client to reuse its connections and rate limiter
+        across pullers; otherwise one is created for this puller. Requests
+        served entirely from the store do no network I/O.
+        """
+        self.api_key = api_key
+        self.store = store
+        self.client = client or TwelveDataClient(api_key)
         self.symbols = ["MSFT", "NFLX", "NVDA"]
+
+    def fetch_time_series(self, symbol, start_date, end_date, interval=INTERVAL):
+        """Download one date range from Twelve Data as a DataFrame"""
+        return self.client.time_series(symbol, interval, start_date, end_date)
     
-    def get_monthly_data(self, symbol):
-        """Pull monthly data from Dec 2019 to Dec 2024"""
-        try:
-            ts = self.td.time_series(
-                symbol=symbol,
-                interval="1month",
-                start_date="2019-12-01",
-                end_date="2024-12-31",
-                outputsize=5000
+    @staticmethod
+    def last_closed_month():
+        """End of the last complete month, so a month's bar is only stored once it is final"""
+        return pd.Timestamp.today().normalize() - pd.offsets.MonthEnd(1)
+    
+    def sync_store(self, symbol, end_date=None):
+        """
+        Fetch only the ranges from Dec 2019 to `end_date` the store has not seen yet
+        
+        The default end is END_DATE (the window get_monthly_data serves); pass
+        last_closed_month() to keep extending the stored history as months close.
+        
+        A month can be published upstream some time after it closes, so the
+        trailing range only counts as fetched up to the last bar received;
+        anything after it is asked for again on the next sync.
+        """
+        requested_end = pd.Timestamp(end_date) if end_date is not None else pd.Timestamp(self.END_DATE)
+        missing = self.store.missing_ranges(symbol, self.INTERVAL, pd.Timestamp(self.START_DATE), requested_end)
+        record_cache("price_store", hit=not missing)
+        for start, end in missing:
+            fetched = self.fetch_time_series(
+                symbol, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
             )
+            if end == requested_end:
+                if fetched is None or len(fetched) == 0:
+                    continue
+                end = min(end, pd.to_datetime(fetched['datetime']).max() + pd.offsets.MonthEnd(0))
+            self.store.append(symbol, self.INTERVAL, fetched, start, end)
+    
+    def get_monthly_data(self, symbol, end_date=None):
+        """
+        Pull monthly data from Dec 2019 to `end_date` (default Dec 2024),
+        reading the local store first
+        """
+        try:
+            start_filter = pd.Timestamp(self.START_DATE)
+            end_filter = pd.Timestamp(end_date) if end_date is not None else pd.Timestamp(self.END_DATE)
             
-            df = ts.as_pandas()
-            df['symbol'] = symbol
-            df.reset_index(inplace=True)
+            if self.store is not None:
+                self.sync_store(symbol, end_filter)
+                df = self.store.load(symbol, self.INTERVAL, start_filter, end_filter)
+            else:
+                df = self.fetch_time_series(symbol, self.START_DATE, end_filter.strftime("%Y-%m-%d"))
             
             # Filter for exact date range
-            df['datetime'] = pd.to_datetime(df['datetime'])
-            start_filter = pd.Timestamp('2019-12-01')
-            end_filter = pd.Timestamp('2024-12-31')
             filtered_data = df[(df['datetime'] >= start_filter) & (df['datetime'] <= end_filter)]
             
             return filtered_data.sort_values('datetime')
             
+        except RateLimitError:
+            # Let callers tell throttling apart from missing data
+            raise
         except Exception as e:
             print(f"Error fetching data for {symbol}: {str(e)}")
             return None
     
-    def pull_data(self):
-        """Pull monthly data for all symbols and save individual CSV files"""
-        for symbol in self.symbols:
+    def pull_data(self, symbols=None, save_csv=True, end_date=None):
+        """
+        Pull monthly data for `symbols` (default: self.symbols) up to `end_date`
+        (default Dec 2024), optionally saving individual CSV files
+
+        Returns {symbol: DataFrame} for the symbols that could be retrieved, so
+        batch jobs (universe_snapshot.py) can reuse the pull without the CSVs.
+        """
+        end_label = pd.Timestamp(end_date or self.END_DATE).strftime("%Y%b")
+        pulled = {}
+        for symbol in symbols or self.symbols:
             print(f"Processing {symbol}...")
-            data = self.get_monthly_data(symbol)
+            data = self.get_monthly_data(symbol, end_date)
             
             if data is not None:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"{symbol}_monthly_2019Dec_2024Dec_{timestamp}.csv"
-                data.to_csv(filename, index=False)
-                print(f"Saved {symbol} data to {filename} ({len(data)} records)")
+                pulled[symbol] = data
+                if save_csv:
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    filename = f"{symbol}_monthly_2019Dec_{end_label}_{timestamp}.csv"
+                    data.to_csv(filename, index=False)
+                    print(f"Saved {symbol} data to {filename} ({len(data)} records)")
             else:
                 print(f"Failed to retrieve data for {symbol}")
+        return pulled
 
 def main():
     API_KEY = os.getenv('TWELVE_DATA_API_KEY', "28633be741c54cedba797cd8298f24c8")
@@ -1,26 +1,145 @@
 import pandas as pd
 import numpy as np
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict, Any
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Match
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Dict, Any, Optional, Literal
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from collections import OrderedDict
 import os
+import asyncio
+import contextvars
+import functools
+import glob
+import json
+import queue
+import shutil
+import threading
+import time
+import uuid
+try:
+    import orjson  # Fast path for NDJSON output
+except ImportError:
+    orjson = None
 from data_pull import StockDataPuller
+from td_client import TwelveDataClient, RateLimitError
+from price_store import PriceStore
+from price_matrix import PriceMatrix, PriceSlice
+from process_pool import AnalyticsProcessPool, SharedArrays, attach, chunk_ranges
+from arrow_ipc import ARROW_STREAM_MEDIA_TYPE, write_tables
+from result_cache import ResultCache, SQLiteResultBackend
+from analytics_state import AnalyticsStateStore
+from universe_snapshot import UniverseSnapshot
+from metrics import (
+    PROMETHEUS_MEDIA_TYPE, ERRORS, REQUEST_SECONDS, registry, record_cache, server_timing_header,
+    stage, start_request_timings
+)
 
 # Import math functions from assets folder
-from assets.mdd import calculate_drawdown_analysis, calculate_max_drawdown
+from assets.mdd import calculate_rolling_drawdown, calculate_drawdown_statistics
+from assets.beta import calculate_betas, calculate_rolling_beta
+from assets.returns import calculate_simple_returns, is_consecutive_monthly, month_end_labels
+from assets.bootstrap import bootstrap_beta_wacc, bootstrap_chunks, default_block_size, percentile_interval
 from assets.wacc import (
-    calculate_market_return, calculate_cost_of_equity, calculate_cost_of_debt, 
-    calculate_wacc, calculate_unlevered_beta, calculate_levered_beta
+    calculate_unlevered_beta, calculate_wacc_curve, optimize_wacc, calculate_wacc_sensitivity
 )
 
 app = FastAPI(title="Financial Analytics API", version="1.0.0")
 
+# Where /analytics/run writes its artifacts, and in which format:
+# "parquet" (compact columnar, default), "csv" (legacy wide CSV) or "both".
+# Retention deletes old outputs from this directory, so keep it dedicated
+ANALYTICS_OUTPUT_DIR = os.getenv('ANALYTICS_OUTPUT_DIR', 'analytics_output')
+ANALYTICS_OUTPUT_FORMAT = os.getenv('ANALYTICS_OUTPUT_FORMAT', 'parquet')
+# Outputs kept per ticker (0 keeps everything) and max writes waiting in the queue
+ANALYTICS_RETENTION = int(os.getenv('ANALYTICS_RETENTION', 5))
+ANALYTICS_MAX_PENDING_WRITES = int(os.getenv('ANALYTICS_MAX_PENDING_WRITES', 100))
+
+# Number of drawdown episodes reported per ticker
+DRAWDOWN_TOP_N = int(os.getenv('DRAWDOWN_TOP_N', 5))
+
+# Upper bound on concurrent upstream fetches for /analytics/batch
+BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', 8))
+
+# Bootstrap resamples per CPU task; chunks of a large run are spread over the CPU executor
+BOOTSTRAP_CHUNK_SIZE = int(os.getenv('BOOTSTRAP_CHUNK_SIZE', 2500))
+
+# Largest (tax × risk-free × D/E × debt ratio) array evaluated by /analytics/sensitivity,
+# i.e. scenarios times curve_points
+SENSITIVITY_MAX_POINTS = int(os.getenv('SENSITIVITY_MAX_POINTS', 2_000_000))
+
+# Accept header values that switch /analytics/run and /analytics/batch away from JSON:
+# NDJSON lines, or Arrow IPC record batches (ARROW_STREAM_MEDIA_TYPE)
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Add a Server-Timing header with per-stage durations to every response ("1" to enable)
+SERVER_TIMING = os.getenv('SERVER_TIMING', '0') == '1'
+
+# Model assumptions: company-specific D/E ratios for 2024 end, tax and risk-free rates
+DE_RATIOS = {"MSFT": 0.25, "NFLX": 0.63}
+DEFAULT_DE_RATIO = 0.30
+TAX_RATE = 0.30
+RISK_FREE_RATE = 0.04
+
+API_KEY = os.getenv('TWELVE_DATA_API_KEY', "28633be741c54cedba797cd8298f24c8")
+
+# Local on-disk price cache shared by every request (directory from $PRICE_STORE_DIR)
+price_store = PriceStore()
+
+# Incremental per-ticker analytics over the stored history, kept in the same database
+analytics_states = AnalyticsStateStore(price_store, benchmark="SPY", top_n=DRAWDOWN_TOP_N)
+
+# Optional memory-mapped close matrix (price_matrix.py) for large universes: when
+# set, datapull and the batch endpoints read covered symbols from it instead of
+# the store, and the batch paths work on zero-copy array views
+PRICE_MATRIX_DIR = os.getenv('PRICE_MATRIX_DIR')
+price_matrix = PriceMatrix(PRICE_MATRIX_DIR) if PRICE_MATRIX_DIR else None
+
+# Standard-window (1y/3y/5y) results precomputed by universe_snapshot.py, memory-mapped
+UNIVERSE_SNAPSHOT_PATH = os.getenv('UNIVERSE_SNAPSHOT_PATH',
+                                   os.path.join(price_store.directory, "universe_snapshot.npy"))
+universe_snapshot = UniverseSnapshot(UNIVERSE_SNAPSHOT_PATH)
+
+# One long-lived Twelve Data client: keep-alive connections, credit-aware
+# scheduling, coalescing and multi-symbol calls across all requests
+td_client = TwelveDataClient(
+    API_KEY,
+    credits_per_minute=int(os.getenv('TWELVE_DATA_CREDITS_PER_MINUTE', 8)),
+    max_batch_symbols=int(os.getenv('TWELVE_DATA_MAX_BATCH_SYMBOLS', 8))
+)
+
 # Pydantic Models
 class AnalyticsRequest(BaseModel):
     ticker: str
     start_date: str
     end_date: str
+    persist: bool = True  # Queue the enhanced output for writing to disk
+    # "grid" takes the optimum from the 1%-step curve; "refine" searches to 1e-6
+    optimizer: Literal["grid", "refine"] = "grid"
+    curve_points: int = Field(100, ge=0, le=10000)  # WACC curve resolution; 0 skips the curve
+    # Block-bootstrap confidence intervals for beta and optimal WACC (0 disables)
+    bootstrap: int = Field(0, ge=0, le=100000)
+    bootstrap_seed: Optional[int] = Field(None, ge=0, lt=2**63)  # Fixed seed for reproducible intervals
+    bootstrap_block_size: Optional[int] = Field(None, ge=1)  # Months per block; about n^(1/3) by default
+    confidence: float = Field(0.95, gt=0, lt=1)
+
+class ConfidenceInterval(BaseModel):
+    lower: float
+    median: float
+    upper: float
+
+class BootstrapSummary(BaseModel):
+    samples: int
+    block_size: int
+    confidence: float
+    seed: int  # Pass back as bootstrap_seed to reproduce these intervals
+    beta: ConfidenceInterval
+    market_return: ConfidenceInterval
+    optimal_wacc: ConfidenceInterval
+    optimal_debt_ratio: ConfidenceInterval
 
 class AnalyticsResponse(BaseModel):
     ticker: str
@@ -33,16 +152,150 @@ class AnalyticsResponse(BaseModel):
     drawdown_curve: List[float]
     rebase_curve: List[float]
     wacc_curve: List[Dict[str, float]]
+    drawdown_peak_date: Optional[str] = None
+    drawdown_trough_date: Optional[str] = None
+    drawdown_recovery_date: Optional[str] = None  # None while still under water
+    time_under_water: Optional[int] = None  # Longest stretch below a prior peak, in months
+    drawdown_episodes: List[Dict[str, Any]] = []  # Deepest DRAWDOWN_TOP_N episodes
+    bootstrap: Optional[BootstrapSummary] = None  # Only when the request asks for resampling
+
+class BatchAnalyticsRequest(BaseModel):
+    tickers: List[str]
+    start_date: str
+    end_date: str
+    optimizer: Literal["grid", "refine"] = "grid"
+    curve_points: int = Field(100, ge=0, le=10000)
+
+class BatchTickerResult(BaseModel):
+    ticker: str
+    status: str  # "ok" or "error"
+    result: Optional[AnalyticsResponse] = None
+    error: Optional[str] = None
+
+class BatchAnalyticsResponse(BaseModel):
+    start_date: str
+    end_date: str
+    results: List[BatchTickerResult]
+
+class BetaResult(BaseModel):
+    ticker: str
+    status: str  # "ok" or "error"
+    beta: Optional[float] = None
+    alpha: Optional[float] = None
+    r_squared: Optional[float] = None
+    observations: int = 0
+    error: Optional[str] = None
+
+class BetaResponse(BaseModel):
+    start_date: str
+    end_date: str
+    results: List[BetaResult]
+
+class SweepRange(BaseModel):
+    start: float
+    stop: float
+    steps: int = Field(1, ge=1, le=1000)  # Evenly spaced values from start to stop, inclusive
+
+    def values(self) -> np.ndarray:
+        return np.linspace(self.start, self.stop, self.steps)
+
+class SensitivityRequest(BaseModel):
+    ticker: str
+    start_date: str
+    end_date: str
+    tax_rate: SweepRange = SweepRange(start=TAX_RATE, stop=TAX_RATE)
+    risk_free_rate: SweepRange = SweepRange(start=RISK_FREE_RATE, stop=RISK_FREE_RATE)
+    de_ratio: Optional[SweepRange] = None  # Defaults to the ticker's own D/E
+    curve_points: int = Field(100, ge=1, le=1000)  # Debt-ratio grid searched for each optimum
+
+class SensitivityResponse(BaseModel):
+    ticker: str
+    beta: float
+    dims: List[str]  # Axis order of the grids below
+    tax_rate: List[float]
+    risk_free_rate: List[float]
+    de_ratio: List[float]
+    unlevered_beta: List[List[List[float]]]
+    optimal_wacc: List[List[List[float]]]
+    optimal_debt_ratio: List[List[List[float]]]
+
+class AnalyticsStateResponse(BaseModel):
+    ticker: str
+    first_date: Optional[str] = None
+    last_date: Optional[str] = None
+    months: int  # Bars folded into the state
+    observations: int  # Months with both a stock and a SPY return
+    max_drawdown: float
+    drawdown_peak_date: Optional[str] = None
+    drawdown_trough_date: Optional[str] = None
+    drawdown_recovery_date: Optional[str] = None
+    time_under_water: int
+    drawdown_episodes: List[Dict[str, Any]] = []
+    # None until there are two return pairs
+    beta: Optional[float] = None
+    unlevered_beta: Optional[float] = None
+    market_return: Optional[float] = None
+    optimal_wacc: Optional[float] = None
+    optimal_debt_ratio: Optional[float] = None
+    appended: int  # Bars added by this refresh
+    rebuilt: bool  # Replayed from the full history after a backfill or correction
+
+class SnapshotResult(BaseModel):
+    ticker: str
+    window: str  # "1y", "3y" or "5y" of monthly returns ending at end_date
+    start_date: str  # First bar; /analytics/run over start_date..end_date matches given the same bars
+    end_date: str
+    months: int
+    observations: int
+    max_drawdown: float
+    drawdown_peak_date: Optional[str] = None
+    drawdown_trough_date: Optional[str] = None
+    drawdown_recovery_date: Optional[str] = None
+    beta: float
+    unlevered_beta: float
+    market_return: float
+    optimal_wacc: float
+    optimal_debt_ratio: float
+    computed_at: str
+
+class UniverseSnapshotResponse(BaseModel):
+    window: str
+    results: List[SnapshotResult]
+
+class RollingAnalyticsRequest(BaseModel):
+    # Only what the rolling series depend on; anything else is rejected, not ignored
+    model_config = ConfigDict(extra="forbid")
+    
+    ticker: str
+    start_date: str
+    end_date: str
+    window: int = Field(36, ge=2)  # Months per rolling estimate
+
+class RollingAnalyticsResponse(BaseModel):
+    ticker: str
+    window: int
+    dates: List[str]
+    rolling_beta: List[Optional[float]]  # None until a full window of returns is available
+    rolling_drawdown: List[float]
+    rolling_max_drawdown: List[float]
 
 # Data pull wrapper function
 def datapull(ticker: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
     """
     Wrapper function for data pulling that returns DataFrame with close column
+    
+    Symbols in the price matrix come back as a DataFrame over read-only views
+    of the mapped column (no copy, no upstream call).
     """
-    API_KEY = os.getenv('TWELVE_DATA_API_KEY', "28633be741c54cedba797cd8298f24c8")
-    puller = StockDataPuller(API_KEY)
+    puller = StockDataPuller(API_KEY, store=price_store, client=td_client)
     
     try:
+        prices = matrix_slice(ticker, start_date, end_date)
+        if prices is not None:
+            if not len(prices.dates):
+                raise ValueError(f"No data returned for ticker {ticker}")
+            return price_frame(prices)
+        
         # Use the existing get_monthly_data method
         df = puller.get_monthly_data(ticker)
         if df is None:
@@ -67,16 +320,62 @@ def datapull(ticker: str, start_date: str = None, end_date: str = None) -> pd.Da
         
         return df.sort_values('datetime').reset_index(drop=True)
         
+    except RateLimitError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching data for {ticker}: {str(e)}")
 
+def matrix_slice(ticker: str, start_date: str = None, end_date: str = None) -> Optional[PriceSlice]:
+    """Zero-copy (dates, close) views for a ticker from the price matrix, or None if it is not there"""
+    if price_matrix is None:
+        return None
+    return price_matrix.slice(ticker, start_date, end_date)
+
+def price_frame(prices: PriceSlice) -> pd.DataFrame:
+    """datetime/close DataFrame backed by the slice's arrays (no copy)"""
+    return pd.DataFrame({'datetime': prices.dates, 'close': prices.close}, copy=False)
+
 # Financial Analytics Functions - Using functions from assets folder
-def compute_monthly_returns(df: pd.DataFrame) -> pd.DataFrame:
+def compute_monthly_returns(df, dropna: bool = True):
     """
     Convert price data to monthly frequency and compute returns
     Note: When we have Dec 2019 data, Jan 2020 return should be calculated properly.
     The pct_change() method will create NaN for the first row, so we handle this case.
+    Pass dropna=False to keep that first row (used by the benchmark cache).
+    
+    Input that is already one bar per consecutive month (the Twelve Data feed)
+    takes a NumPy fast path; daily or irregular input is resampled. A 2-D array
+    of monthly prices (months x tickers) returns the matrix of returns.
     """
+    if isinstance(df, np.ndarray):
+        return calculate_simple_returns(df)
+    
+    dates = df['datetime']
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates)
+    dates = dates.to_numpy()
+    close = df['close'].to_numpy(dtype=float)
+    
+    if np.isnan(close).any() or not is_consecutive_monthly(dates):
+        return _resample_monthly_returns(df, dropna)
+    
+    # Already monthly: same rows resample('M').last() would give, without the resample
+    columns = {'datetime': month_end_labels(dates)}
+    for col in df.columns:
+        if col != 'datetime':
+            columns[col] = df[col].to_numpy()
+    monthly_return = np.empty(len(close))
+    monthly_return[0] = np.nan
+    monthly_return[1:] = calculate_simple_returns(close)
+    columns['monthly_return'] = monthly_return
+    
+    result_df = pd.DataFrame(columns)
+    if dropna:
+        result_df = result_df.iloc[1:]
+    return result_df
+
+def _resample_monthly_returns(df: pd.DataFrame, dropna: bool = True) -> pd.DataFrame:
+    """Resampling path of compute_monthly_returns for daily or irregular input"""
     df = df.copy()
     df['datetime'] = pd.to_datetime(df['datetime'])
     df.set_index('datetime', inplace=True)
@@ -100,36 +399,196 @@ def compute_monthly_returns(df: pd.DataFrame) -> pd.DataFrame:
     
     # For financial analysis, it's common to drop the first NaN return
     # since you need a previous period to calculate a return
-    result_df = result_df.dropna(subset=['monthly_return'])
+    if dropna:
+        result_df = result_df.dropna(subset=['monthly_return'])
     
     return result_df
 
-def compute_max_drawdown(df: pd.DataFrame) -> tuple:
+class BenchmarkCache:
+    """
+    Shared in-process cache of benchmark (SPY) monthly returns
+    
+    The full resampled series is loaded once per symbol and any
+    (start_date, end_date) window is sliced from it. Entries expire after
+    `ttl_seconds` and the least recently used symbol is evicted beyond
+    `max_entries`. Concurrent misses for the same symbol wait on one fetch.
+    """
+    
+    def __init__(self, ttl_seconds: float = 3600, max_entries: int = 8):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # symbol -> (loaded_at, monthly_df)
+        self._refreshed = {}  # symbol -> wall-clock time of the last load, for dependent caches
+        self._lock = threading.Lock()
+        self._loading = {}  # symbol -> lock held by the thread doing the fetch
+    
+    def _lookup(self, symbol: str):
+        entry = self._entries.get(symbol)
+        if entry is None:
+            return None
+        loaded_at, monthly_df = entry
+        if time.monotonic() - loaded_at > self.ttl_seconds:
+            del self._entries[symbol]
+            return None
+        self._entries.move_to_end(symbol)
+        return monthly_df
+    
+    def _load(self, symbol: str) -> pd.DataFrame:
+        prices = datapull(symbol)
+        prices['datetime'] = pd.to_datetime(prices['datetime'])
+        # Keep each month's bar date so windows are cut exactly like datapull does
+        prices['bar_datetime'] = prices['datetime']
+        return compute_monthly_returns(prices, dropna=False)
+    
+    def get(self, symbol: str = "SPY") -> pd.DataFrame:
+        """Return the full monthly return series for `symbol`, fetching it at most once"""
+        with self._lock:
+            monthly_df = self._lookup(symbol)
+            if monthly_df is not None:
+                record_cache("benchmark", hit=True)
+                return monthly_df
+            load_lock = self._loading.setdefault(symbol, threading.Lock())
+        
+        with load_lock:
+            # Another request may have filled the entry while we waited
+            with self._lock:
+                monthly_df = self._lookup(symbol)
+                if monthly_df is not None:
+                    record_cache("benchmark", hit=True)
+                    return monthly_df
+            
+            record_cache("benchmark", hit=False)
+            monthly_df = self._load(symbol)
+            
+            with self._lock:
+                self._entries[symbol] = (time.monotonic(), monthly_df)
+                self._refreshed[symbol] = time.time()
+                self._entries.move_to_end(symbol)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                self._loading.pop(symbol, None)
+        
+        return monthly_df
+    
+    def window(self, symbol: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """
+        Monthly returns for a date window, identical to running datapull with the
+        window and then compute_monthly_returns
+        """
+        monthly_df = self.get(symbol)
+        mask = pd.Series(True, index=monthly_df.index)
+        if start_date:
+            mask &= monthly_df['bar_datetime'] >= pd.to_datetime(start_date)
+        if end_date:
+            mask &= monthly_df['bar_datetime'] <= pd.to_datetime(end_date)
+        
+        # The first bar in the window has no in-window predecessor, so no return
+        result_df = monthly_df[mask].iloc[1:]
+        result_df = result_df.dropna(subset=['monthly_return'])
+        return result_df.drop(columns=['bar_datetime']).reset_index(drop=True)
+    
+    def refreshed_at(self, symbol: str = "SPY") -> Optional[float]:
+        """Wall-clock time `symbol` was last loaded in this process, or None"""
+        return self._refreshed.get(symbol)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._refreshed.clear()
+
+benchmark_cache = BenchmarkCache(
+    ttl_seconds=float(os.getenv('BENCHMARK_CACHE_TTL', 3600)),
+    max_entries=int(os.getenv('BENCHMARK_CACHE_SIZE', 8))
+)
+
+# Encoded /analytics/run responses. Entries live at most as long as the
+# benchmark data they were computed from; set RESULT_CACHE_PATH to share
+# them between workers through one SQLite file.
+RESULT_CACHE_PATH = os.getenv('RESULT_CACHE_PATH')
+result_cache = ResultCache(
+    ttl_seconds=float(os.getenv('RESULT_CACHE_TTL', benchmark_cache.ttl_seconds)),
+    max_entries=int(os.getenv('RESULT_CACHE_SIZE', 256)),
+    max_bytes=int(os.getenv('RESULT_CACHE_MAX_MB', 256)) * 2**20,
+    backend=SQLiteResultBackend(RESULT_CACHE_PATH) if RESULT_CACHE_PATH else None
+)
+
+@functools.lru_cache(maxsize=1024)
+def _normalize_date(value: str) -> str:
+    try:
+        return pd.Timestamp(value).isoformat()
+    except ValueError:
+        return value
+
+def result_cache_key(request: AnalyticsRequest, ticker: str, output: str) -> Optional[str]:
+    """
+    Result cache key for an /analytics/run request: normalized ticker and
+    window, the remaining request options, the model assumptions (tax rate,
+    risk-free rate, D/E) and the response format
+    Returns None when the result is not reproducible (bootstrap without a seed)
+    """
+    if request.bootstrap and request.bootstrap_seed is None:
+        return None
+    exclude = {'ticker', 'start_date', 'end_date'}
+    if not request.bootstrap:
+        exclude |= {'bootstrap_seed', 'bootstrap_block_size', 'confidence'}
+    return json.dumps([
+        ticker, _normalize_date(request.start_date), _normalize_date(request.end_date), output,
+        request.model_dump(exclude=exclude),
+        {'tax_rate': TAX_RATE, 'risk_free_rate': RISK_FREE_RATE, 'de_ratio': DE_RATIOS.get(ticker, DEFAULT_DE_RATIO)}
+    ], sort_keys=True)
+
+def compute_max_drawdown(df: pd.DataFrame, return_stats: bool = False) -> tuple:
     """
     Compute maximum drawdown using assets/mdd.py functions
+    With return_stats=True also returns the kernel's recovery/episode statistics
     """
-    # Use the calculate_drawdown_analysis function from assets/mdd.py
-    analysis_df = calculate_drawdown_analysis(df['close'])
+    # Single pass over the prices with the drawdown kernel from assets/mdd.py
+    stats = calculate_drawdown_statistics(df['close'].to_numpy(dtype=float), top_n=DRAWDOWN_TOP_N)
     
     # Extract the required columns and rename to match expected format
     df = df.copy()
-    df['monthly_return'] = analysis_df['Return'] / 100  # Convert from percentage to decimal
-    df['rebase_100'] = analysis_df['Rebase']
-    df['rolling_max'] = analysis_df['Peak']
-    df['drawdown'] = analysis_df['Drawdown'] / 100  # Convert from percentage to decimal
+    df['monthly_return'] = stats['returns']
+    df['rebase_100'] = stats['rebase']
+    df['rolling_max'] = stats['peak']
+    df['drawdown'] = stats['drawdown'] / 100  # Convert from percentage to decimal
     
-    # Get maximum drawdown using the assets function (keep as percentage)
-    max_drawdown = calculate_max_drawdown(analysis_df['Drawdown'])  # Keep as percentage
+    # Maximum drawdown (keep as percentage)
+    max_drawdown = stats['max_drawdown']
     
+    if return_stats:
+        return df, max_drawdown, stats
     return df, max_drawdown
 
-def compute_beta(stock_df: pd.DataFrame, start_date: str, end_date: str) -> tuple:
+def describe_drawdowns(enhanced_df: pd.DataFrame, stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn drawdown kernel positions into dates for the response"""
+    dates = pd.to_datetime(enhanced_df['datetime']).dt.strftime('%Y-%m-%d').tolist()
+    
+    def date_at(index):
+        return dates[index] if index is not None else None
+    
+    return {
+        'drawdown_peak_date': date_at(stats['peak_index']),
+        'drawdown_trough_date': date_at(stats['trough_index']),
+        'drawdown_recovery_date': date_at(stats['recovery_index']),
+        'time_under_water': stats['time_under_water'],
+        'drawdown_episodes': [
+            {
+                'peak_date': date_at(episode['peak_index']),
+                'trough_date': date_at(episode['trough_index']),
+                'recovery_date': date_at(episode['recovery_index']),
+                'depth': episode['depth'] / 100,  # Convert from percentage to decimal
+                'duration_months': episode['duration']
+            }
+            for episode in stats['episodes']
+        ]
+    }
+
+def align_with_benchmark(stock_df: pd.DataFrame, spy_monthly: pd.DataFrame) -> pd.DataFrame:
     """
-    Compute beta against SPY
+    Inner-join stock and SPY monthly returns on date, dropping missing values
+    Columns: datetime, monthly_return_stock, monthly_return_spy
     """
-    # Get SPY data and compute monthly returns
-    spy_df = datapull("SPY", start_date, end_date)
-    spy_monthly = compute_monthly_returns(spy_df)
+    spy_monthly = spy_monthly.copy()
     
     # Align stock and SPY returns by date
     stock_df['datetime'] = pd.to_datetime(stock_df['datetime'])
@@ -138,7 +597,19 @@ def compute_beta(stock_df: pd.DataFrame, start_date: str, end_date: str) -> tupl
     merged = pd.merge(stock_df[['datetime', 'monthly_return']], 
                      spy_monthly[['datetime', 'monthly_return']], 
                      on='datetime', suffixes=('_stock', '_spy'))
-    merged = merged.dropna()
+    return merged.dropna()
+
+def compute_beta(stock_df: pd.DataFrame, start_date: str, end_date: str,
+                 spy_monthly: pd.DataFrame = None) -> tuple:
+    """
+    Compute beta against SPY
+    Batch callers pass spy_monthly so the benchmark window is sliced only once
+    """
+    # Get SPY monthly returns for the window from the shared benchmark cache
+    if spy_monthly is None:
+        spy_monthly = benchmark_cache.window("SPY", start_date, end_date)
+    
+    merged = align_with_benchmark(stock_df, spy_monthly)
     
     if len(merged) < 2:
         raise ValueError("Insufficient data to compute beta")
@@ -150,13 +621,44 @@ def compute_beta(stock_df: pd.DataFrame, start_date: str, end_date: str) -> tupl
     
     return beta, merged['monthly_return_spy']
 
+def build_returns_matrix(monthly_frames: Dict[str, Any], spy_monthly: pd.DataFrame) -> tuple:
+    """
+    Align many tickers' monthly returns on the SPY dates
+    Frames may be DataFrames or prepare_slice_returns columns (datetime and monthly_return)
+    Returns (dates, returns matrix (dates x tickers, NaN where missing), SPY return vector)
+    """
+    spy_dates = pd.DatetimeIndex(pd.to_datetime(spy_monthly['datetime']))
+    matrix = np.full((len(spy_dates), len(monthly_frames)), np.nan)
+    for j, df in enumerate(monthly_frames.values()):
+        rows = spy_dates.get_indexer(pd.DatetimeIndex(pd.to_datetime(df['datetime'])))
+        found = rows >= 0
+        matrix[rows[found], j] = np.asarray(df['monthly_return'], dtype=float)[found]
+    return spy_dates, matrix, spy_monthly['monthly_return'].to_numpy(dtype=float)
+
+def compute_betas(monthly_frames: Dict[str, pd.DataFrame], spy_monthly: pd.DataFrame) -> Dict[str, tuple]:
+    """
+    Compute beta, alpha and R² for many tickers with one matrix operation
+    Returns {ticker: (stats dict, aligned SPY returns)}; beta matches compute_beta
+    """
+    if not monthly_frames:
+        return {}
+    
+    _, returns_matrix, spy_returns = build_returns_matrix(monthly_frames, spy_monthly)
+    stats = calculate_betas(returns_matrix, spy_returns)
+    
+    results = {}
+    for j, ticker in enumerate(monthly_frames):
+        # SPY returns on the dates this ticker has data, as compute_beta returns them
+        observed = ~np.isnan(returns_matrix[:, j]) & ~np.isnan(spy_returns)
+        ticker_stats = {key: values[j].item() for key, values in stats.items()}
+        results[ticker] = (ticker_stats, pd.Series(spy_returns[observed], name='monthly_return_spy'))
+    return results
+
 def compute_unlevered_beta(beta: float, ticker: str) -> float:
     """
     Compute unlevered beta using assets/wacc.py function
     """
-    # Company-specific D/E ratios for 2024 end
-    de_ratios = {"MSFT": 0.25, "NFLX": 0.63}
-    de_ratio = de_ratios.get(ticker.upper(), 0.30)
+    de_ratio = DE_RATIOS.get(ticker.upper(), DEFAULT_DE_RATIO)
     
     # Calculate equity and debt values based on D/E ratio
     # Assume equity = 1, then debt = de_ratio
@@ -164,125 +666,229 @@ def compute_unlevered_beta(beta: float, ticker: str) -> float:
     debt_value = de_ratio
     
     # Use the calculate_unlevered_beta function from assets/wacc.py
-    unlevered_beta = calculate_unlevered_beta(beta, debt_value, equity_value, tax_rate=0.30)
+    unlevered_beta = calculate_unlevered_beta(beta, debt_value, equity_value, tax_rate=TAX_RATE)
     return unlevered_beta
 
-def compute_wacc_curve(unlevered_beta: float, spy_returns: pd.Series) -> tuple:
+def debt_ratio_grid(points: int) -> np.ndarray:
+    """Debt ratios 0, 1/points, ..., (points-1)/points (100 points gives the 1% grid)"""
+    return np.arange(points) * (1.0 / points)
+
+def compute_wacc_curve(unlevered_beta: float, spy_returns: pd.Series, debt_ratios: np.ndarray = None,
+                       curve_points: int = 100, optimizer: str = "grid") -> tuple:
     """
     Compute WACC curve using assets/wacc.py functions
+    The whole debt-ratio grid (default 0% to 99% in 1% steps) is evaluated in one vectorized pass
+    
+    curve_points sets the grid (0 to (n-1)/n debt) when debt_ratios is not given;
+    0 returns no curve. With optimizer="refine" the optimum comes from
+    optimize_wacc instead of the grid, so it no longer depends on curve_points.
     """
-    risk_free_rate = 0.04
+    risk_free_rate = RISK_FREE_RATE
     
-    # Calculate market return using assets/wacc.py function
-    spy_returns_clean = spy_returns.dropna()
-    if len(spy_returns_clean) > 0:
-        market_return = calculate_market_return(spy_returns_clean) / 100  # Convert from percentage
-    else:
-        market_return = 0.10  # Default 10%
+    spy_returns_clean = spy_returns.dropna().to_numpy()
     
-    wacc_data = []
-    debt_ratios = np.arange(0.0, 1.00, 0.01)  # 0% to 99% in 1% steps
+    if debt_ratios is None:
+        debt_ratios = debt_ratio_grid(curve_points or 100)
     
-    for debt_ratio in debt_ratios:
-        equity_ratio = 1 - debt_ratio
-        
-        if equity_ratio == 0:
-            continue
-        
-        # Calculate values assuming total value = 1
-        debt_value = debt_ratio
-        equity_value = equity_ratio
-        
-        # Calculate relevered beta using assets/wacc.py
-        relevered_beta = calculate_levered_beta(unlevered_beta, debt_value, equity_value)
-        
-        # Calculate cost of equity using assets/wacc.py (pass monthly returns array)
-        cost_of_equity = calculate_cost_of_equity(relevered_beta, spy_returns_clean, risk_free_rate)
-        
-        # Calculate cost of debt using assets/wacc.py
-        cost_of_debt = calculate_cost_of_debt(debt_ratio * 100)  # Convert to percentage
-        
-        # Calculate WACC using assets/wacc.py with tax shield
-        wacc = calculate_wacc(equity_value, debt_value, cost_of_equity, cost_of_debt, tax_rate=0.30)
+    wacc_data = []
+    if optimizer == "grid" or curve_points:
+        curve, optimal_wacc, optimal_debt_ratio = calculate_wacc_curve(
+            unlevered_beta, spy_returns_clean, debt_ratios,
+            risk_free=risk_free_rate, tax_rate=TAX_RATE
+        )
         
-        wacc_data.append({
-            'debt_ratio': float(debt_ratio),
-            'equity_ratio': float(equity_ratio),
-            'relevered_beta': float(relevered_beta),
-            'cost_of_equity': float(cost_of_equity),
-            'wacc': float(wacc)
-        })
-    
-    # Find optimal WACC (minimum)
-    if wacc_data:
-        optimal_point = min(wacc_data, key=lambda x: x['wacc'])
-        optimal_wacc = optimal_point['wacc']
-        optimal_debt_ratio = optimal_point['debt_ratio']
-    else:
-        optimal_wacc = 0.0
-        optimal_debt_ratio = 0.0
+        # Convert to the list-of-points format used by the response and CSV output
+        if curve_points:
+            keys = list(curve.keys())
+            wacc_data = [dict(zip(keys, point)) for point in zip(*(curve[k].tolist() for k in keys))]
+    
+    if optimizer == "refine":
+        optimal_wacc, optimal_debt_ratio, _ = optimize_wacc(
+            unlevered_beta, spy_returns_clean, risk_free=risk_free_rate, tax_rate=TAX_RATE
+        )
     
     return wacc_data, optimal_wacc, optimal_debt_ratio
 
-def save_enhanced_csv(df: pd.DataFrame, ticker: str, wacc_data: List[Dict]) -> None:
+def compute_rolling_metrics(enhanced_df: pd.DataFrame, spy_monthly: pd.DataFrame, window: int) -> pd.DataFrame:
+    """
+    Rolling beta against SPY and rolling drawdown over `window` months
+    Beta and the rolling peak are O(n) incremental updates (running sums /
+    monotonic deque); the per-window maximum drawdown is one vectorized pass
+    """
+    drawdown_df = calculate_rolling_drawdown(enhanced_df['close'].reset_index(drop=True), window)
+    rolling_df = pd.DataFrame({
+        'datetime': pd.to_datetime(enhanced_df['datetime']).to_numpy(),
+        'rolling_drawdown': drawdown_df['Rolling Drawdown'].to_numpy() / 100,  # Convert from percentage to decimal
+        'rolling_max_drawdown': drawdown_df['Rolling Max Drawdown'].to_numpy() / 100
+    })
+    
+    merged = align_with_benchmark(enhanced_df, spy_monthly)
+    merged['rolling_beta'] = calculate_rolling_beta(
+        merged['monthly_return_stock'].to_numpy(), merged['monthly_return_spy'].to_numpy(), window
+    )
+    return rolling_df.merge(merged[['datetime', 'rolling_beta']], on='datetime', how='left')
+
+def output_timestamp() -> str:
+    """Sortable, unique name stem for one run's outputs (runs in the same second never collide)"""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{uuid.uuid4().hex[:8]}"
+
+def debt_ratio_labels(debt_ratios: List[float]) -> List[str]:
+    """
+    Percentage labels for CSV curve columns, unique for any grid
+    
+    The 1% grid keeps the legacy two-digit names ("07"); other grids get as
+    many decimals as their values need, with "p" as the point ("07p5" for
+    7.5%), and at least 4 when the values do not terminate (1/7 is "14p2857").
+    Values are rounded, not truncated, so 0.29 is "29" and not "28".
+    """
+    percents = np.asarray(debt_ratios, dtype=float) * 100
+    for decimals in range(9):
+        exact = np.allclose(np.round(percents, decimals), percents, rtol=0, atol=1e-9)
+        width = 2 if decimals == 0 else 3 + decimals
+        labels = [f"{percent:0{width}.{decimals}f}".replace('.', 'p') for percent in percents]
+        if (exact or decimals >= 4) and len(set(labels)) == len(labels):
+            break
+    return labels
+
+def save_enhanced_csv(df: pd.DataFrame, ticker: str, wacc_data: List[Dict], timestamp: str = None) -> None:
     """
     Save enhanced CSV with all computed metrics
     """
-    # Add WACC curve data as separate columns
-    for i, wacc_point in enumerate(wacc_data):
-        debt_ratio = wacc_point['debt_ratio']
-        df[f'relevered_beta_{int(debt_ratio*100):02d}pct'] = wacc_point['relevered_beta']
-        df[f'cost_of_equity_{int(debt_ratio*100):02d}pct'] = wacc_point['cost_of_equity']
-        df[f'wacc_{int(debt_ratio*100):02d}pct'] = wacc_point['wacc']
+    # Add WACC curve data as separate columns, one set per grid point
+    labels = debt_ratio_labels([wacc_point['debt_ratio'] for wacc_point in wacc_data])
+    for label, wacc_point in zip(labels, wacc_data):
+        df[f'relevered_beta_{label}pct'] = wacc_point['relevered_beta']
+        df[f'cost_of_equity_{label}pct'] = wacc_point['cost_of_equity']
+        df[f'wacc_{label}pct'] = wacc_point['wacc']
     
     # Generate filename with timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{ticker}_enhanced_analytics_{timestamp}.csv"
+    timestamp = timestamp or output_timestamp()
+    os.makedirs(ANALYTICS_OUTPUT_DIR, exist_ok=True)
+    filename = os.path.join(ANALYTICS_OUTPUT_DIR, f"{ticker}_enhanced_analytics_{timestamp}.csv")
     
     df.to_csv(filename, index=False)
     print(f"Enhanced data saved to {filename}")
 
-@app.post("/analytics/run", response_model=AnalyticsResponse)
-async def run_financial_analytics(request: AnalyticsRequest):
+TIMESERIES_COLUMNS = ['datetime', 'close', 'monthly_return', 'rebase_100', 'rolling_max', 'drawdown']
+
+def save_enhanced_artifact(df: pd.DataFrame, ticker: str, wacc_data: List[Dict], metadata: Dict[str, Any],
+                           timestamp: str = None) -> str:
     """
-    Main endpoint for financial analytics
+    Save computed metrics as a compact columnar artifact
+    
+    Writes a {ticker}_enhanced_analytics_{timestamp}/ directory holding
+    timeseries.parquet (one row per month), wacc_curve.parquet (one row per
+    debt ratio) and metadata.json (scalar results). Returns the directory path.
     """
-    try:
-        ticker = request.ticker.upper()
-        start_date = request.start_date
-        end_date = request.end_date
-        
-        # Step 1: Pull stock data
-        stock_df = datapull(ticker, start_date, end_date)
-        
-        # Step 2: Convert to monthly returns
+    timestamp = timestamp or output_timestamp()
+    name = f"{ticker}_enhanced_analytics_{timestamp}"
+    artifact_dir = os.path.join(ANALYTICS_OUTPUT_DIR, name)
+    
+    # Write into a hidden directory and rename, so readers never see a partial artifact
+    tmp_dir = os.path.join(ANALYTICS_OUTPUT_DIR, f".{name}.tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    
+    timeseries = df[[col for col in TIMESERIES_COLUMNS if col in df.columns]].copy()
+    timeseries['datetime'] = pd.to_datetime(timeseries['datetime'])
+    timeseries.to_parquet(os.path.join(tmp_dir, "timeseries.parquet"), index=False)
+    
+    pd.DataFrame(wacc_data).to_parquet(os.path.join(tmp_dir, "wacc_curve.parquet"), index=False)
+    
+    with open(os.path.join(tmp_dir, "metadata.json"), "w") as f:
+        json.dump({"ticker": ticker, "created_at": datetime.now().isoformat(), **metadata}, f, indent=2)
+    
+    os.replace(tmp_dir, artifact_dir)
+    
+    print(f"Enhanced analytics saved to {artifact_dir}")
+    return artifact_dir
+
+def save_analytics_output(df: pd.DataFrame, ticker: str, wacc_data: List[Dict], response: AnalyticsResponse) -> None:
+    """Persist a run in the configured ANALYTICS_OUTPUT_FORMAT"""
+    # One timestamp per run so both formats share a name stem
+    timestamp = output_timestamp()
+    if ANALYTICS_OUTPUT_FORMAT in ("parquet", "both"):
+        metadata = response.model_dump(exclude={'ticker', 'monthly_return', 'drawdown_curve', 'rebase_curve', 'wacc_curve'})
+        with stage("write_parquet"):
+            save_enhanced_artifact(df, ticker, wacc_data, metadata, timestamp)
+    if ANALYTICS_OUTPUT_FORMAT in ("csv", "both"):
+        with stage("write_csv"):
+            save_enhanced_csv(df, ticker, wacc_data, timestamp)
+
+def prepare_ticker_returns(stock_df: pd.DataFrame) -> tuple:
+    """
+    Steps 2-3 of the pipeline: monthly returns and maximum drawdown
+    Returns (enhanced_df, max_drawdown, drawdown_stats)
+    """
+    # Step 2: Convert to monthly returns
+    with stage("returns"):
         monthly_df = compute_monthly_returns(stock_df)
-        
-        # Step 3: Compute maximum drawdown
-        enhanced_df, max_drawdown = compute_max_drawdown(monthly_df)
-        
-        # Step 4: Compute beta
-        beta, spy_returns = compute_beta(enhanced_df, start_date, end_date)
-        
-        # Step 5: Compute unlevered beta
+    
+    # Step 3: Compute maximum drawdown
+    with stage("drawdown"):
+        return compute_max_drawdown(monthly_df, return_stats=True)
+
+def prepare_slice_returns(prices: PriceSlice) -> tuple:
+    """
+    Steps 2-3 on a price matrix slice, computed on its array views
+    Returns (columns, max_drawdown, drawdown_stats) with the enhanced_df
+    columns as arrays; enhanced_frame() turns them into the DataFrame once
+    the response is built. Bars with gaps take the DataFrame path instead.
+    """
+    if not is_consecutive_monthly(prices.dates):
+        return prepare_ticker_returns(price_frame(prices))
+    
+    # Step 2: Monthly returns (the first bar only seeds the first return)
+    with stage("returns"):
+        months = month_end_labels(prices.dates[1:])
+        close = prices.close[1:]
+    
+    # Step 3: Compute maximum drawdown
+    with stage("drawdown"):
+        stats = calculate_drawdown_statistics(close, top_n=DRAWDOWN_TOP_N)
+    columns = {
+        'datetime': months,
+        'close': close,
+        'monthly_return': stats['returns'],
+        'rebase_100': stats['rebase'],
+        'rolling_max': stats['peak'],
+        'drawdown': stats['drawdown'] / 100  # Convert from percentage to decimal
+    }
+    return columns, stats['max_drawdown'], stats
+
+def enhanced_frame(enhanced) -> pd.DataFrame:
+    """enhanced_df for the response stage (prepare_slice_returns columns become a DataFrame here)"""
+    return enhanced if isinstance(enhanced, pd.DataFrame) else pd.DataFrame(enhanced)
+
+def finish_ticker_analytics(ticker: str, enhanced_df: pd.DataFrame, max_drawdown: float,
+                            beta: float, spy_returns: pd.Series, drawdown_stats: Dict[str, Any] = None,
+                            curve_points: int = 100, optimizer: str = "grid", validate: bool = True) -> tuple:
+    """
+    Steps 5-7 and 9 of the pipeline, once beta is known
+    Returns (wacc_data, AnalyticsResponse)
+    
+    validate=False builds the response without per-element validation of the
+    float lists, for callers that serialize it themselves (NDJSON output)
+    """
+    # Step 5: Compute unlevered beta
+    # Step 6: Compute WACC curve
+    with stage("wacc"):
         unlevered_beta = compute_unlevered_beta(beta, ticker)
-        
-        # Step 6: Compute WACC curve
-        wacc_data, optimal_wacc, optimal_debt_ratio = compute_wacc_curve(unlevered_beta, spy_returns)
-        
+        wacc_data, optimal_wacc, optimal_debt_ratio = compute_wacc_curve(unlevered_beta, spy_returns,
+                                                                         curve_points=curve_points,
+                                                                         optimizer=optimizer)
+    
+    with stage("response"):
         # Step 7: Add computed metrics to DataFrame
         enhanced_df['beta'] = beta
         enhanced_df['unlevered_beta'] = unlevered_beta
         
-        # Step 8: Save enhanced CSV
-        save_enhanced_csv(enhanced_df, ticker, wacc_data)
-        
         # Step 9: Prepare response data
         monthly_returns = enhanced_df['monthly_return'].fillna(0).tolist()
         drawdown_curve = enhanced_df['drawdown'].fillna(0).tolist()
         rebase_curve = enhanced_df['rebase_100'].fillna(100).tolist()
         
-        response = AnalyticsResponse(
+        build = AnalyticsResponse if validate else AnalyticsResponse.model_construct
+        response = build(
             ticker=ticker,
             max_drawdown=float(abs(max_drawdown)),
             beta=float(beta),
@@ -292,13 +898,1040 @@ async def run_financial_analytics(request: AnalyticsRequest):
             monthly_return=monthly_returns,
             drawdown_curve=drawdown_curve,
             rebase_curve=rebase_curve,
-            wacc_curve=wacc_data
+            wacc_curve=wacc_data,
+            **(describe_drawdowns(enhanced_df, drawdown_stats) if drawdown_stats else {})
         )
+    
+    return wacc_data, response
+
+class ArtifactWriter:
+    """
+    Background writer that persists analytics outputs off the request path
+    
+    Jobs go through a bounded queue to one daemon thread, so request latency
+    does not depend on disk speed. After each write only the newest
+    `retention` outputs per ticker are kept. When the queue is full the write
+    is dropped rather than blocking the request.
+    
+    The thread starts on the first submit and close() resets the writer, so
+    it works again after an app shutdown/startup cycle.
+    """
+    
+    def __init__(self, retention: int = 5, max_pending: int = 100):
+        self.retention = retention
+        self.max_pending = max_pending
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def _started_queue(self) -> queue.Queue:
+        with self._lock:
+            if self._thread is None:
+                self._queue = queue.Queue(maxsize=self.max_pending)
+                self._thread = threading.Thread(target=self._run, args=(self._queue,), name="artifact-writer",
+                                                daemon=True)
+                self._thread.start()
+            return self._queue
+    
+    def submit(self, df: pd.DataFrame, ticker: str, wacc_data: List[Dict], response: AnalyticsResponse) -> bool:
+        """Queue one run for writing; returns False if the queue is full"""
+        try:
+            self._started_queue().put_nowait((df, ticker, wacc_data, response))
+            return True
+        except queue.Full:
+            print(f"Artifact queue full, skipping write for {ticker}")
+            return False
+    
+    def _run(self, jobs: queue.Queue) -> None:
+        while True:
+            job = jobs.get()
+            try:
+                if job is None:
+                    return
+                df, ticker, wacc_data, response = job
+                save_analytics_output(df, ticker, wacc_data, response)
+                self.apply_retention(ticker)
+            except Exception as e:
+                print(f"Failed to persist analytics output: {str(e)}")
+            finally:
+                jobs.task_done()
+    
+    def apply_retention(self, ticker: str) -> None:
+        """Delete all but the newest `retention` outputs for a ticker (CSV and Parquet alike)"""
+        if self.retention <= 0:
+            return
         
-        return response
+        outputs = {}
+        for path in glob.glob(os.path.join(ANALYTICS_OUTPUT_DIR, f"{ticker}_enhanced_analytics_*")):
+            # The legacy CSV and the Parquet directory of one run share a stem
+            stem = os.path.splitext(os.path.basename(path))[0]
+            outputs.setdefault(stem, []).append(path)
         
+        for stem in sorted(outputs)[:-self.retention]:
+            for path in outputs[stem]:
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.remove(path)
+    
+    def flush(self) -> None:
+        """Block until every queued write has finished"""
+        jobs = self._queue
+        if jobs is not None:
+            jobs.join()
+    
+    def close(self) -> None:
+        """Finish pending writes and stop the writer thread (the next submit starts a new one)"""
+        with self._lock:
+            thread, jobs = self._thread, self._queue
+            self._thread = self._queue = None
+        if thread is not None:
+            jobs.put(None)
+            thread.join()
+
+artifact_writer = ArtifactWriter(retention=ANALYTICS_RETENTION, max_pending=ANALYTICS_MAX_PENDING_WRITES)
+
+@app.on_event("shutdown")
+def shutdown_artifact_writer():
+    artifact_writer.close()
+
+def compute_ticker_analytics(ticker: str, stock_df: pd.DataFrame, start_date: str, end_date: str,
+                             spy_monthly: pd.DataFrame = None, curve_points: int = 100,
+                             optimizer: str = "grid", validate: bool = True) -> tuple:
+    """
+    Run the analytics pipeline (steps 2-7 and 9) on already pulled price data
+    Returns (enhanced_df, wacc_data, AnalyticsResponse)
+    """
+    # Steps 2-3: Monthly returns and maximum drawdown
+    enhanced_df, max_drawdown, drawdown_stats = prepare_ticker_returns(stock_df)
+    
+    # Step 4: Compute beta
+    with stage("beta"):
+        beta, spy_returns = compute_beta(enhanced_df, start_date, end_date, spy_monthly)
+    
+    # Steps 5-7, 9: Unlevered beta, WACC curve and response
+    wacc_data, response = finish_ticker_analytics(ticker, enhanced_df, max_drawdown, beta, spy_returns,
+                                                  drawdown_stats, curve_points, optimizer, validate)
+    
+    return enhanced_df, wacc_data, response
+
+def _json_default(obj: Any) -> Any:
+    """Serialize models built with model_construct and stray NumPy scalars"""
+    if isinstance(obj, BaseModel):
+        return dict(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def ndjson_line(obj: Any) -> bytes:
+    """One NDJSON line; orjson writes float lists natively when installed (NaN becomes null)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_json_default,
+                                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE)
+        except orjson.JSONEncodeError:
+            pass  # e.g. an integer beyond 64 bits, which only the stdlib encoder writes
+    return (json.dumps(obj, default=_json_default) + "\n").encode()
+
+def response_format(request: Request) -> str:
+    """Pick "arrow", "ndjson" or the default "json" from the Accept header"""
+    accept = request.headers.get("accept", "")
+    if ARROW_STREAM_MEDIA_TYPE in accept:
+        return "arrow"
+    if NDJSON_MEDIA_TYPE in accept:
+        return "ndjson"
+    return "json"
+
+# Response fields that become the timeseries / wacc_curve tables in Arrow output
+SERIES_FIELDS = {'monthly_return', 'drawdown_curve', 'rebase_curve', 'wacc_curve'}
+
+def analytics_rows(outcomes: List[tuple]) -> tuple:
+    """Per-ticker pieces of analytics_tables: (results rows, timeseries frames, wacc_curve frames)"""
+    results, timeseries, curves = [], [], []
+    for ticker, enhanced_df, wacc_data, response, error in outcomes:
+        row = {'ticker': ticker, 'status': 'error' if error else 'ok', 'error': error}
+        if response is not None:
+            fields = response.model_dump(exclude=SERIES_FIELDS | {'ticker'})
+            row.update({k: json.dumps(v) if isinstance(v, (list, dict)) else v for k, v in fields.items()})
+            
+            frame = enhanced_df[[col for col in TIMESERIES_COLUMNS if col in enhanced_df.columns]].copy()
+            frame['datetime'] = pd.to_datetime(frame['datetime'])
+            frame.insert(0, 'ticker', ticker)
+            timeseries.append(frame)
+            
+            curve = pd.DataFrame(wacc_data)
+            curve.insert(0, 'ticker', ticker)
+            curves.append(curve)
+        results.append(row)
+    return results, timeseries, curves
+
+def tables_from_rows(results: List[Dict], timeseries: List[pd.DataFrame],
+                     curves: List[pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """analytics_tables from analytics_rows pieces (possibly gathered from several chunks)"""
+    return {
+        'results': pd.DataFrame(results),
+        'timeseries': pd.concat(timeseries, ignore_index=True) if timeseries else pd.DataFrame(columns=['ticker']),
+        'wacc_curve': pd.concat(curves, ignore_index=True) if curves else pd.DataFrame(columns=['ticker']),
+    }
+
+def analytics_tables(outcomes: List[tuple]) -> Dict[str, pd.DataFrame]:
+    """
+    Columnar view of (ticker, enhanced_df, wacc_data, response, error) outcomes
+    - results: one row per ticker with status, error and the scalar response fields
+      (drawdown_episodes and bootstrap as JSON text)
+    - timeseries: one row per ticker and month (TIMESERIES_COLUMNS)
+    - wacc_curve: one row per ticker and debt ratio
+    """
+    return tables_from_rows(*analytics_rows(outcomes))
+
+def write_analytics_arrow(outcomes: List[tuple]) -> bytes:
+    """Arrow IPC body (results, timeseries, wacc_curve tables) for analytics outcomes"""
+    return write_tables(analytics_tables(outcomes))
+
+def _error_message(e: Exception) -> str:
+    """Readable message for per-ticker errors (HTTPException keeps it in detail)"""
+    return e.detail if isinstance(e, HTTPException) else str(e)
+
+def _record_error(endpoint: str, e: Exception) -> None:
+    """Count a failed computation by its root exception type (datapull wraps failures in HTTPException)"""
+    if isinstance(e, HTTPException) and e.__context__ is not None:
+        e = e.__context__
+    ERRORS.inc(endpoint=endpoint, error=type(e).__name__)
+
+# Execution: blocking I/O (upstream fetches, store reads) runs on a bounded
+# thread pool; pandas/NumPy steps run on a configurable CPU executor. The
+# event loop only awaits, so slow upstream calls never stall /health.
+IO_MAX_WORKERS = int(os.getenv('IO_MAX_WORKERS', 16))
+CPU_EXECUTOR = os.getenv('CPU_EXECUTOR', 'thread')  # "thread" or "process"
+CPU_MAX_WORKERS = int(os.getenv('CPU_MAX_WORKERS', os.cpu_count() or 1))
+
+# Process mode only: worker start method, and tickers (batch/beta) or
+# scenarios (sensitivity) per pool task; 0 splits a request into one chunk per worker
+CPU_START_METHOD = os.getenv('CPU_START_METHOD', 'spawn')
+BATCH_CHUNK_SIZE = int(os.getenv('BATCH_CHUNK_SIZE', 0))
+SENSITIVITY_CHUNK_SIZE = int(os.getenv('SENSITIVITY_CHUNK_SIZE', 0))
+
+class AnalyticsThreadPool:
+    """
+    ThreadPoolExecutor started on first use and dropped by shutdown()
+    
+    Like AnalyticsProcessPool, so a second app startup (e.g. another
+    TestClient lifespan) gets a fresh pool instead of a shut-down one.
+    """
+    
+    def __init__(self, max_workers: int, thread_name_prefix: str):
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix=self.thread_name_prefix)
+            return self._executor
+    
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+io_executor = AnalyticsThreadPool(max_workers=IO_MAX_WORKERS, thread_name_prefix="analytics-io")
+if CPU_EXECUTOR == 'process':
+    # Batch, beta, bootstrap and sensitivity requests are split into chunks
+    # over this pool, with their price/return arrays in shared memory
+    process_pool = AnalyticsProcessPool(max_workers=CPU_MAX_WORKERS, start_method=CPU_START_METHOD)
+    cpu_executor = None
+else:
+    process_pool = None
+    cpu_executor = AnalyticsThreadPool(max_workers=CPU_MAX_WORKERS, thread_name_prefix="analytics-cpu")
+
+def _in_context(func, *args, **kwargs):
+    """Bind a call to the caller's context, so stage timings reach the request's Server-Timing record"""
+    return functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+
+async def run_io(func, *args, **kwargs):
+    """Await a blocking I/O call on the I/O thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(io_executor.executor, _in_context(func, *args, **kwargs))
+
+async def run_cpu(func, *args, **kwargs):
+    """
+    Await a CPU-bound step on the CPU executor (module-level functions only, for process pools)
+    
+    Worker processes keep their own metrics, so with CPU_EXECUTOR=process the
+    per-step stages are not recorded in this process.
+    """
+    if process_pool is not None:
+        return await process_pool.run(functools.partial(func, *args, **kwargs))
+    return await asyncio.get_running_loop().run_in_executor(cpu_executor.executor, _in_context(func, *args, **kwargs))
+
+@app.on_event("shutdown")
+def shutdown_executors():
+    # Pools restart on their next use, so the app can be started again
+    io_executor.shutdown()
+    if process_pool is not None:
+        process_pool.shutdown()
+    else:
+        cpu_executor.shutdown()
+
+def bootstrap_chunk(chunk: tuple, handle, block_size: int, de_ratio: float, risk_free: float,
+                    tax_rate: float) -> Dict[str, np.ndarray]:
+    """Process pool task of compute_bootstrap_summary: one (seed, size) chunk over the shared returns"""
+    chunk_seed, size = chunk
+    with attach(handle) as arrays:
+        return bootstrap_beta_wacc(arrays['stock'], arrays['spy'], size, chunk_seed, block_size, de_ratio,
+                                   risk_free, tax_rate, arrays['debt_ratios'])
+
+async def compute_bootstrap_summary(ticker: str, enhanced_df: pd.DataFrame, spy_monthly: pd.DataFrame,
+                                    samples: int, seed: int = None, block_size: int = None,
+                                    confidence: float = 0.95, curve_points: int = 100) -> BootstrapSummary:
+    """
+    Block-bootstrap the aligned stock/SPY returns and summarise beta, market
+    return and optimal WACC as percentile intervals
+    
+    The draws are split into BOOTSTRAP_CHUNK_SIZE chunks with their own seeds
+    and run concurrently on the CPU executor; results depend only on the seed.
+    """
+    merged = align_with_benchmark(enhanced_df, spy_monthly)
+    stock_returns = merged['monthly_return_stock'].to_numpy()
+    spy_returns = merged['monthly_return_spy'].to_numpy()
+    block_size = block_size or default_block_size(len(spy_returns))
+    de_ratio = DE_RATIOS.get(ticker, DEFAULT_DE_RATIO)
+    
+    seed, chunks = bootstrap_chunks(samples, seed, BOOTSTRAP_CHUNK_SIZE)
+    debt_ratios = debt_ratio_grid(curve_points or 100)
+    with stage("bootstrap"):
+        if process_pool is not None:
+            with SharedArrays({'stock': stock_returns, 'spy': spy_returns, 'debt_ratios': debt_ratios}) as handle:
+                draws = await process_pool.map_chunks(bootstrap_chunk, chunks, handle, block_size, de_ratio,
+                                                      RISK_FREE_RATE, TAX_RATE)
+        else:
+            draws = await asyncio.gather(*(
+                run_cpu(bootstrap_beta_wacc, stock_returns, spy_returns, size, chunk_seed, block_size,
+                        de_ratio, RISK_FREE_RATE, TAX_RATE, debt_ratios)
+                for chunk_seed, size in chunks
+            ))
+    
+    intervals = {
+        key: ConfidenceInterval(**percentile_interval(np.concatenate([d[key] for d in draws]), confidence))
+        for key in draws[0]
+    }
+    return BootstrapSummary(samples=samples, block_size=block_size, confidence=confidence, seed=seed,
+                            **intervals)
+
+@app.exception_handler(RateLimitError)
+async def rate_limit_handler(request: Request, exc: RateLimitError):
+    """Upstream credit limit hit: tell the client to retry instead of a generic 500"""
+    ERRORS.inc(endpoint=request.url.path, error=type(exc).__name__)
+    return JSONResponse(status_code=429, content={"detail": f"Upstream rate limit: {str(exc)}"},
+                        headers={"Retry-After": "60"})
+
+def _endpoint_label(request: Request) -> str:
+    """Route path template for metric labels; unknown paths share one label to bound cardinality"""
+    for route in app.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "other"
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """
+    Observe every request's latency, and with SERVER_TIMING on report the
+    request's stage durations in a Server-Timing header
+
+    Streamed responses (NDJSON batch) only include the stages finished
+    before the first byte.
+    """
+    timings = start_request_timings() if SERVER_TIMING else None
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=_endpoint_label(request), status=500)
+        raise
+    elapsed = time.perf_counter() - start
+    REQUEST_SECONDS.observe(elapsed, endpoint=_endpoint_label(request), status=response.status_code)
+    if timings is not None:
+        response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    return response
+
+@app.post("/analytics/run", response_model=AnalyticsResponse)
+async def run_financial_analytics(request: AnalyticsRequest, http_request: Request):
+    """
+    Main endpoint for financial analytics
+    
+    With Accept: application/x-ndjson the result is written as one NDJSON line
+    without Pydantic validation of the curve lists (fast for large curve_points).
+    With Accept: application/vnd.apache.arrow.stream it comes back as Arrow
+    IPC tables (results, timeseries, wacc_curve); see arrow_ipc.read_tables.
+    
+    Encoded responses are kept in the result cache, so a repeated identical
+    request is answered without recomputing (or re-persisting) anything.
+    """
+    try:
+        ticker = request.ticker.upper()
+        start_date = request.start_date
+        end_date = request.end_date
+        output = response_format(http_request)
+        
+        cache_key = result_cache_key(request, ticker, output)
+        if cache_key is not None:
+            # Only the in-process LRU is read on the event loop; the shared
+            # backend is SQLite (blocking), so its lookup runs on the I/O pool
+            data_stamp = benchmark_cache.refreshed_at("SPY")
+            cached = result_cache.get_local(cache_key, data_stamp)
+            if cached is None and result_cache.backend is not None:
+                cached = await run_io(result_cache.get_shared, cache_key, data_stamp)
+            record_cache("result", hit=cached is not None)
+            if cached is not None:
+                return Response(cached.body, media_type=cached.media_type)
+        
+        # Step 1: Pull stock data and the SPY window concurrently (I/O stage)
+        with stage("fetch"):
+            stock_df, spy_monthly = await asyncio.gather(
+                run_io(datapull, ticker, start_date, end_date),
+                run_io(benchmark_cache.window, "SPY", start_date, end_date)
+            )
+        
+        data_stamp = benchmark_cache.refreshed_at("SPY")
+        
+        # Steps 2-7, 9: Returns, drawdown, beta, WACC curve and response (CPU stage)
+        enhanced_df, wacc_data, response = await run_cpu(
+            compute_ticker_analytics, ticker, stock_df, start_date, end_date, spy_monthly,
+            request.curve_points, request.optimizer, output == "json"
+        )
+        
+        # Optional: bootstrap confidence intervals (before Step 8 so the artifact includes them)
+        if request.bootstrap:
+            response.bootstrap = await compute_bootstrap_summary(
+                ticker, enhanced_df, spy_monthly, request.bootstrap, request.bootstrap_seed,
+                request.bootstrap_block_size, request.confidence, request.curve_points
+            )
+        
+        # Step 8: Queue the analytics artifact for the background writer
+        if request.persist:
+            # The writer thread adds curve columns to its frame, so it gets its own copy
+            artifact_writer.submit(enhanced_df.copy(), ticker, wacc_data, response)
+        
+        with stage("serialize"):
+            if output == "arrow":
+                body = await run_cpu(write_analytics_arrow, [(ticker, enhanced_df, wacc_data, response, None)])
+                media_type = ARROW_STREAM_MEDIA_TYPE
+            elif output == "ndjson":
+                body = ndjson_line(response)
+                media_type = NDJSON_MEDIA_TYPE
+            else:
+                # Same bytes FastAPI renders for the response model
+                body = JSONResponse(jsonable_encoder(response)).body
+                media_type = "application/json"
+        
+        if cache_key is not None:
+            cached = result_cache.put_local(cache_key, body, media_type, data_stamp)
+            if result_cache.backend is not None:
+                await run_io(result_cache.put_shared, cache_key, cached)
+        return Response(body, media_type=media_type)
+        
+    except RateLimitError:
+        raise
+    except Exception as e:
+        _record_error("/analytics/run", e)
+        raise HTTPException(status_code=500, detail=f"Analytics computation failed: {_error_message(e)}")
+
+def _normalize_tickers(tickers: List[str]) -> List[str]:
+    """Upper-case and de-duplicate while keeping the caller's order"""
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+    if not tickers:
+        raise HTTPException(status_code=400, detail="No tickers provided")
+    return tickers
+
+async def _benchmark_window(start_date: str, end_date: str) -> pd.DataFrame:
+    try:
+        return await run_io(benchmark_cache.window, "SPY", start_date, end_date)
+    except RateLimitError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Benchmark data unavailable: {_error_message(e)}")
+
+def _fetch_one(ticker: str, start_date: str, end_date: str) -> tuple:
+    prices = matrix_slice(ticker, start_date, end_date)
+    if prices is not None and len(prices.dates):
+        return prices, None
+    try:
+        return datapull(ticker, start_date, end_date), None
+    except Exception as e:
+        return None, _error_message(e)
+
+async def fetch_many(tickers: List[str], start_date: str, end_date: str) -> List[tuple]:
+    """
+    Pull prices for many tickers concurrently (at most BATCH_MAX_WORKERS at a time)
+    Returns one (stock_df, error message) pair per ticker, in order; tickers in
+    the price matrix get a zero-copy PriceSlice instead of a DataFrame
+    """
+    semaphore = asyncio.Semaphore(BATCH_MAX_WORKERS)
+    
+    async def fetch(ticker):
+        prices = matrix_slice(ticker, start_date, end_date)
+        if prices is not None and len(prices.dates):
+            return prices, None
+        async with semaphore:
+            return await run_io(_fetch_one, ticker, start_date, end_date)
+    
+    return await asyncio.gather(*(fetch(ticker) for ticker in tickers))
+
+def prepare_many(tickers: List[str], fetched: List[tuple]) -> tuple:
+    """
+    Run steps 2-3 for many already fetched tickers (DataFrames or price matrix slices)
+    Returns ({ticker: (enhanced, max_drawdown, drawdown_stats)}, {ticker: error message});
+    enhanced is a DataFrame or, for slices, columns for enhanced_frame()
+    """
+    prepared, errors = {}, {}
+    for ticker, (stock_df, error) in zip(tickers, fetched):
+        if error is not None:
+            errors[ticker] = error
+            continue
+        try:
+            if isinstance(stock_df, PriceSlice):
+                prepared[ticker] = prepare_slice_returns(stock_df)
+            else:
+                prepared[ticker] = prepare_ticker_returns(stock_df)
+        except Exception as e:
+            errors[ticker] = _error_message(e)
+    return prepared, errors
+
+def run_batch_pipeline(tickers: List[str], fetched: List[tuple], spy_monthly: pd.DataFrame,
+                       curve_points: int = 100, optimizer: str = "grid", validate: bool = True) -> List[tuple]:
+    """
+    Steps 2-7 and 9 for every fetched ticker, with all betas from one matrix operation
+    Returns one (ticker, enhanced_df, wacc_data, AnalyticsResponse, error message) per ticker
+    """
+    prepared, errors = prepare_many(tickers, fetched)
+    
+    # Step 4 for the whole batch at once
+    with stage("beta"):
+        betas = compute_betas({t: df for t, (df, *_) in prepared.items()}, spy_monthly)
+    
+    outcomes = []
+    for ticker in tickers:
+        if ticker in errors:
+            outcomes.append((ticker, None, None, None, errors[ticker]))
+            continue
+        enhanced, max_drawdown, drawdown_stats = prepared[ticker]
+        stats, spy_returns = betas[ticker]
+        try:
+            if stats['observations'] < 2:
+                raise ValueError("Insufficient data to compute beta")
+            enhanced_df = enhanced_frame(enhanced)
+            wacc_data, response = finish_ticker_analytics(ticker, enhanced_df, max_drawdown, stats['beta'],
+                                                          spy_returns, drawdown_stats, curve_points, optimizer,
+                                                          validate)
+            outcomes.append((ticker, enhanced_df, wacc_data, response, None))
+        except Exception as e:
+            outcomes.append((ticker, None, None, None, _error_message(e)))
+    return outcomes
+
+def batch_results(outcomes: List[tuple]) -> List[BatchTickerResult]:
+    """/analytics/batch results for run_batch_pipeline outcomes"""
+    return [
+        BatchTickerResult(ticker=ticker, status="error", error=error) if error is not None
+        else BatchTickerResult(ticker=ticker, status="ok", result=response)
+        for ticker, _, _, response, error in outcomes
+    ]
+
+def compute_batch_results(tickers: List[str], fetched: List[tuple], spy_monthly: pd.DataFrame,
+                          curve_points: int = 100, optimizer: str = "grid") -> List[BatchTickerResult]:
+    """CPU stage of /analytics/batch"""
+    return batch_results(run_batch_pipeline(tickers, fetched, spy_monthly, curve_points, optimizer))
+
+def compute_batch_arrow(tickers: List[str], fetched: List[tuple], spy_monthly: pd.DataFrame,
+                        curve_points: int = 100, optimizer: str = "grid") -> bytes:
+    """CPU stage of /analytics/batch for Arrow output"""
+    return write_analytics_arrow(run_batch_pipeline(tickers, fetched, spy_monthly, curve_points, optimizer,
+                                                    validate=False))
+
+def compute_batch_line(ticker: str, fetched: tuple, spy_monthly: pd.DataFrame,
+                       curve_points: int = 100, optimizer: str = "grid") -> bytes:
+    """CPU stage of streamed /analytics/batch: one ticker's result as an NDJSON line"""
+    stock_df, error = fetched
+    if error is None:
+        try:
+            if isinstance(stock_df, PriceSlice):
+                enhanced, max_drawdown, drawdown_stats = prepare_slice_returns(stock_df)
+                with stage("beta"):
+                    stats, spy_returns = compute_betas({ticker: enhanced}, spy_monthly)[ticker]
+                if stats['observations'] < 2:
+                    raise ValueError("Insufficient data to compute beta")
+                enhanced_df, beta = enhanced_frame(enhanced), stats['beta']
+            else:
+                enhanced_df, max_drawdown, drawdown_stats = prepare_ticker_returns(stock_df)
+                with stage("beta"):
+                    beta, spy_returns = compute_beta(enhanced_df, None, None, spy_monthly)
+            _, response = finish_ticker_analytics(ticker, enhanced_df, max_drawdown, beta, spy_returns,
+                                                  drawdown_stats, curve_points, optimizer, validate=False)
+            return ndjson_line(BatchTickerResult.model_construct(ticker=ticker, status="ok", result=response))
+        except Exception as e:
+            error = _error_message(e)
+    return ndjson_line(BatchTickerResult.model_construct(ticker=ticker, status="error", error=error))
+
+async def stream_batch_lines(tickers: List[str], start_date: str, end_date: str, spy_monthly: pd.DataFrame,
+                             curve_points: int, optimizer: str):
+    """
+    Yield each ticker's NDJSON line as soon as its fetch and computation finish
+    (completion order, at most BATCH_MAX_WORKERS fetches at a time)
+    """
+    semaphore = asyncio.Semaphore(BATCH_MAX_WORKERS)
+    
+    async def run_one(ticker):
+        async with semaphore:
+            fetched = await run_io(_fetch_one, ticker, start_date, end_date)
+        return await run_cpu(compute_batch_line, ticker, fetched, spy_monthly, curve_points, optimizer)
+    
+    tasks = [asyncio.ensure_future(run_one(ticker)) for ticker in tickers]
+    try:
+        for next_line in asyncio.as_completed(tasks):
+            yield await next_line
+    finally:
+        # Client went away: stop the remaining work
+        for task in tasks:
+            task.cancel()
+
+def compute_beta_results(tickers: List[str], fetched: List[tuple], spy_monthly: pd.DataFrame) -> List[BetaResult]:
+    """CPU stage of /analytics/beta"""
+    prepared, errors = prepare_many(tickers, fetched)
+    betas = compute_betas({t: df for t, (df, *_) in prepared.items()}, spy_monthly)
+    
+    results = []
+    for ticker in tickers:
+        if ticker in errors:
+            results.append(BetaResult(ticker=ticker, status="error", error=errors[ticker]))
+            continue
+        stats, _ = betas[ticker]
+        if stats['observations'] < 2:
+            results.append(BetaResult(ticker=ticker, status="error", observations=stats['observations'],
+                                      error="Insufficient data to compute beta"))
+            continue
+        results.append(BetaResult(
+            ticker=ticker,
+            status="ok",
+            beta=stats['beta'],
+            alpha=None if np.isnan(stats['alpha']) else stats['alpha'],
+            r_squared=None if np.isnan(stats['r_squared']) else stats['r_squared'],
+            observations=stats['observations']
+        ))
+    return results
+
+def pack_fetched(fetched: List[tuple]) -> tuple:
+    """
+    Flatten fetched prices into arrays for SharedArrays
+    Returns ({'dates', 'close', 'offsets', 'is_slice'}, [error message or None per ticker]);
+    ticker i's bars are dates/close[offsets[i]:offsets[i + 1]] (none for failed fetches)
+    """
+    dates, closes, is_slice, errors = [], [], [], []
+    offsets = np.zeros(len(fetched) + 1, dtype=np.int64)
+    for i, (prices, error) in enumerate(fetched):
+        errors.append(error)
+        is_slice.append(isinstance(prices, PriceSlice))
+        if error is None:
+            if isinstance(prices, PriceSlice):
+                dates.append(prices.dates)
+                closes.append(prices.close)
+            else:
+                dates.append(pd.to_datetime(prices['datetime']).to_numpy(dtype='datetime64[ns]'))
+                closes.append(prices['close'].to_numpy(dtype=float))
+            offsets[i + 1] = len(dates[-1])
+    arrays = {
+        'dates': np.concatenate(dates) if dates else np.empty(0, 'datetime64[ns]'),
+        'close': np.concatenate(closes) if closes else np.empty(0),
+        'offsets': np.cumsum(offsets),
+        'is_slice': np.array(is_slice, dtype=bool),
+    }
+    return arrays, errors
+
+def shared_fetched(arrays: Dict[str, np.ndarray], start: int, stop: int, errors: List[str]) -> List[tuple]:
+    """
+    fetch_many pairs for tickers start..stop of pack_fetched arrays, as views
+    Price matrix slices come back as PriceSlices, everything else as datetime/close DataFrames
+    """
+    fetched = []
+    for i, error in zip(range(start, stop), errors):
+        if error is not None:
+            fetched.append((None, error))
+            continue
+        first, last = arrays['offsets'][i], arrays['offsets'][i + 1]
+        prices = PriceSlice(arrays['dates'][first:last], arrays['close'][first:last])
+        fetched.append((prices if arrays['is_slice'][i] else price_frame(prices), None))
+    return fetched
+
+def compute_batch_chunk(chunk: tuple, handle, output: str, curve_points: int = 100,
+                        optimizer: str = "grid") -> Any:
+    """
+    Process pool task of compute_batch_stage: one (start, stop, tickers, errors) chunk
+    Returns BatchTickerResults ("json"), analytics_rows ("arrow") or BetaResults ("beta")
+    
+    Nothing returned may reference the shared arrays: the block is closed
+    before the result is sent back.
+    """
+    start, stop, tickers, errors = chunk
+    with attach(handle) as arrays:
+        spy_monthly = pd.DataFrame({'datetime': arrays['spy_dates'], 'monthly_return': arrays['spy_returns']})
+        if output == "beta":
+            return compute_beta_results(tickers, shared_fetched(arrays, start, stop, errors), spy_monthly)
+        outcomes = run_batch_pipeline(tickers, shared_fetched(arrays, start, stop, errors), spy_monthly,
+                                      curve_points, optimizer, validate=output != "arrow")
+        return analytics_rows(outcomes) if output == "arrow" else batch_results(outcomes)
+
+def write_analytics_parts(parts: List[tuple]) -> bytes:
+    """Arrow IPC body from per-chunk analytics_rows, in chunk order"""
+    results, timeseries, curves = [], [], []
+    for part_results, part_timeseries, part_curves in parts:
+        results.extend(part_results)
+        timeseries.extend(part_timeseries)
+        curves.extend(part_curves)
+    return write_tables(tables_from_rows(results, timeseries, curves))
+
+async def compute_batch_stage(tickers: List[str], fetched: List[tuple], spy_monthly: pd.DataFrame, output: str,
+                              curve_points: int = 100, optimizer: str = "grid") -> Any:
+    """
+    CPU stage of /analytics/batch ("json" results or "arrow" body) and /analytics/beta ("beta")
+    
+    With CPU_EXECUTOR=process the tickers are split into BATCH_CHUNK_SIZE
+    chunks that run concurrently on the process pool. The fetched prices and
+    SPY returns are packed into one shared memory block, so each task only
+    pickles its tickers and a handle.
+    """
+    if process_pool is None:
+        if output == "beta":
+            return await run_cpu(compute_beta_results, tickers, fetched, spy_monthly)
+        if output == "arrow":
+            return await run_cpu(compute_batch_arrow, tickers, fetched, spy_monthly, curve_points, optimizer)
+        return await run_cpu(compute_batch_results, tickers, fetched, spy_monthly, curve_points, optimizer)
+    
+    arrays, errors = pack_fetched(fetched)
+    arrays['spy_dates'] = pd.to_datetime(spy_monthly['datetime']).to_numpy(dtype='datetime64[ns]')
+    arrays['spy_returns'] = spy_monthly['monthly_return'].to_numpy(dtype=float)
+    chunks = [(start, stop, tickers[start:stop], errors[start:stop])
+              for start, stop in chunk_ranges(len(tickers), BATCH_CHUNK_SIZE, process_pool.max_workers)]
+    with SharedArrays(arrays) as handle:
+        parts = await process_pool.map_chunks(compute_batch_chunk, chunks, handle, output, curve_points, optimizer)
+    
+    if output == "arrow":
+        # Assembling and encoding is mostly pandas/pyarrow work outside the GIL; no need to ship
+        # the rows to a worker again
+        return await run_io(write_analytics_parts, parts)
+    return [result for part in parts for result in part]
+
+def sensitivity_beta(stock_df: pd.DataFrame, start_date: str, end_date: str, spy_monthly: pd.DataFrame) -> tuple:
+    """Beta and the aligned SPY returns (ndarray) behind every sensitivity scenario"""
+    enhanced_df, *_ = prepare_ticker_returns(stock_df)
+    beta, spy_returns = compute_beta(enhanced_df, start_date, end_date, spy_monthly)
+    return beta, spy_returns.dropna().to_numpy()
+
+def sensitivity_response(ticker: str, beta: float, grid: Dict[str, np.ndarray], tax_rates: np.ndarray,
+                         risk_free_rates: np.ndarray, de_ratios: np.ndarray) -> SensitivityResponse:
+    """Response for a calculate_wacc_sensitivity grid (arrays indexed [tax_rate][risk_free_rate][de_ratio])"""
+    return SensitivityResponse(
+        ticker=ticker,
+        beta=float(beta),
+        dims=["tax_rate", "risk_free_rate", "de_ratio"],
+        tax_rate=tax_rates.tolist(),
+        risk_free_rate=risk_free_rates.tolist(),
+        de_ratio=de_ratios.tolist(),
+        unlevered_beta=grid['unlevered_beta'].tolist(),
+        optimal_wacc=grid['optimal_wacc'].tolist(),
+        optimal_debt_ratio=grid['optimal_debt_ratio'].tolist()
+    )
+
+def compute_sensitivity_response(ticker: str, stock_df: pd.DataFrame, start_date: str, end_date: str,
+                                 spy_monthly: pd.DataFrame, tax_rates: np.ndarray, risk_free_rates: np.ndarray,
+                                 de_ratios: np.ndarray, curve_points: int) -> SensitivityResponse:
+    """CPU stage of /analytics/sensitivity: one beta, then every scenario in one broadcasted pass"""
+    beta, spy_returns = sensitivity_beta(stock_df, start_date, end_date, spy_monthly)
+    grid = calculate_wacc_sensitivity(beta, spy_returns, tax_rates, risk_free_rates, de_ratios,
+                                      debt_ratio_grid(curve_points))
+    return sensitivity_response(ticker, beta, grid, tax_rates, risk_free_rates, de_ratios)
+
+def compute_sensitivity_chunk(chunk: tuple, handle, beta: float) -> Dict[str, np.ndarray]:
+    """Process pool task of compute_sensitivity_stage: the scenarios for tax rates start..stop"""
+    start, stop = chunk
+    with attach(handle) as arrays:
+        return calculate_wacc_sensitivity(beta, arrays['spy_returns'], arrays['tax_rates'][start:stop],
+                                          arrays['risk_free_rates'], arrays['de_ratios'], arrays['debt_ratios'])
+
+async def compute_sensitivity_stage(ticker: str, stock_df: pd.DataFrame, start_date: str, end_date: str,
+                                    spy_monthly: pd.DataFrame, tax_rates: np.ndarray, risk_free_rates: np.ndarray,
+                                    de_ratios: np.ndarray, curve_points: int) -> SensitivityResponse:
+    """
+    CPU stage of /analytics/sensitivity
+    
+    With CPU_EXECUTOR=process the beta is computed in one task and the grid
+    is then split along the tax-rate axis into chunks of about
+    SENSITIVITY_CHUNK_SIZE scenarios, which share the SPY returns and sweep
+    values through shared memory.
+    """
+    if process_pool is None:
+        return await run_cpu(compute_sensitivity_response, ticker, stock_df, start_date, end_date, spy_monthly,
+                             tax_rates, risk_free_rates, de_ratios, curve_points)
+    
+    beta, spy_returns = await run_cpu(sensitivity_beta, stock_df, start_date, end_date, spy_monthly)
+    per_tax_rate = len(risk_free_rates) * len(de_ratios)
+    chunk_size = -(-SENSITIVITY_CHUNK_SIZE // per_tax_rate) if SENSITIVITY_CHUNK_SIZE > 0 else 0
+    arrays = {'spy_returns': spy_returns, 'tax_rates': tax_rates, 'risk_free_rates': risk_free_rates,
+              'de_ratios': de_ratios, 'debt_ratios': debt_ratio_grid(curve_points)}
+    with SharedArrays(arrays) as handle:
+        parts = await process_pool.map_chunks(compute_sensitivity_chunk,
+                                              chunk_ranges(len(tax_rates), chunk_size, process_pool.max_workers),
+                                              handle, beta)
+    grid = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+    return sensitivity_response(ticker, beta, grid, tax_rates, risk_free_rates, de_ratios)
+
+def sync_prices(ticker: str) -> None:
+    """Fetch whatever the price store is missing for a ticker up to the last closed month"""
+    puller = StockDataPuller(API_KEY, store=price_store, client=td_client)
+    puller.sync_store(ticker, end_date=puller.last_closed_month())
+
+def refresh_analytics_state(ticker: str) -> AnalyticsStateResponse:
+    """I/O stage of /analytics/state: sync prices, fold the new bars into the state, report it"""
+    # The state covers the full stored history, not the fixed datapull window,
+    # so the ticker and the benchmark are both synced and read from the store
+    sync_prices(ticker)
+    sync_prices(analytics_states.benchmark)
+    with stage("state"):
+        state, appended, rebuilt = analytics_states.refresh(ticker)
+    if state.n_bars < 2:
+        raise ValueError(f"No stored price history for {ticker}")
+    
+    unlevered_beta, optimal_wacc, optimal_debt_ratio = state.optimal_wacc(
+        DE_RATIOS.get(ticker, DEFAULT_DE_RATIO), RISK_FREE_RATE, TAX_RATE
+    )
+    return AnalyticsStateResponse(
+        ticker=ticker,
+        first_date=state.first_date,
+        last_date=state.last_date,
+        months=state.n_bars,
+        observations=state.observations,
+        max_drawdown=abs(state.max_drawdown),
+        drawdown_peak_date=state.peak_date,
+        drawdown_trough_date=state.trough_date,
+        drawdown_recovery_date=state.recovery_date,
+        time_under_water=state.time_under_water,
+        drawdown_episodes=[
+            {
+                'peak_date': episode['peak_date'],
+                'trough_date': episode['trough_date'],
+                'recovery_date': episode['recovery_date'],
+                'depth': episode['depth'] / 100,  # Convert from percentage to decimal
+                'duration_months': episode['duration']
+            }
+            for episode in state.drawdown_episodes()
+        ],
+        beta=state.beta,
+        unlevered_beta=unlevered_beta,
+        market_return=state.market_return if state.observations else None,
+        optimal_wacc=optimal_wacc,
+        optimal_debt_ratio=optimal_debt_ratio,
+        appended=appended,
+        rebuilt=rebuilt
+    )
+
+def snapshot_is_current(row: Dict[str, Any]) -> bool:
+    """Whether a snapshot row was computed under the current tax rate, risk-free rate and D/E"""
+    return (row['tax_rate'], row['risk_free_rate'], row['de_ratio']) == (
+        TAX_RATE, RISK_FREE_RATE, DE_RATIOS.get(row['symbol'], DEFAULT_DE_RATIO))
+
+def snapshot_model(row: Dict[str, Any]) -> SnapshotResult:
+    return SnapshotResult(ticker=row['symbol'], **{k: v for k, v in row.items() if k in SnapshotResult.model_fields})
+
+def compute_rolling_response(ticker: str, stock_df: pd.DataFrame, spy_monthly: pd.DataFrame,
+                             window: int) -> RollingAnalyticsResponse:
+    """CPU stage of /analytics/rolling"""
+    enhanced_df, *_ = prepare_ticker_returns(stock_df)
+    rolling_df = compute_rolling_metrics(enhanced_df, spy_monthly, window)
+    
+    return RollingAnalyticsResponse(
+        ticker=ticker,
+        window=window,
+        dates=rolling_df['datetime'].dt.strftime('%Y-%m-%d').tolist(),
+        rolling_beta=[None if np.isnan(b) else b for b in rolling_df['rolling_beta'].tolist()],
+        rolling_drawdown=rolling_df['rolling_drawdown'].tolist(),
+        rolling_max_drawdown=rolling_df['rolling_max_drawdown'].tolist()
+    )
+
+@app.post("/analytics/batch", response_model=BatchAnalyticsResponse)
+async def run_batch_analytics(request: BatchAnalyticsRequest, http_request: Request):
+    """
+    Run the analytics pipeline for many tickers over one date window
+    
+    Prices are fetched concurrently (at most BATCH_MAX_WORKERS at a time), SPY
+    returns are sliced once, every beta comes from one matrix operation, and
+    each ticker gets its own ok/error result instead of failing the request.
+    No CSVs are written.
+    
+    With Accept: application/x-ndjson the results are streamed instead, one
+    BatchTickerResult per line in the order tickers finish. With Accept:
+    application/vnd.apache.arrow.stream they come back as Arrow IPC tables
+    with a ticker column (results, timeseries, wacc_curve).
+    """
+    tickers = _normalize_tickers(request.tickers)
+    start_date = request.start_date
+    end_date = request.end_date
+    
+    spy_monthly = await _benchmark_window(start_date, end_date)
+    output = response_format(http_request)
+    if output == "ndjson":
+        return StreamingResponse(
+            stream_batch_lines(tickers, start_date, end_date, spy_monthly, request.curve_points, request.optimizer),
+            media_type=NDJSON_MEDIA_TYPE
+        )
+    
+    with stage("fetch"):
+        fetched = await fetch_many(tickers, start_date, end_date)
+    if output == "arrow":
+        body = await compute_batch_stage(tickers, fetched, spy_monthly, "arrow",
+                                         request.curve_points, request.optimizer)
+        return Response(body, media_type=ARROW_STREAM_MEDIA_TYPE)
+    results = await compute_batch_stage(tickers, fetched, spy_monthly, "json",
+                                        request.curve_points, request.optimizer)
+    
+    return BatchAnalyticsResponse(start_date=start_date, end_date=end_date, results=results)
+
+@app.post("/analytics/beta", response_model=BetaResponse)
+async def run_beta_analytics(request: BatchAnalyticsRequest):
+    """
+    Beta, alpha and R² against SPY for many tickers from one matrix operation
+    """
+    tickers = _normalize_tickers(request.tickers)
+    start_date = request.start_date
+    end_date = request.end_date
+    
+    spy_monthly = await _benchmark_window(start_date, end_date)
+    with stage("fetch"):
+        fetched = await fetch_many(tickers, start_date, end_date)
+    results = await compute_batch_stage(tickers, fetched, spy_monthly, "beta")
+    
+    return BetaResponse(start_date=start_date, end_date=end_date, results=results)
+
+@app.post("/analytics/rolling", response_model=RollingAnalyticsResponse)
+async def run_rolling_analytics(request: RollingAnalyticsRequest):
+    """
+    Rolling beta and drawdown series for one ticker over `window`-month windows
+    """
+    try:
+        ticker = request.ticker.upper()
+        
+        with stage("fetch"):
+            stock_df, spy_monthly = await asyncio.gather(
+                run_io(datapull, ticker, request.start_date, request.end_date),
+                run_io(benchmark_cache.window, "SPY", request.start_date, request.end_date)
+            )
+        return await run_cpu(compute_rolling_response, ticker, stock_df, spy_monthly, request.window)
+        
+    except RateLimitError:
+        raise
+    except Exception as e:
+        _record_error("/analytics/rolling", e)
+        raise HTTPException(status_code=500, detail=f"Rolling analytics failed: {_error_message(e)}")
+
+@app.post("/analytics/sensitivity", response_model=SensitivityResponse)
+async def run_sensitivity_analytics(request: SensitivityRequest):
+    """
+    Optimal WACC and debt ratio over a grid of tax rate, risk-free rate and D/E assumptions
+    
+    Prices and beta are computed once; the response grids are indexed
+    [tax_rate][risk_free_rate][de_ratio].
+    """
+    ticker = request.ticker.upper()
+    tax_rates = request.tax_rate.values()
+    risk_free_rates = request.risk_free_rate.values()
+    de_ratio = DE_RATIOS.get(ticker, DEFAULT_DE_RATIO)
+    de_ratios = (request.de_ratio or SweepRange(start=de_ratio, stop=de_ratio)).values()
+    
+    if not np.all((tax_rates >= 0) & (tax_rates < 1)):
+        raise HTTPException(status_code=400, detail="Tax rates must be in [0, 1)")
+    if not np.all(de_ratios >= 0):
+        raise HTTPException(status_code=400, detail="D/E ratios must be non-negative")
+    
+    # Memory follows the full 4-D array, not the scenario count alone
+    scenarios = len(tax_rates) * len(risk_free_rates) * len(de_ratios)
+    points = scenarios * request.curve_points
+    if points > SENSITIVITY_MAX_POINTS:
+        raise HTTPException(status_code=400,
+                            detail=f"{scenarios} scenarios × {request.curve_points} curve points requested; "
+                                   f"the limit is {SENSITIVITY_MAX_POINTS} points")
+    
+    try:
+        with stage("fetch"):
+            stock_df, spy_monthly = await asyncio.gather(
+                run_io(datapull, ticker, request.start_date, request.end_date),
+                run_io(benchmark_cache.window, "SPY", request.start_date, request.end_date)
+            )
+        return await compute_sensitivity_stage(ticker, stock_df, request.start_date, request.end_date,
+                                               spy_monthly, tax_rates, risk_free_rates, de_ratios,
+                                               request.curve_points)
+        
+    except RateLimitError:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Analytics computation failed: {str(e)}")
+        _record_error("/analytics/sensitivity", e)
+        raise HTTPException(status_code=500, detail=f"Sensitivity analysis failed: {_error_message(e)}")
+
+@app.get("/analytics/state/{ticker}", response_model=AnalyticsStateResponse)
+async def get_analytics_state(ticker: str):
+    """
+    Drawdown, beta, market return and optimal WACC over the ticker's full stored history
+    
+    Served from the ticker's incremental state: only bars stored since the
+    last call are folded in (O(1) each). The state is replayed from scratch
+    only after a backfill or correction of the ticker's or SPY's prices.
+    """
+    ticker = ticker.upper()
+    try:
+        return await run_io(refresh_analytics_state, ticker)
+    except RateLimitError:
+        raise
+    except Exception as e:
+        _record_error("/analytics/state", e)
+        raise HTTPException(status_code=500, detail=f"Analytics state refresh failed: {_error_message(e)}")
+
+@app.on_event("startup")
+def map_precomputed_files():
+    universe_snapshot.refresh()
+    if price_matrix is not None:
+        price_matrix.refresh()
+
+@app.get("/analytics/snapshot", response_model=UniverseSnapshotResponse)
+async def get_universe_snapshot(window: Literal["1y", "3y", "5y"] = "5y"):
+    """Every precomputed ticker for one standard window, e.g. /analytics/snapshot?window=3y"""
+    rows = universe_snapshot.window(window)
+    return UniverseSnapshotResponse(window=window, results=[snapshot_model(row) for row in rows
+                                                            if snapshot_is_current(row)])
+
+@app.get("/analytics/snapshot/{ticker}", response_model=SnapshotResult)
+async def get_snapshot_result(ticker: str, window: Literal["1y", "3y", "5y"] = "5y"):
+    """
+    Drawdown, beta, unlevered beta and WACC optimum for a standard trailing
+    window, looked up in the memory-mapped universe snapshot (no data pull,
+    no computation). Rows computed under other model assumptions are ignored;
+    run universe_snapshot.py to add tickers or refresh it.
+    """
+    ticker = ticker.upper()
+    row = universe_snapshot.lookup(ticker, window)
+    current = row is not None and snapshot_is_current(row)
+    record_cache("snapshot", hit=current)
+    if not current:
+        raise HTTPException(status_code=404,
+                            detail=f"No current {window} snapshot for {ticker}; run universe_snapshot.py "
+                                   f"or use /analytics/run")
+    return snapshot_model(row)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: stage and request latency histograms, cache, upstream and error counters"""
+    return Response(registry.render(), media_type=PROMETHEUS_MEDIA_TYPE)
 
 @app.get("/health")
 async def health_check():
@@ -313,6 +1946,13 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "analytics": "/analytics/run (POST)",
+            "batch": "/analytics/batch (POST)",
+            "beta": "/analytics/beta (POST)",
+            "rolling": "/analytics/rolling (POST)",
+            "sensitivity": "/analytics/sensitivity (POST)",
+            "state": "/analytics/state/{ticker} (GET)",
+            "snapshot": "/analytics/snapshot/{ticker}?window=5y (GET)",
+            "metrics": "/metrics (GET)",
             "health": "/health (GET)"
         }
     }
@@ -190,9 +190,13 @@ import plotly.graph_objects as go
 from datetime import datetime
 import time
 import requests
-import glob
-import time
-import glob
+import os
+import sys
+
+# `streamlit run frontend/firstpage.py` only puts frontend/ on the path; the
+# Arrow decoding is shared with the API from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from arrow_ipc import ARROW_STREAM_MEDIA_TYPE, read_tables
 
 # Page Config
 st.set_page_config(page_title="Equity Analytics Dashboard", layout="wide")
@@ -230,73 +234,59 @@ else:
     st.success(f"📅 Selected Range: {start_date.strftime('%b %Y')} → {end_date.strftime('%b %Y')}")
 
 # -------------------------------------------------------------------
-# API call function
-@st.cache_data(ttl=300)
-def call_analytics_api(ticker, start_date, end_date):
-    """Call the analytics API to generate enhanced data"""
+# Data access: one API call per (ticker, start, end), cached across reruns
+API_URL = os.getenv("ANALYTICS_API_URL", "http://localhost:8000")
+
+@st.cache_data(ttl=300, show_spinner="Running financial calculations...")
+def fetch_analytics(ticker, start_date, end_date):
+    """
+    Run /analytics/run once and keep the decoded frames
+    Returns {"summary": dict, "timeseries": DataFrame (chart layout), "wacc_curve": DataFrame}
+    """
+    response = requests.post(
+        f"{API_URL}/analytics/run",
+        json={
+            "ticker": ticker,
+            "start_date": start_date,
+            "end_date": end_date,
+            "persist": False  # The dashboard only displays results; no artifacts on disk
+        },
+        headers={"Accept": ARROW_STREAM_MEDIA_TYPE},
+        timeout=60
+    )
+    response.raise_for_status()
+    tables = read_tables(response.content)
+    
+    summary = tables["results"].iloc[0].to_dict()
+    
+    # Map to expected column names for compatibility
+    timeseries = tables["timeseries"].rename(columns={
+        'datetime': 'Date',
+        'rebase_100': 'Rebase', 
+        'monthly_return': 'Return',
+        'rolling_max': 'Peak',
+        'drawdown': 'Drawdown'
+    })
+    timeseries['beta'] = summary['beta']
+    timeseries['unlevered_beta'] = summary['unlevered_beta']
+    
+    return {"summary": summary, "timeseries": timeseries, "wacc_curve": tables["wacc_curve"]}
+
+def load_analytics(ticker, start_date, end_date):
+    """Cached analytics for the selection, or None (with an error shown) if the API call fails"""
     try:
-        response = requests.post(
-            "http://localhost:8000/analytics/run",
-            json={
-                "ticker": ticker,
-                "start_date": start_date,
-                "end_date": end_date
-            },
-            timeout=60
-        )
-        if response.status_code == 200:
-            return True
-        else:
-            st.error(f"API Error: {response.status_code}")
-            return False
+        return fetch_analytics(ticker, start_date, end_date)
+    except requests.HTTPError as e:
+        st.error(f"API Error: {e.response.status_code}")
     except Exception as e:
         st.error(f"API Error: {str(e)}")
-        return False
-
-# Load Enhanced Data
-def load_enhanced_csv(ticker, start_date, end_date):
-    """Load the most recent enhanced CSV file, generate if not exists"""
-    try:
-        csv_files = glob.glob(f"{ticker}_enhanced_analytics_*.csv")
-        if not csv_files:
-            # Generate enhanced data using API
-            st.info(f"📊 Generating enhanced analytics for {ticker}...")
-            with st.spinner("Running financial calculations..."):
-                success = call_analytics_api(ticker, start_date, end_date)
-            
-            if success:
-                st.success(f"✅ Enhanced analytics generated for {ticker}")
-                # Try to find the file again
-                csv_files = glob.glob(f"{ticker}_enhanced_analytics_*.csv")
-            else:
-                st.error("❌ Failed to generate analytics")
-                return None
-        
-        if csv_files:
-            latest_file = max(csv_files)
-            df = pd.read_csv(latest_file)
-            df['datetime'] = pd.to_datetime(df['datetime'])
-            
-            # Map to expected column names for compatibility
-            df = df.rename(columns={
-                'datetime': 'Date',
-                'rebase_100': 'Rebase', 
-                'monthly_return': 'Return',
-                'rolling_max': 'Peak',
-                'drawdown': 'Drawdown'
-            })
-            
-            return df
-        else:
-            st.error(f"❌ Could not generate or find enhanced data for {ticker}")
-            return None
-            
-    except Exception as e:
-        st.error(f"Error: {str(e)}")
-        return None
+    return None
 
-# Load the enhanced data (this will auto-generate if missing)
-df = load_enhanced_csv(symbol, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+# Load analytics for the selection (every chart below reads from this one result)
+analytics = None
+if start_date <= end_date:
+    analytics = load_analytics(symbol, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+df = analytics["timeseries"] if analytics is not None else None
 
 
 # -------------------------------------------------------------------
@@ -328,7 +318,7 @@ if st.button("✨ Show Animated Analysis"):
 
     if df_filtered is None or df_filtered.empty:
         st.error("⚠ No enhanced data available for the selected period.")
-        st.info("💡 Make sure to run the API first to generate enhanced CSV files.")
+        st.info("💡 Make sure the analytics API is running.")
     else:
         # -----------------------------------------------------------
         # 1️⃣ MDD - Drawdown Chart (Original)
@@ -482,151 +472,136 @@ if st.button("✨ Show Animated Analysis"):
         # -----------------------------------------------------------
         st.subheader("💰 WACC vs Debt Ratio Analysis")
         
-        # Make API call to get WACC curve data
-        with st.spinner("📊 Calculating WACC optimization..."):
-            try:
-                response = requests.post(
-                    "http://localhost:8000/analytics/run",
-                    json={
-                        "ticker": symbol,
-                        "start_date": start_date.strftime('%Y-%m-%d'),
-                        "end_date": end_date.strftime('%Y-%m-%d')
-                    },
-                    timeout=60
+        # The WACC curve comes from the same cached API result as the charts above
+        wacc_curve = analytics["wacc_curve"] if analytics is not None else None
+        if wacc_curve is None or wacc_curve.empty:
+            st.error("❌ No WACC curve data available")
+        else:
+            api_data = analytics["summary"]
+            
+            # Extract data for visualization
+            debt_ratios = (wacc_curve['debt_ratio'] * 100).tolist()  # Convert to %
+            wacc_values = wacc_curve['wacc'].tolist()
+            
+            # Find minimum WACC point
+            min_wacc_idx = wacc_values.index(min(wacc_values))
+            optimal_debt = debt_ratios[min_wacc_idx]
+            optimal_wacc = wacc_values[min_wacc_idx]
+            
+            # Create WACC curve plot
+            fig_wacc = go.Figure()
+            
+            # Main curve
+            fig_wacc.add_trace(go.Scatter(
+                x=debt_ratios,
+                y=wacc_values,
+                mode='lines+markers',
+                line=dict(color='purple', width=3),
+                marker=dict(size=4, color='purple'),
+                name='WACC Curve',
+                hovertemplate='<b>Debt:</b> %{x:.1f}%<br><b>WACC:</b> %{y:.2f}%<extra></extra>'
+            ))
+            
+            # Highlight optimal point
+            fig_wacc.add_trace(go.Scatter(
+                x=[optimal_debt],
+                y=[optimal_wacc],
+                mode='markers',
+                marker=dict(color='red', size=15, symbol='star', line=dict(color='darkred', width=2)),
+                name=f'Minimum WACC at {optimal_debt:.1f}% Debt',
+                hovertemplate='<b>OPTIMAL POINT</b><br><b>Debt:</b> %{x:.1f}%<br><b>Min WACC:</b> %{y:.2f}%<extra></extra>'
+            ))
+            
+            # Add annotation pointing to minimum
+            fig_wacc.add_annotation(
+                x=optimal_debt,
+                y=optimal_wacc,
+                text=f"🎯 Minimum WACC<br>Debt: {optimal_debt:.1f}%<br>WACC: {optimal_wacc:.2f}%",
+                showarrow=True,
+                arrowhead=2,
+                arrowcolor="red",
+                arrowwidth=2,
+                bgcolor="rgba(255,255,255,0.9)",
+                bordercolor="red",
+                borderwidth=2,
+                font=dict(size=12, color="darkred")
+            )
+            
+            fig_wacc.update_layout(
+                title=f"{symbol} WACC Optimization Curve (0% - 99% Debt Range)",
+                xaxis_title="Debt Ratio (%)",
+                yaxis_title="WACC (%)",
+                height=500,
+                template="plotly_white",
+                showlegend=True,
+                xaxis=dict(
+                    dtick=4,  # Scale of 4 for debt %
+                    tick0=1,  # Start from 1%
+                    tickmode='linear',
+                    range=[1, 99]  # Start from 1% instead of 0%
+                ),
+                yaxis=dict(
+                    dtick=2.0,  # Scale of 2.000000 for WACC %
+                    tick0=0.00,  # Start from 0.00%
+                    tickmode='linear',
+                    tickformat='.2f'  # Show 2 decimal places
                 )
-                
-                if response.status_code == 200:
-                    api_data = response.json()
-                    wacc_curve = api_data['wacc_curve']
-                    
-                    # Extract data for visualization
-                    debt_ratios = [point['debt_ratio'] * 100 for point in wacc_curve]  # Convert to %
-                    wacc_values = [point['wacc']  for point in wacc_curve]  # Convert to % for Y-axis
-                    
-                    # Find minimum WACC point
-                    min_wacc_idx = wacc_values.index(min(wacc_values))
-                    optimal_debt = debt_ratios[min_wacc_idx]
-                    optimal_wacc = wacc_values[min_wacc_idx]
-                    
-                    # Create WACC curve plot
-                    fig_wacc = go.Figure()
-                    
-                    # Main curve
-                    fig_wacc.add_trace(go.Scatter(
-                        x=debt_ratios,
-                        y=wacc_values,
-                        mode='lines+markers',
-                        line=dict(color='purple', width=3),
-                        marker=dict(size=4, color='purple'),
-                        name='WACC Curve',
-                        hovertemplate='<b>Debt:</b> %{x:.1f}%<br><b>WACC:</b> %{y:.2f}%<extra></extra>'
-                    ))
-                    
-                    # Highlight optimal point
-                    fig_wacc.add_trace(go.Scatter(
-                        x=[optimal_debt],
-                        y=[optimal_wacc],
-                        mode='markers',
-                        marker=dict(color='red', size=15, symbol='star', line=dict(color='darkred', width=2)),
-                        name=f'Minimum WACC at {optimal_debt:.1f}% Debt',
-                        hovertemplate='<b>OPTIMAL POINT</b><br><b>Debt:</b> %{x:.1f}%<br><b>Min WACC:</b> %{y:.2f}%<extra></extra>'
-                    ))
-                    
-                    # Add annotation pointing to minimum
-                    fig_wacc.add_annotation(
-                        x=optimal_debt,
-                        y=optimal_wacc,
-                        text=f"🎯 Minimum WACC<br>Debt: {optimal_debt:.1f}%<br>WACC: {optimal_wacc:.2f}%",
-                        showarrow=True,
-                        arrowhead=2,
-                        arrowcolor="red",
-                        arrowwidth=2,
-                        bgcolor="rgba(255,255,255,0.9)",
-                        bordercolor="red",
-                        borderwidth=2,
-                        font=dict(size=12, color="darkred")
-                    )
-                    
-                    fig_wacc.update_layout(
-                        title=f"{symbol} WACC Optimization Curve (0% - 99% Debt Range)",
-                        xaxis_title="Debt Ratio (%)",
-                        yaxis_title="WACC (%)",
-                        height=500,
-                        template="plotly_white",
-                        showlegend=True,
-                        xaxis=dict(
-                            dtick=4,  # Scale of 4 for debt %
-                            tick0=1,  # Start from 1%
-                            tickmode='linear',
-                            range=[1, 99]  # Start from 1% instead of 0%
+            )
+            
+            st.plotly_chart(fig_wacc, use_container_width=True)
+            
+            # -----------------------------------------------------------
+            # 7️⃣ Enhanced Summary Table
+            # -----------------------------------------------------------
+            st.subheader("📋 Complete Financial Metrics Summary Table")
+            
+            # Create comprehensive summary data
+            summary_data = {
+                "Financial Metric": [
+                    f"{symbol} Beta (Levered)",
+                    f"{symbol} Beta (Unlevered)", 
+                    "Optimal WACC (%)",
+                    "Debt % at Optimal WACC",
+                    "Equity % at Optimal WACC",
+                    "Maximum Drawdown (%)"
+                ],
+                "Value": [
+                    f"{api_data['beta']:.9f}",
+                    f"{api_data['unlevered_beta']:.9f}",
+                    f"{optimal_wacc:.2f}%",
+                    f"{optimal_debt:.2f}%",
+                    f"{100-optimal_debt:.2f}%",
+                    f"{api_data['max_drawdown']:.6f}%"
+                ]
+            }
+            
+            # Display as styled table
+            summary_df = pd.DataFrame(summary_data)
+            
+            # Create attractive table layout
+            col1, col2, col3 = st.columns([1, 3, 1])
+            
+            with col2:
+                st.dataframe(
+                    summary_df,
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "Financial Metric": st.column_config.TextColumn(
+                            "📊 Financial Metric", 
+                            width="large"
                         ),
-                        yaxis=dict(
-                            dtick=2.0,  # Scale of 2.000000 for WACC %
-                            tick0=0.00,  # Start from 0.00%
-                            tickmode='linear',
-                            tickformat='.2f'  # Show 2 decimal places
+                        "Value": st.column_config.TextColumn(
+                            "📈 Value", 
+                            width="medium"
                         )
-                    )
-                    
-                    st.plotly_chart(fig_wacc, use_container_width=True)
-                    
-                    # -----------------------------------------------------------
-                    # 7️⃣ Enhanced Summary Table
-                    # -----------------------------------------------------------
-                    st.subheader("📋 Complete Financial Metrics Summary Table")
-                    
-                    # Create comprehensive summary data
-                    summary_data = {
-                        "Financial Metric": [
-                            f"{symbol} Beta (Levered)",
-                            f"{symbol} Beta (Unlevered)", 
-                            "Optimal WACC (%)",
-                            "Debt % at Optimal WACC",
-                            "Equity % at Optimal WACC",
-                            "Maximum Drawdown (%)"
-                        ],
-                        "Value": [
-                            f"{api_data['beta']:.9f}",
-                            f"{api_data['unlevered_beta']:.9f}",
-                            f"{optimal_wacc:.2f}%",
-                            f"{optimal_debt:.2f}%",
-                            f"{100-optimal_debt:.2f}%",
-                            f"{api_data['max_drawdown']:.6f}%"
-                        ]
                     }
-                    
-                    # Display as styled table
-                    summary_df = pd.DataFrame(summary_data)
-                    
-                    # Create attractive table layout
-                    col1, col2, col3 = st.columns([1, 3, 1])
-                    
-                    with col2:
-                        st.dataframe(
-                            summary_df,
-                            use_container_width=True,
-                            hide_index=True,
-                            column_config={
-                                "Financial Metric": st.column_config.TextColumn(
-                                    "📊 Financial Metric", 
-                                    width="large"
-                                ),
-                                "Value": st.column_config.TextColumn(
-                                    "📈 Value", 
-                                    width="medium"
-                                )
-                            }
-                        )
-                    
-                    # Highlight optimal capital structure in success box
-                    st.success(
-                        f"🎯 **Optimal Capital Structure for {symbol}:** "
-                        f"{optimal_debt:.2f}% Debt + {100-optimal_debt:.2f}% Equity "
-                        f"→ **Minimum WACC: {optimal_wacc:.2f}%**"
-                    )
-                    
-                else:
-                    st.error(f"❌ API Error: {response.status_code}")
-                    
-            except Exception as e:
-                st.error(f"❌ Error calculating WACC: {str(e)}")
+                )
+            
+            # Highlight optimal capital structure in success box
+            st.success(
+                f"🎯 **Optimal Capital Structure for {symbol}:** "
+                f"{optimal_debt:.2f}% Debt + {100-optimal_debt:.2f}% Equity "
+                f"→ **Minimum WACC: {optimal_wacc:.2f}%**"
+            )
+
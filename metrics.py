@@ -0,0 +1,207 @@
+"""
+Pipeline Metrics
+
+Lightweight in-process instrumentation for the analytics API:
+- counters (cache hits/misses, upstream calls, errors)
+- latency histograms per pipeline stage and per endpoint
+- a per-request stage timing record for the Server-Timing header
+
+Everything renders in the Prometheus text exposition format, so no client
+library is needed. Recording is a dict update under a lock, cheap enough
+for the hot path.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from sub-millisecond NumPy kernels to slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key):
+    if not key:
+        return ""
+    escape = lambda v: v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in key) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels):
+        series = self._series.get(_label_key(labels))
+        return series[-1] if series else 0
+
+    def samples(self):
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        samples = []
+        for key, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", key + (("le", _format_value(float(bound))),), cumulative))
+            samples.append((f"{self.name}_bucket", key + (("le", "+Inf"),), series[-1]))
+            samples.append((f"{self.name}_sum", key, series[-2]))
+            samples.append((f"{self.name}_count", key, series[-1]))
+        return samples
+
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together for /metrics"""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        existing = self._metrics.setdefault(metric.name, metric)
+        if type(existing) is not type(metric):
+            raise ValueError(f"Metric {metric.name} already registered as a {existing.kind}")
+        return existing
+
+    def counter(self, name, documentation):
+        return self._register(Counter(name, documentation))
+
+    def histogram(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, buckets))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in metric.samples():
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4"
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "analytics_stage_duration_seconds", "Time spent in each analytics pipeline stage")
+REQUEST_SECONDS = registry.histogram(
+    "analytics_request_duration_seconds", "HTTP request latency by endpoint and status")
+CACHE_REQUESTS = registry.counter(
+    "analytics_cache_requests_total", "Cache lookups by cache and result (hit or miss)")
+UPSTREAM_REQUESTS = registry.counter(
+    "analytics_upstream_requests_total", "Twelve Data time_series calls by outcome")
+UPSTREAM_SYMBOLS = registry.counter(
+    "analytics_upstream_symbols_total", "Symbols requested from Twelve Data")
+ERRORS = registry.counter(
+    "analytics_errors_total", "Failed analytics computations by endpoint and exception type")
+
+# Stage durations of the current request, set by the API middleware when
+# Server-Timing is enabled; None everywhere else
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a block as pipeline stage `name`
+
+    The duration goes into the stage histogram and, inside a request that
+    records timings, is added to that request's Server-Timing entry for the
+    stage (repeated stages, e.g. per ticker in a batch, are summed).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def start_request_timings():
+    """Start collecting stage timings for the current request; returns the (mutable) record"""
+    timings = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing_header(timings, total=None):
+    """Server-Timing header value (durations in milliseconds) for a timing record"""
+    entries = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in timings.items()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(entries)
+
+
+# Example usage
+if __name__ == "__main__":
+    timings = start_request_timings()
+    with stage("returns"):
+        sum(range(100_000))
+    record_cache("benchmark", hit=False)
+    record_cache("benchmark", hit=True)
+
+    print(f"Server-Timing: {server_timing_header(timings)}")
+    print(registry.render())
@@ -0,0 +1,255 @@
+"""
+Memory-Mapped Price Matrix
+
+Closing prices for a whole universe as one contiguous float64 matrix on
+disk (dates x symbols, row-major, NaN where a symbol has no bar), opened
+with np.memmap. Every uvicorn worker maps the same files read-only, so the
+pages are shared through the OS page cache instead of each process parsing
+one CSV per ticker.
+
+Files in the matrix directory:
+- meta.json: interval, symbol order (the column index), committed row count
+  and the generation of the data files
+- close-<generation>.f64: the matrix, one row per date
+- dates-<generation>.i8: row datetimes as int64 nanoseconds
+
+Rows are only ever added at the end: append() writes them past the
+committed count and then replaces meta.json, so readers (which map exactly
+the committed rows) never see a partial row. New symbols or corrected
+history need create(), which writes a new generation. One writer at a time.
+"""
+
+import argparse
+import glob
+import json
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+META_FILE = "meta.json"
+
+# Zero-copy view of one symbol: bar datetimes (datetime64[ns]) and closes
+PriceSlice = namedtuple("PriceSlice", ["dates", "close"])
+
+
+def _frames_to_rows(frames, symbols):
+    """Union of the frames' datetimes and the matching (dates x symbols) close matrix"""
+    closes = {
+        symbol: pd.Series(df['close'].to_numpy(dtype=float), index=pd.to_datetime(df['datetime']))
+        for symbol, df in frames.items()
+    }
+    matrix = pd.DataFrame(closes).sort_index().reindex(columns=symbols)
+    return matrix.index.to_numpy(dtype='datetime64[ns]'), matrix.to_numpy(dtype=np.float64)
+
+
+class PriceMatrix:
+    def __init__(self, directory):
+        """
+        Parameters:
+        - directory : str
+            Matrix directory (see create); opening a missing matrix gives an
+            empty one until a writer creates it
+        """
+        self.directory = directory
+        self._view = (None, {}, np.empty(0, 'datetime64[ns]'), np.empty((0, 0)))  # (meta, index, dates, close)
+        self._stat = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, directory, frames, interval="1month"):
+        """
+        Write a new matrix generation from {symbol: DataFrame with datetime and close}
+
+        Returns:
+        - PriceMatrix : opened on `directory`
+        """
+        os.makedirs(directory, exist_ok=True)
+        symbols = sorted(frames)
+        dates, close = _frames_to_rows(frames, symbols)
+
+        matrix = cls(directory)
+        previous = matrix._read_meta()
+        generation = previous['generation'] + 1 if previous else 1
+        with open(os.path.join(directory, f"close-{generation}.f64"), "wb") as f:
+            f.write(np.ascontiguousarray(close).tobytes())
+        with open(os.path.join(directory, f"dates-{generation}.i8"), "wb") as f:
+            f.write(dates.astype(np.int64).tobytes())
+        matrix._write_meta({'interval': interval, 'symbols': symbols, 'rows': len(dates),
+                            'generation': generation})
+
+        # Processes that mapped the old generation keep it until they re-map
+        if previous:
+            for name in (f"close-{previous['generation']}.f64", f"dates-{previous['generation']}.i8"):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except FileNotFoundError:
+                    pass
+        return matrix
+
+    def _read_meta(self):
+        try:
+            with open(os.path.join(self.directory, META_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, meta):
+        tmp_path = os.path.join(self.directory, f".{META_FILE}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.directory, META_FILE))
+
+    def refresh(self):
+        """Re-map when a writer has committed rows or a new generation since the last call"""
+        try:
+            stat = os.stat(os.path.join(self.directory, META_FILE))
+        except FileNotFoundError:
+            return
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if signature == self._stat:
+            return
+        with self._lock:
+            if signature == self._stat:
+                return
+            meta = self._read_meta()
+            rows, columns = meta['rows'], len(meta['symbols'])
+            generation = meta['generation']
+            if rows and columns:
+                close = np.memmap(os.path.join(self.directory, f"close-{generation}.f64"), dtype=np.float64,
+                                  mode='r', shape=(rows, columns))
+                dates = np.memmap(os.path.join(self.directory, f"dates-{generation}.i8"), dtype=np.int64,
+                                  mode='r', shape=(rows,)).view('datetime64[ns]')
+            else:
+                close, dates = np.empty((rows, columns)), np.empty(rows, 'datetime64[ns]')
+            index = {symbol: j for j, symbol in enumerate(meta['symbols'])}
+            self._view = (meta, index, dates, close)
+            self._stat = signature
+
+    @property
+    def symbols(self):
+        self.refresh()
+        return list(self._view[1])
+
+    def __contains__(self, symbol):
+        self.refresh()
+        return symbol in self._view[1]
+
+    def __len__(self):
+        self.refresh()
+        return len(self._view[2])
+
+    def window(self, start_date=None, end_date=None):
+        """
+        Rows between two dates for the whole universe
+
+        Returns:
+        - tuple : (dates, close matrix, {symbol: column}); dates and close are
+          read-only views into the mapped files
+        """
+        self.refresh()
+        _, index, dates, close = self._view
+        first = 0 if start_date is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start_date)), 'left')
+        last = len(dates) if end_date is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end_date)), 'right')
+        return dates[first:last], close[first:last], index
+
+    def slice(self, symbol, start_date=None, end_date=None):
+        """
+        One symbol's bars between two dates, or None if the symbol is not in the matrix
+
+        Rows before the symbol's first bar and after its last are trimmed, so
+        the result is a strided view of the mapped column; only a symbol with
+        missing bars inside the window gets a compacted copy.
+        """
+        dates, close, index = self.window(start_date, end_date)
+        j = index.get(symbol)
+        if j is None:
+            return None
+        column = close[:, j]
+        present = ~np.isnan(column)
+        if not present.any():
+            return PriceSlice(dates[:0], column[:0])
+        first = present.argmax()
+        last = len(present) - present[::-1].argmax()
+        if present[first:last].all():
+            return PriceSlice(dates[first:last], column[first:last])
+        return PriceSlice(dates[present], column[present])
+
+    def append(self, frames):
+        """
+        Add the bars in {symbol: DataFrame with datetime and close} dated after the last row
+
+        Returns:
+        - int : rows added
+        """
+        meta = self._read_meta()
+        if meta is None:
+            raise ValueError(f"No price matrix in {self.directory}; create one first")
+        unknown = set(frames) - set(meta['symbols'])
+        if unknown:
+            raise ValueError(f"Symbols not in the matrix: {sorted(unknown)}; recreate it to add symbols")
+
+        dates, close = _frames_to_rows(frames, meta['symbols'])
+        if not len(dates):
+            return 0
+        rows, columns, generation = meta['rows'], len(meta['symbols']), meta['generation']
+        if rows:
+            last_date = np.fromfile(os.path.join(self.directory, f"dates-{generation}.i8"), dtype=np.int64,
+                                    count=1, offset=(rows - 1) * 8).view('datetime64[ns]')[0]
+            if dates[0] <= last_date:
+                raise ValueError(f"Bar {pd.Timestamp(dates[0])} is not after the last row {pd.Timestamp(last_date)}; "
+                                 "recreate the matrix")
+
+        # Anything past the committed rows is left over from an interrupted append
+        for name, data, width in ((f"close-{generation}.f64", close, columns * 8),
+                                  (f"dates-{generation}.i8", dates.astype(np.int64), 8)):
+            with open(os.path.join(self.directory, name), "r+b") as f:
+                f.truncate(rows * width)
+                f.seek(rows * width)
+                f.write(np.ascontiguousarray(data).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        self._write_meta({**meta, 'rows': rows + len(dates)})
+        return len(dates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or extend the memory-mapped price matrix")
+    parser.add_argument("command", choices=["create", "append"])
+    parser.add_argument("directory", nargs="?", default=os.getenv('PRICE_MATRIX_DIR', "price_matrix"))
+    parser.add_argument("--symbols", help="Comma-separated symbols (default: everything in the price store)")
+    parser.add_argument("--csv", help="Create from *_monthly_*.csv files matching this pattern instead of the store")
+    parser.add_argument("--interval", default="1month")
+    args = parser.parse_args()
+
+    from price_store import PriceStore
+
+    if args.command == "create" and args.csv:
+        frames = {}
+        for path in sorted(glob.glob(args.csv)):
+            df = pd.read_csv(path)
+            symbol = str(df['symbol'].iloc[0]) if 'symbol' in df.columns else os.path.basename(path).split("_")[0]
+            frames[symbol] = df  # Sorted paths: the newest file per symbol wins
+        matrix = PriceMatrix.create(args.directory, frames, args.interval)
+        print(f"Created {args.directory}: {len(matrix)} rows x {len(matrix.symbols)} symbols")
+        return
+
+    store = PriceStore()
+    if args.command == "create":
+        symbols = args.symbols.split(",") if args.symbols else store.symbols(args.interval)
+        matrix = PriceMatrix.create(args.directory, {s: store.load(s, args.interval) for s in symbols},
+                                    args.interval)
+        print(f"Created {args.directory}: {len(matrix)} rows x {len(matrix.symbols)} symbols")
+    else:
+        matrix = PriceMatrix(args.directory)
+        dates, _, _ = matrix.window()
+        after = pd.Timestamp(dates[-1]) + pd.Timedelta(seconds=1) if len(dates) else None
+        symbols = args.symbols.split(",") if args.symbols else matrix.symbols
+        added = matrix.append({s: store.load(s, args.interval, start_date=after) for s in symbols})
+        print(f"Appended {added} rows to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Local Price Store
+
+SQLite-backed on-disk cache of OHLCV bars keyed by (symbol, interval).
+StockDataPuller reads from here first and only asks Twelve Data for the
+date ranges that have not been fetched yet. Each key also carries a
+revision that changes whenever already stored history is rewritten, so
+derived state (analytics_state.py) knows when appending is not enough.
+"""
+
+import os
+import sqlite3
+import sys
+from contextlib import closing
+
+import pandas as pd
+
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class PriceStore:
+    def __init__(self, directory=None):
+        """Open (or create) the store under `directory` (default: $PRICE_STORE_DIR or ./price_store)"""
+        self.directory = directory or os.getenv("PRICE_STORE_DIR", "price_store")
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, "prices.sqlite")
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS prices (
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    datetime TEXT NOT NULL,
+                    open REAL, high REAL, low REAL, close REAL, volume INTEGER,
+                    PRIMARY KEY (symbol, interval, datetime)
+                )"""
+            )
+            # Date range already fetched from upstream, so empty stretches
+            # (holidays, months with no bar yet) are not re-requested
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS coverage (
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    start_date TEXT NOT NULL,
+                    end_date TEXT NOT NULL,
+                    PRIMARY KEY (symbol, interval)
+                )"""
+            )
+            # Bumped on backfills and corrections, not on appends past the covered end
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS revisions (
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    revision INTEGER NOT NULL,
+                    PRIMARY KEY (symbol, interval)
+                )"""
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def coverage(self, symbol, interval):
+        """Return the (start, end) Timestamps already stored for a key, or None"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT start_date, end_date FROM coverage WHERE symbol = ? AND interval = ?",
+                (symbol, interval),
+            ).fetchone()
+        if row is None:
+            return None
+        return pd.Timestamp(row[0]), pd.Timestamp(row[1])
+
+    def symbols(self, interval):
+        """Return every symbol with stored coverage for `interval`, sorted"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT symbol FROM coverage WHERE interval = ? ORDER BY symbol", (interval,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def revision(self, symbol, interval):
+        """Return how many times stored history for a key has been rewritten (0 if never)"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT revision FROM revisions WHERE symbol = ? AND interval = ?", (symbol, interval)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def missing_ranges(self, symbol, interval, start_date, end_date):
+        """
+        Return the list of (start, end) Timestamp ranges that still need fetching
+
+        An empty list means the request can be served entirely from disk. Gaps
+        between the request and the stored range are included so coverage stays
+        one contiguous span.
+        """
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        covered = self.coverage(symbol, interval)
+        if covered is None:
+            return [(start, end)]
+
+        covered_start, covered_end = covered
+        day = pd.Timedelta(days=1)
+        ranges = []
+        if start < covered_start:
+            ranges.append((start, covered_start - day))
+        if end > covered_end:
+            ranges.append((covered_end + day, end))
+        return ranges
+
+    def append(self, symbol, interval, df, start_date, end_date):
+        """
+        Upsert the bars in `df` and mark [start_date, end_date] as fetched
+
+        `df` needs a datetime column plus any of open/high/low/close/volume.
+        Writing at or before the end of the stored range (a backfill or a
+        correction) bumps the key's revision.
+        """
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        rows = []
+        first_bar = None
+        if df is not None and len(df) > 0:
+            frame = df.copy()
+            first_bar = pd.to_datetime(frame["datetime"]).min()
+            frame["datetime"] = pd.to_datetime(frame["datetime"]).dt.strftime(DATETIME_FORMAT)
+            for col in PRICE_COLUMNS:
+                if col not in frame.columns:
+                    frame[col] = None
+            rows = [
+                (symbol, interval, *values)
+                for values in frame[["datetime"] + PRICE_COLUMNS].itertuples(index=False, name=None)
+            ]
+
+        covered = self.coverage(symbol, interval)
+        rewrites_history = covered is not None and (
+            start <= covered[1] or (first_bar is not None and first_bar <= covered[1])
+        )
+        if covered is not None:
+            start, end = min(start, covered[0]), max(end, covered[1])
+
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            if rewrites_history:
+                conn.execute(
+                    """INSERT INTO revisions VALUES (?, ?, 1)
+                    ON CONFLICT (symbol, interval) DO UPDATE SET revision = revision + 1""",
+                    (symbol, interval),
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO coverage VALUES (?, ?, ?, ?)",
+                (symbol, interval, start.strftime(DATETIME_FORMAT), end.strftime(DATETIME_FORMAT)),
+            )
+
+    def load(self, symbol, interval, start_date=None, end_date=None):
+        """Return stored bars as a DataFrame sorted by datetime (same layout as StockDataPuller)"""
+        query = "SELECT datetime, open, high, low, close, volume FROM prices WHERE symbol = ? AND interval = ?"
+        params = [symbol, interval]
+        if start_date is not None:
+            query += " AND datetime >= ?"
+            params.append(pd.Timestamp(start_date).strftime(DATETIME_FORMAT))
+        if end_date is not None:
+            query += " AND datetime <= ?"
+            params.append(pd.Timestamp(end_date).strftime(DATETIME_FORMAT))
+        query += " ORDER BY datetime"
+
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+        df["datetime"] = pd.to_datetime(df["datetime"])
+        df["symbol"] = symbol
+        return df
+
+    def import_csv(self, path, interval="1month", symbol=None):
+        """
+        Pre-populate the store from a CSV written by StockDataPuller.pull_data
+
+        For monthly data the covered range runs to the end of the last bar's month.
+        """
+        df = pd.read_csv(path)
+        if symbol is None:
+            if "symbol" not in df.columns:
+                raise ValueError(f"No symbol column in {path}; pass symbol explicitly")
+            symbol = str(df["symbol"].iloc[0])
+        df["datetime"] = pd.to_datetime(df["datetime"])
+
+        start = df["datetime"].min()
+        end = df["datetime"].max()
+        if interval == "1month":
+            end = end + pd.offsets.MonthEnd(0)
+        self.append(symbol, interval, df, start, end)
+        return symbol, len(df)
+
+
+def main():
+    """Import existing *_monthly_*.csv files: python price_store.py FILE [FILE ...]"""
+    if len(sys.argv) < 2:
+        print("Usage: python price_store.py MSFT_monthly_2019Dec_2024Dec_*.csv [...]")
+        return
+
+    store = PriceStore()
+    for path in sys.argv[1:]:
+        symbol, count = store.import_csv(path)
+        print(f"Imported {count} {symbol} records from {path} into {store.path}")
+
+
+if __name__ == "__main__":
+    main()
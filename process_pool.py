@@ -0,0 +1,177 @@
+"""
+Analytics Process Pool
+
+A managed process pool for the CPU-bound analytics steps, plus the shared
+memory plumbing that feeds it. Large inputs (price and return arrays) are
+copied once into a multiprocessing.shared_memory block; tasks receive only
+a small SharedHandle and map the arrays in place instead of unpickling
+them. Work is submitted as chunks (of tickers, resamples or scenarios) and
+gathered asynchronously, so the event loop keeps serving while every core
+computes.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Picklable reference to arrays in a shared memory block: {key: (offset, shape, dtype)}
+SharedHandle = namedtuple("SharedHandle", ["name", "layout"])
+
+_ALIGNMENT = 64
+
+
+class SharedArrays:
+    """
+    Copy named arrays into one shared memory block for the lifetime of a `with` block
+
+    The creating process owns the block: it is unlinked on exit, after every
+    task using `handle` has finished.
+    """
+
+    def __init__(self, arrays):
+        layout, size = {}, 0
+        arrays = {key: np.ascontiguousarray(value) for key, value in arrays.items()}
+        for key, value in arrays.items():
+            layout[key] = (size, value.shape, value.dtype.str)
+            size += -(-value.nbytes // _ALIGNMENT) * _ALIGNMENT
+        self._shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for key, value in arrays.items():
+            offset, shape, dtype = layout[key]
+            np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=offset)[...] = value
+        self.handle = SharedHandle(self._shm.name, layout)
+
+    def __enter__(self):
+        return self.handle
+
+    def __exit__(self, *exc):
+        self._shm.close()
+        self._shm.unlink()
+
+
+@contextmanager
+def attach(handle):
+    """
+    Read-only views of the arrays behind a SharedHandle (worker side)
+
+    The views are only valid inside the `with` block; copy anything that
+    has to outlive it.
+    """
+    # Workers started by spawn/forkserver share the parent's resource tracker,
+    # so attaching does not make the worker responsible for the block
+    shm = shared_memory.SharedMemory(name=handle.name)
+    arrays = {}
+    try:
+        for key, (offset, shape, dtype) in handle.layout.items():
+            view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            view.flags.writeable = False
+            arrays[key] = view
+        yield arrays
+    finally:
+        arrays.clear()
+        shm.close()
+
+
+def chunk_ranges(n_items, chunk_size=0, workers=1):
+    """
+    Split range(n_items) into (start, stop) chunks
+
+    Parameters:
+    - n_items : int
+    - chunk_size : int, default 0
+        Items per chunk; 0 splits evenly into one chunk per worker
+    - workers : int, default 1
+
+    Returns:
+    - list : (start, stop) pairs covering every item in order
+    """
+    if n_items <= 0:
+        return []
+    if chunk_size <= 0:
+        chunk_size = -(-n_items // max(workers, 1))
+    return [(start, min(start + chunk_size, n_items)) for start in range(0, n_items, chunk_size)]
+
+
+class AnalyticsProcessPool:
+    def __init__(self, max_workers=None, start_method="spawn"):
+        """
+        Parameters:
+        - max_workers : int, optional
+            Worker processes (default: CPU count)
+        - start_method : str, default "spawn"
+            multiprocessing start method; "spawn" and "forkserver" avoid
+            forking a process that already runs I/O threads
+        """
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.start_method = start_method
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        """The underlying ProcessPoolExecutor, started on first use"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context(self.start_method))
+            return self._executor
+
+    async def run(self, func, *args):
+        """Await one call of a module-level function in a worker process"""
+        executor = self.executor
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory): the next call starts a fresh pool
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    async def map_chunks(self, func, chunks, *args):
+        """
+        Run func(chunk, *args) for every chunk concurrently; results in chunk order
+
+        Parameters:
+        - func : callable
+            Module-level function (tasks are pickled by reference)
+        - chunks : iterable
+            Per-task first argument, e.g. (start, stop) ranges from chunk_ranges
+        - *args
+            Arguments shared by every task (keep them small: pass a SharedHandle
+            for arrays)
+        """
+        return await asyncio.gather(*(self.run(func, chunk, *args) for chunk in chunks))
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _sum_chunk(chunk, handle):
+    start, stop = chunk
+    with attach(handle) as arrays:
+        return float(arrays['values'][start:stop].sum())
+
+
+# Example usage
+if __name__ == "__main__":
+    values = np.arange(1_000_000, dtype=float)
+    pool = AnalyticsProcessPool(max_workers=2)
+
+    async def main():
+        with SharedArrays({'values': values}) as handle:
+            partial_sums = await pool.map_chunks(_sum_chunk, chunk_ranges(len(values), workers=4), handle)
+        print(f"Sum over {len(partial_sums)} chunks: {sum(partial_sums):.0f} (expected {values.sum():.0f})")
+
+    asyncio.run(main())
+    pool.shutdown()
@@ -0,0 +1,186 @@
+"""
+Analytics Result Cache
+
+Encoded /analytics/run responses keyed by the normalized request and model
+assumptions, so identical requests skip the pipeline entirely.
+
+- an in-process LRU bounded by entry count and total body size
+- a TTL on every entry, and a data stamp: entries computed before this
+  process last refreshed its benchmark data are treated as stale
+- an optional shared backend so several uvicorn workers reuse each other's
+  results; SQLiteResultBackend is a local stand-in (one file on a shared
+  disk) with the same get/set interface a Redis-style store would have
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import closing
+
+CachedResult = namedtuple("CachedResult", ["body", "media_type", "data_stamp", "expires_at"])
+
+
+class SQLiteResultBackend:
+    """Result store shared by every process that opens the same file"""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    body BLOB NOT NULL,
+                    media_type TEXT NOT NULL,
+                    data_stamp REAL,
+                    expires_at REAL NOT NULL
+                )"""
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key):
+        """Return the stored CachedResult for `key`, or None if missing or expired"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT body, media_type, data_stamp, expires_at FROM results WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        return CachedResult(*row) if row else None
+
+    def set(self, key, result):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)", (key, *result))
+            conn.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),))
+
+    def clear(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM results")
+
+
+class ResultCache:
+    def __init__(self, ttl_seconds=3600, max_entries=256, max_bytes=256 * 2**20, backend=None):
+        """
+        Parameters:
+        - ttl_seconds : float, default 3600
+            Lifetime of an entry; keep it at or below the data refresh interval
+        - max_entries : int, default 256
+            Most responses kept in this process
+        - max_bytes : int, default 256 MiB
+            Most response bytes kept in this process
+        - backend : SQLiteResultBackend or compatible, optional
+            Shared store consulted on local misses and written on every put
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self._entries = OrderedDict()  # key -> CachedResult
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _fresh(result, data_stamp):
+        if result.expires_at <= time.time():
+            return False
+        # Computed from data older than what this process now holds
+        return data_stamp is None or result.data_stamp is None or result.data_stamp >= data_stamp
+
+    def get(self, key, data_stamp=None):
+        """
+        Return the CachedResult for `key`, or None
+
+        `data_stamp` is when this process last refreshed the underlying data;
+        entries computed before it are ignored.
+        """
+        result = self.get_local(key, data_stamp)
+        if result is None:
+            result = self.get_shared(key, data_stamp)
+        return result
+
+    def get_local(self, key, data_stamp=None):
+        """In-process lookup only; never blocks on the backend, so it is safe on the event loop"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                return None
+            if self._fresh(result, data_stamp):
+                self._entries.move_to_end(key)
+                return result
+            self._discard(key)
+        return None
+
+    def get_shared(self, key, data_stamp=None):
+        """Backend lookup (blocking), copied into the local LRU on a hit"""
+        if self.backend is None:
+            return None
+        try:
+            result = self.backend.get(key)
+        except sqlite3.Error as e:
+            print(f"Result cache backend unavailable: {str(e)}")
+            return None
+        if result is None or not self._fresh(result, data_stamp):
+            return None
+        self._store(key, result)
+        return result
+
+    def put(self, key, body, media_type, data_stamp=None):
+        """Cache an encoded response locally and in the shared backend"""
+        result = self.put_local(key, body, media_type, data_stamp)
+        self.put_shared(key, result)
+        return result
+
+    def put_local(self, key, body, media_type, data_stamp=None):
+        """Cache an encoded response in this process only; returns the CachedResult for put_shared"""
+        result = CachedResult(body, media_type, data_stamp, time.time() + self.ttl_seconds)
+        self._store(key, result)
+        return result
+
+    def put_shared(self, key, result):
+        """Write a CachedResult to the backend (blocking: an insert plus an expiry sweep)"""
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(key, result)
+        except sqlite3.Error as e:
+            print(f"Result cache backend unavailable: {str(e)}")
+
+    def _store(self, key, result):
+        if len(result.body) > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = result
+            self._bytes += len(result.body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+
+    def _discard(self, key):
+        result = self._entries.pop(key, None)
+        if result is not None:
+            self._bytes -= len(result.body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.backend is not None:
+            self.backend.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Example usage
+if __name__ == "__main__":
+    cache = ResultCache(ttl_seconds=60, max_entries=2)
+    cache.put('["MSFT", "2020-01-01", "2024-12-31"]', b'{"beta": 1.1}', "application/json", data_stamp=100.0)
+    print(cache.get('["MSFT", "2020-01-01", "2024-12-31"]', data_stamp=100.0))
+    print(cache.get('["MSFT", "2020-01-01", "2024-12-31"]', data_stamp=200.0))  # Data refreshed since: None
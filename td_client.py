@@ -0,0 +1,228 @@
+"""
+Pooled Twelve Data Client
+
+One long-lived client for the Twelve Data REST API:
+- a keep-alive requests.Session shared by every fetch
+- a token bucket sized to the plan's per-minute API credits
+- coalescing of identical in-flight requests
+- same-window requests for different symbols combined into one
+  multi-symbol time_series call
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import UPSTREAM_REQUESTS, UPSTREAM_SYMBOLS, stage
+
+DEFAULT_BASE_URL = "https://api.twelvedata.com"
+
+
+class TwelveDataError(ValueError):
+    """Error payload returned by Twelve Data"""
+
+
+class RateLimitError(TwelveDataError):
+    """Twelve Data rejected the request because the credit limit was hit"""
+
+
+class TokenBucket:
+    def __init__(self, rate_per_minute, capacity=None):
+        """Token bucket refilled at `rate_per_minute`, holding at most `capacity` tokens"""
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` are available, then take them"""
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class TwelveDataClient:
+    def __init__(self, api_key, base_url=None, credits_per_minute=8, max_batch_symbols=8,
+                 batch_window=0.05, timeout=30, session=None):
+        """
+        Parameters:
+        - api_key : str
+            Twelve Data API key
+        - base_url : str, optional
+            API root; $TWELVE_DATA_BASE_URL or the public endpoint. Point it at a
+            local fake upstream for testing
+        - credits_per_minute : int, default 8
+            Plan's credit budget; each symbol in a request costs one credit
+        - max_batch_symbols : int, default 8
+            Most symbols combined into one time_series call
+        - batch_window : float, default 0.05
+            Seconds to wait for more symbols before sending a call, when more
+            than one is already queued (a lone request is sent at once)
+        - session : requests.Session, optional
+            Shared HTTP session (one with a pooled adapter is created by default)
+        """
+        self.api_key = api_key
+        self.base_url = (base_url or os.getenv("TWELVE_DATA_BASE_URL", DEFAULT_BASE_URL)).rstrip("/")
+        self.max_batch_symbols = max(1, min(max_batch_symbols, credits_per_minute))
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self.bucket = TokenBucket(credits_per_minute)
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+
+        self._cond = threading.Condition()
+        self._pending = OrderedDict()  # key -> Future, waiting to be sent
+        self._inflight = {}  # key -> Future, queued or being fetched
+        self._dispatcher = None
+
+    def time_series(self, symbol, interval, start_date, end_date):
+        """
+        Fetch one symbol's bars as a DataFrame (datetime, open, high, low, close, volume, symbol)
+
+        Blocks until the result is available. Identical concurrent requests
+        share a single upstream call.
+        """
+        return self.submit(symbol, interval, start_date, end_date).result()
+
+    def submit(self, symbol, interval, start_date, end_date):
+        """Queue a fetch and return a Future for its DataFrame"""
+        key = (symbol.upper(), interval, str(start_date), str(end_date))
+        with self._cond:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+
+            future = Future()
+            self._inflight[key] = future
+            self._pending[key] = future
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, name="twelvedata-dispatcher", daemon=True)
+                self._dispatcher.start()
+            self._cond.notify()
+        return future
+
+    def _next_batch(self):
+        """Wait for pending work and take up to max_batch_symbols keys sharing one window"""
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+
+            # A lone request goes out at once. Several queued ones are a burst
+            # (or piled up behind the last call), so give the rest of it a
+            # moment to join this call
+            if len(self._pending) > 1:
+                deadline = time.monotonic() + self.batch_window
+                while len(self._pending) < self.max_batch_symbols:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+            first_key = next(iter(self._pending))
+            params = first_key[1:]
+            batch = [key for key in self._pending if key[1:] == params][:self.max_batch_symbols]
+            for key in batch:
+                del self._pending[key]
+            return params, batch
+
+    def _dispatch(self):
+        while True:
+            params, batch = self._next_batch()
+            with stage("upstream_throttle"):
+                self.bucket.acquire(len(batch))
+            symbols = [key[0] for key in batch]
+            UPSTREAM_SYMBOLS.inc(len(symbols))
+
+            try:
+                with stage("upstream"):
+                    frames = self._request(symbols, *params)
+                outcomes = {symbol: frames[symbol] for symbol in symbols}
+                UPSTREAM_REQUESTS.inc(outcome="ok")
+            except Exception as e:
+                outcomes = {symbol: e for symbol in symbols}
+                UPSTREAM_REQUESTS.inc(outcome="rate_limited" if isinstance(e, RateLimitError) else "error")
+
+            with self._cond:
+                for key in batch:
+                    future = self._inflight.pop(key)
+                    outcome = outcomes[key[0]]
+                    if isinstance(outcome, Exception):
+                        future.set_exception(outcome)
+                    else:
+                        future.set_result(outcome)
+
+    def _request(self, symbols, interval, start_date, end_date):
+        """One time_series call; returns {symbol: DataFrame or TwelveDataError}"""
+        response = self.session.get(
+            f"{self.base_url}/time_series",
+            params={
+                "symbol": ",".join(symbols),
+                "interval": interval,
+                "start_date": start_date,
+                "end_date": end_date,
+                "outputsize": 5000,
+                "apikey": self.api_key,
+            },
+            timeout=self.timeout,
+        )
+        if response.status_code == 429:
+            raise RateLimitError(f"Twelve Data rate limit exceeded: {response.text}")
+        response.raise_for_status()
+        payload = response.json()
+
+        # Whole-request errors (bad key, credits exhausted) come back at the top level
+        if payload.get("status") == "error":
+            raise self._error(payload)
+
+        # A single symbol is returned unwrapped; several are keyed by symbol
+        per_symbol = {symbols[0]: payload} if len(symbols) == 1 else payload
+
+        frames = {}
+        for symbol in symbols:
+            data = per_symbol.get(symbol)
+            if data is None:
+                frames[symbol] = TwelveDataError(f"No data returned for {symbol}")
+            elif data.get("status") == "error":
+                frames[symbol] = self._error(data)
+            else:
+                frames[symbol] = self._to_frame(symbol, data.get("values", []))
+        return frames
+
+    @staticmethod
+    def _error(payload):
+        message = payload.get("message", "Unknown Twelve Data error")
+        if payload.get("code") == 429:
+            return RateLimitError(message)
+        return TwelveDataError(message)
+
+    @staticmethod
+    def _to_frame(symbol, values):
+        df = pd.DataFrame(values, columns=["datetime", "open", "high", "low", "close", "volume"])
+        df["datetime"] = pd.to_datetime(df["datetime"])
+        for col in ["open", "high", "low", "close", "volume"]:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        df["symbol"] = symbol
+        return df.sort_values("datetime").reset_index(drop=True)
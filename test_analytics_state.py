@@ -0,0 +1,91 @@
+"""
+Incremental analytics state checks
+
+/analytics/state folds newly stored months into the saved state; the result
+must equal a replay of the whole stored history, including when a month is
+published upstream only after the first sync past its close.
+"""
+
+from contextlib import closing
+
+import pandas as pd
+import pytest
+
+import financial_analytics_api as api
+from analytics_state import AnalyticsStateStore
+from benchmarks.fixtures import RTOL, assert_close, fixture_upstream, synthetic_universe
+from data_pull import StockDataPuller
+from price_store import PriceStore
+
+
+def universe_through_last_closed_month(seed):
+    last_closed = StockDataPuller.last_closed_month()
+    start = pd.Timestamp("2019-12-01")
+    n_months = (last_closed.year - start.year) * 12 + last_closed.month - start.month + 1
+    return synthetic_universe(1, n_months, start=start, seed=seed)
+
+
+def assert_matches_replay(ticker, response):
+    """Drop the saved states and replay the stored history from scratch"""
+    with closing(api.price_store._connect()) as conn, conn:
+        conn.execute("DELETE FROM analytics_state")
+    replayed, _, rebuilt = api.analytics_states.refresh(ticker)
+    assert rebuilt
+    assert_close(api.analytics_states.load(ticker)[0].to_dict(), replayed.to_dict())
+    assert response.beta == pytest.approx(replayed.beta, rel=RTOL)
+
+
+def test_analytics_state_picks_up_new_month():
+    universe = universe_through_last_closed_month(seed=11)
+    ticker = "SYN0000"
+    last_closed = StockDataPuller.last_closed_month()
+
+    with fixture_upstream(api, universe):
+        before = api.refresh_analytics_state(ticker)
+        assert before.last_date == last_closed.strftime("%Y-%m-%d")
+
+        # Next month's bars land in the store after the month closes
+        month = last_closed + pd.Timedelta(days=1)
+        for symbol, close in ((ticker, 123.0), ("SPY", 456.0)):
+            bar = pd.DataFrame({"datetime": [month], "close": [close]})
+            api.price_store.append(symbol, "1month", bar, month, month + pd.offsets.MonthEnd(0))
+        after = api.refresh_analytics_state(ticker)
+
+    assert (after.appended, after.rebuilt) == (1, False)
+    assert after.months == before.months + 1
+    assert after.last_date == (month + pd.offsets.MonthEnd(0)).strftime("%Y-%m-%d")
+
+    # Folding in the new bar gives the same state as replaying the whole history
+    assert_matches_replay(ticker, after)
+
+
+@pytest.fixture
+def own_store(tmp_path, monkeypatch):
+    """A fresh price store and state store, so SPY history from other tests does not leak in"""
+    store = PriceStore(str(tmp_path / "price_store"))
+    monkeypatch.setattr(api, "price_store", store)
+    monkeypatch.setattr(api, "analytics_states", AnalyticsStateStore(store, benchmark="SPY", top_n=api.DRAWDOWN_TOP_N))
+    return store
+
+
+def test_late_published_month_is_fetched_later(own_store):
+    universe = universe_through_last_closed_month(seed=12)
+    ticker = "SYN0000"
+    last_closed = StockDataPuller.last_closed_month()
+    previous = last_closed - pd.offsets.MonthEnd(1)
+
+    # The last closed month is not published yet at the first sync
+    published = {symbol: df.iloc[:-1].copy() for symbol, df in universe.items()}
+    with fixture_upstream(api, published) as upstream:
+        before = api.refresh_analytics_state(ticker)
+        assert before.last_date == previous.strftime("%Y-%m-%d")
+        assert own_store.coverage(ticker, "1month")[1] == previous
+
+        upstream.universe = universe
+        after = api.refresh_analytics_state(ticker)
+
+    assert after.last_date == last_closed.strftime("%Y-%m-%d")
+    assert (after.appended, after.rebuilt) == (1, False)
+    assert (after.months, after.observations) == (before.months + 1, before.observations + 1)
+    assert own_store.coverage(ticker, "1month")[1] == last_closed
+    assert_matches_replay(ticker, after)
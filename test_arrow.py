@@ -0,0 +1,90 @@
+"""
+Arrow IPC output checks
+
+Accept: application/vnd.apache.arrow.stream must carry the analytics of the
+JSON body as results / timeseries / wacc_curve tables.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import financial_analytics_api as api
+from arrow_ipc import ARROW_STREAM_MEDIA_TYPE, read_tables, write_tables
+from benchmarks.fixtures import assert_close, bundled_universe, date_window, fixture_upstream
+
+ARROW = {"accept": ARROW_STREAM_MEDIA_TYPE}
+
+
+@pytest.fixture
+def client():
+    with fixture_upstream(api, bundled_universe()), TestClient(api.app) as client:
+        yield client
+
+
+def window_body(**fields):
+    start_date, end_date = date_window(bundled_universe())
+    return dict(start_date=start_date, end_date=end_date, persist=False, **fields)
+
+
+def arrow_tables(response):
+    assert response.status_code == 200
+    assert response.headers["content-type"] == ARROW_STREAM_MEDIA_TYPE
+    return read_tables(response.content)
+
+
+def assert_tables_match_json(tables, ticker, expected):
+    """The rows of `ticker` in Arrow tables against its JSON /analytics/run body"""
+    row = tables["results"].set_index("ticker").loc[ticker]
+    assert row["status"] == "ok"
+    for field, value in expected.items():
+        if field in api.SERIES_FIELDS or field == "ticker":
+            continue
+        if value is None:
+            assert pd.isna(row[field]), f"{ticker}.{field}"
+        else:
+            actual = json.loads(row[field]) if isinstance(value, (list, dict)) else row[field]
+            assert_close(actual, value, f"{ticker}.{field}")
+
+    series = tables["timeseries"][tables["timeseries"]["ticker"] == ticker]
+    assert_close(series["monthly_return"].fillna(0).tolist(), expected["monthly_return"], f"{ticker}.monthly_return")
+    assert_close(series["drawdown"].tolist(), expected["drawdown_curve"], f"{ticker}.drawdown_curve")
+    assert_close(series["rebase_100"].tolist(), expected["rebase_curve"], f"{ticker}.rebase_curve")
+
+    curve = tables["wacc_curve"][tables["wacc_curve"]["ticker"] == ticker].drop(columns="ticker")
+    assert_close(curve.to_dict("records"), expected["wacc_curve"], f"{ticker}.wacc_curve")
+
+
+def test_run_matches_json(client):
+    body = window_body(ticker="MSFT", bootstrap=100, bootstrap_seed=7)
+    tables = arrow_tables(client.post("/analytics/run", json=body, headers=ARROW))
+    assert_tables_match_json(tables, "MSFT", client.post("/analytics/run", json=body).json())
+
+
+def test_batch_matches_json(client):
+    body = window_body(tickers=["MSFT", "MISSING", "NVDA"])
+    tables = arrow_tables(client.post("/analytics/batch", json=body, headers=ARROW))
+    expected = {r["ticker"]: r for r in client.post("/analytics/batch", json=body).json()["results"]}
+
+    results = tables["results"].set_index("ticker")
+    assert sorted(results.index) == sorted(expected)
+    assert results.loc["MISSING", "status"] == "error"
+    assert results.loc["MISSING", "error"] == expected["MISSING"]["error"]
+    assert "MISSING" not in set(tables["timeseries"]["ticker"]) | set(tables["wacc_curve"]["ticker"])
+    for ticker in ("MSFT", "NVDA"):
+        assert_tables_match_json(tables, ticker, expected[ticker]["result"])
+
+
+def test_write_read_round_trip():
+    frames = {
+        "timeseries": pd.DataFrame({"datetime": pd.date_range("2024-01-31", periods=3, freq="M"),
+                                    "close": [100.0, np.nan, 99.2]}),
+        "empty": pd.DataFrame(columns=["ticker"]),
+    }
+    tables = read_tables(write_tables(frames))
+    assert list(tables) == list(frames)
+    pd.testing.assert_frame_equal(tables["timeseries"], frames["timeseries"], check_freq=False)
+    assert list(tables["empty"].columns) == ["ticker"] and tables["empty"].empty
@@ -0,0 +1,115 @@
+"""
+Analytics output checks
+
+The Parquet artifact must round-trip the time series, WACC curve and scalar
+results; the legacy CSV must get one distinct set of curve columns per grid
+point, whatever the curve resolution. Runs persisted through the background
+writer never overwrite each other and only the newest ones are kept.
+"""
+
+import asyncio
+import json
+import os
+
+import pandas as pd
+import pytest
+from starlette.requests import Request
+
+import financial_analytics_api as api
+from benchmarks.fixtures import assert_close, bundled_universe, date_window, fixture_upstream
+from result_cache import ResultCache
+
+
+def run_analytics(curve_points=100):
+    start_date, end_date = date_window(bundled_universe())
+    with fixture_upstream(api, bundled_universe()):
+        stock_df = api.datapull("MSFT", start_date, end_date)
+        return api.compute_ticker_analytics("MSFT", stock_df, start_date, end_date, curve_points=curve_points)
+
+
+def write_outputs(monkeypatch, tmp_path, curve_points=100):
+    monkeypatch.setattr(api, "ANALYTICS_OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(api, "ANALYTICS_OUTPUT_FORMAT", "both")
+    enhanced_df, wacc_data, response = run_analytics(curve_points)
+    api.save_analytics_output(enhanced_df.copy(), "MSFT", wacc_data, response)
+    return enhanced_df, wacc_data, response
+
+
+def test_parquet_artifact_round_trip(monkeypatch, tmp_path):
+    enhanced_df, wacc_data, response = write_outputs(monkeypatch, tmp_path)
+    (artifact,) = [path for path in tmp_path.iterdir() if path.is_dir()]
+
+    timeseries = pd.read_parquet(artifact / "timeseries.parquet")
+    expected = enhanced_df[api.TIMESERIES_COLUMNS].reset_index(drop=True)
+    pd.testing.assert_frame_equal(timeseries, expected, check_dtype=False)
+
+    curve = pd.read_parquet(artifact / "wacc_curve.parquet")
+    assert_close(curve.to_dict("records"), wacc_data)
+
+    metadata = json.loads((artifact / "metadata.json").read_text())
+    assert metadata["ticker"] == "MSFT"
+    for key in ("beta", "unlevered_beta", "optimal_wacc", "optimal_debt_ratio", "max_drawdown"):
+        assert_close(metadata[key], getattr(response, key), key)
+
+
+@pytest.mark.parametrize("curve_points", [7, 100, 1000])
+def test_csv_has_one_column_set_per_curve_point(monkeypatch, tmp_path, curve_points):
+    _, wacc_data, _ = write_outputs(monkeypatch, tmp_path, curve_points)
+    (csv_path,) = [path for path in tmp_path.iterdir() if path.suffix == ".csv"]
+    csv = pd.read_csv(csv_path)
+
+    wacc_columns = [column for column in csv.columns if column.startswith("wacc_")]
+    assert len(wacc_columns) == len(set(wacc_columns)) == curve_points
+    assert csv[wacc_columns].iloc[0].tolist() == pytest.approx([point['wacc'] for point in wacc_data], rel=1e-12)
+
+
+def test_curve_labels_keep_legacy_names_and_show_real_values():
+    labels = api.debt_ratio_labels(api.debt_ratio_grid(100))
+    assert labels == [f"{percent:02d}" for percent in range(100)]
+    assert api.debt_ratio_labels([0.0, 0.075, 0.5]) == ["00p0", "07p5", "50p0"]
+    assert api.debt_ratio_labels(api.debt_ratio_grid(7))[1] == "14p2857"
+
+
+# Background writer
+
+def test_artifact_writes_in_same_second_do_not_collide(monkeypatch, tmp_path):
+    universe = bundled_universe()
+    start_date, end_date = date_window(universe)
+    monkeypatch.setattr(api, "ANALYTICS_OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(api, "ANALYTICS_OUTPUT_FORMAT", "both")
+    monkeypatch.setattr(api, "result_cache", ResultCache(max_entries=0))
+    request = api.AnalyticsRequest(ticker="MSFT", start_date=start_date, end_date=end_date)
+    http_request = Request({"type": "http", "headers": []})
+
+    async def run_twice():
+        return [await api.run_financial_analytics(request, http_request) for _ in range(2)]
+
+    with fixture_upstream(api, universe):
+        first, second = asyncio.run(run_twice())
+    api.artifact_writer.flush()
+
+    assert second.body == first.body
+    outputs = sorted(os.listdir(tmp_path))
+    assert len([name for name in outputs if name.endswith(".csv")]) == 2
+    assert len([name for name in outputs if os.path.isdir(tmp_path / name)]) == 2
+
+
+def test_writer_keeps_newest_outputs_per_ticker(monkeypatch, tmp_path):
+    monkeypatch.setattr(api, "ANALYTICS_OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(api, "ANALYTICS_OUTPUT_FORMAT", "both")
+    unrelated = tmp_path / "NFLX_enhanced_analytics_20200101_000000.csv"
+    unrelated.write_text("kept")
+    enhanced_df, wacc_data, response = run_analytics()
+
+    writer = api.ArtifactWriter(retention=2)
+    try:
+        for _ in range(4):
+            assert writer.submit(enhanced_df.copy(), "MSFT", wacc_data, response)
+        writer.flush()
+    finally:
+        writer.close()
+
+    stems = {os.path.splitext(name)[0] for name in os.listdir(tmp_path) if name.startswith("MSFT_")}
+    assert len(stems) == 2
+    assert len(os.listdir(tmp_path)) == 5  # Two runs in both formats, plus the other ticker's file
+    assert unrelated.read_text() == "kept"
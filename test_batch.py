@@ -0,0 +1,49 @@
+"""
+/analytics/batch checks
+
+Each ticker gets its own ok/error entry; an ok entry carries the same
+analytics /analytics/run returns for that ticker and window.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import financial_analytics_api as api
+from benchmarks.fixtures import assert_close, bundled_universe, date_window, fixture_upstream
+
+
+@pytest.fixture
+def client():
+    with fixture_upstream(api, bundled_universe()), TestClient(api.app) as client:
+        yield client
+
+
+def window_body(**fields):
+    start_date, end_date = date_window(bundled_universe())
+    return dict(start_date=start_date, end_date=end_date, **fields)
+
+
+def test_batch_reports_errors_per_ticker(client):
+    response = client.post("/analytics/batch", json=window_body(tickers=["msft", "MISSING", " nvda ", "MSFT"]))
+    assert response.status_code == 200
+    results = response.json()["results"]
+
+    # Upper-cased and de-duplicated, in the caller's order
+    assert [r["ticker"] for r in results] == ["MSFT", "MISSING", "NVDA"]
+    assert [r["status"] for r in results] == ["ok", "error", "ok"]
+    assert results[1]["result"] is None and "MISSING" in results[1]["error"]
+
+    for entry in (results[0], results[2]):
+        single = client.post("/analytics/run", json=window_body(ticker=entry["ticker"], persist=False))
+        assert_close(entry["result"], single.json(), entry["ticker"])
+
+
+def test_batch_with_only_failing_tickers_still_answers(client):
+    response = client.post("/analytics/batch", json=window_body(tickers=["BAD1", "BAD2"]))
+    assert response.status_code == 200
+    assert [r["status"] for r in response.json()["results"]] == ["error", "error"]
+
+
+def test_batch_rejects_empty_ticker_list(client):
+    assert client.post("/analytics/batch", json=window_body(tickers=["", "  "])).status_code == 400
+
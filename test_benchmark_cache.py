@@ -0,0 +1,81 @@
+"""
+Benchmark (SPY) cache checks
+
+Loads are counted through the fixture upstream: every cache miss is one
+datapull, every hit is none.
+"""
+
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import financial_analytics_api as api
+from benchmarks.fixtures import bundled_universe, fixture_upstream, synthetic_universe
+
+
+@pytest.mark.parametrize("start_date,end_date", [
+    (None, None), ("2020-01-01", "2024-12-31"), ("2021-03-15", "2022-06-30"), ("2023-01-01", None),
+])
+def test_window_matches_fresh_datapull(start_date, end_date):
+    with fixture_upstream(api, bundled_universe()):
+        cached = api.benchmark_cache.window("SPY", start_date, end_date)
+        fresh = api.compute_monthly_returns(api.datapull("SPY", start_date, end_date))
+    pd.testing.assert_frame_equal(cached, fresh.reset_index(drop=True))
+
+
+def test_entries_expire_after_ttl():
+    cache = api.BenchmarkCache(ttl_seconds=0.2)
+    with fixture_upstream(api, bundled_universe()) as upstream:
+        cache.get("SPY")
+        cache.window("SPY", "2021-01-01", "2022-12-31")
+        assert upstream.calls == 1
+        stamp = cache.refreshed_at("SPY")
+
+        time.sleep(0.3)
+        cache.get("SPY")
+        assert upstream.calls == 2
+        assert cache.refreshed_at("SPY") > stamp
+
+
+def test_least_recently_used_symbol_is_evicted():
+    cache = api.BenchmarkCache(max_entries=2)
+    universe = synthetic_universe(2, 60)
+    with fixture_upstream(api, universe) as upstream:
+        for symbol in ("SPY", "SYN0000", "SPY", "SYN0001"):
+            cache.get(symbol)
+        assert upstream.calls == 3
+        cache.get("SPY")  # Still cached: SYN0000 was the least recently used
+        assert upstream.calls == 3
+        cache.get("SYN0000")
+        assert upstream.calls == 4
+
+
+def test_concurrent_misses_share_one_load():
+    cache = api.BenchmarkCache()
+    loads = []
+    load = cache._load
+
+    def slow_load(symbol):
+        loads.append(symbol)
+        time.sleep(0.2)  # Keep the first load in flight while the others arrive
+        return load(symbol)
+
+    cache._load = slow_load
+    barrier = threading.Barrier(8)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(cache.get("SPY"))
+
+    with fixture_upstream(api, bundled_universe()):
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert loads == ["SPY"]
+    assert len(results) == 8 and all(result is results[0] for result in results)
@@ -0,0 +1,85 @@
+"""
+Cross-sectional beta checks
+
+calculate_betas handles a whole (dates × tickers) matrix at once; each
+column must match the per-ticker covariance / variance computation it
+replaced, including columns with missing months.
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import financial_analytics_api as api
+from assets.beta import calculate_betas
+from benchmarks.fixtures import (
+    assert_close, bundled_universe, date_window, fixture_upstream, parity_universes, stock_symbols
+)
+
+
+def baseline_beta(stock, market):
+    """Original single-ticker convention: sample covariance over population variance"""
+    observed = ~np.isnan(stock) & ~np.isnan(market)
+    stock, market = stock[observed], market[observed]
+    beta = np.cov(stock, market)[0, 1] / np.var(market)
+    alpha = stock.mean() - beta * market.mean()
+    return beta, alpha, np.corrcoef(stock, market)[0, 1] ** 2, int(observed.sum())
+
+
+def test_matrix_betas_match_per_column_computation():
+    rng = np.random.default_rng(1)
+    market = rng.normal(0.01, 0.04, 60)
+    stocks = market[:, None] * np.array([0.5, 1.0, 1.5, 2.0]) + rng.normal(0, 0.02, (60, 4))
+    stocks[:12, 1] = np.nan  # Late listing
+    stocks[30:35, 2] = np.nan  # Gap in the middle
+    market[7] = np.nan  # Missing benchmark month drops out of every column
+
+    stats = calculate_betas(stocks, market)
+    for j in range(stocks.shape[1]):
+        beta, alpha, r_squared, observations = baseline_beta(stocks[:, j], market)
+        assert stats['beta'][j] == pytest.approx(beta, rel=1e-12)
+        assert stats['alpha'][j] == pytest.approx(alpha, rel=1e-9, abs=1e-15)
+        assert stats['r_squared'][j] == pytest.approx(r_squared, rel=1e-12)
+        assert stats['observations'][j] == observations
+
+
+def test_too_few_observations_give_nan():
+    stats = calculate_betas(np.array([[0.01, np.nan], [0.02, np.nan], [0.03, 0.01]]), [0.01, 0.02, 0.02])
+    assert stats['observations'].tolist() == [3, 1]
+    assert not np.isnan(stats['beta'][0]) and np.isnan(stats['beta'][1])
+
+
+@pytest.mark.parametrize("name,universe", parity_universes())
+def test_compute_betas_matches_compute_beta(name, universe):
+    start_date, end_date = date_window(universe)
+    with fixture_upstream(api, universe):
+        spy_monthly = api.benchmark_cache.window("SPY", start_date, end_date)
+        frames = {symbol: api.compute_monthly_returns(api.datapull(symbol, start_date, end_date))
+                  for symbol in stock_symbols(universe)}
+    # One ticker listed late, so the matrix has missing months
+    late = stock_symbols(universe)[-1]
+    frames[late] = frames[late].iloc[18:].reset_index(drop=True)
+
+    betas = api.compute_betas(frames, spy_monthly)
+    for symbol, df in frames.items():
+        beta, spy_returns = api.compute_beta(df, start_date, end_date, spy_monthly)
+        stats, matrix_spy_returns = betas[symbol]
+        assert stats['beta'] == pytest.approx(beta, rel=1e-12), symbol
+        assert matrix_spy_returns.tolist() == spy_returns.tolist()
+
+
+@pytest.fixture
+def client():
+    with fixture_upstream(api, bundled_universe()), TestClient(api.app) as client:
+        yield client
+
+
+def test_beta_endpoint_matches_batch_betas(client):
+    start_date, end_date = date_window(bundled_universe())
+    body = dict(tickers=["MSFT", "NFLX", "NVDA", "MISSING"], start_date=start_date, end_date=end_date)
+    batch = client.post("/analytics/batch", json=body).json()["results"]
+    betas = client.post("/analytics/beta", json=body).json()["results"]
+    for entry, beta in zip(batch, betas):
+        assert beta["ticker"] == entry["ticker"] and beta["status"] == entry["status"]
+        if entry["status"] == "ok":
+            assert_close(beta["beta"], entry["result"]["beta"], entry["ticker"])
@@ -0,0 +1,53 @@
+"""
+Bootstrap interval checks
+
+The seed reported with the intervals must fit a signed 64-bit integer and
+reproduce the same intervals when passed back as bootstrap_seed.
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import financial_analytics_api as api
+from assets.bootstrap import bootstrap_beta_wacc, bootstrap_chunks
+from benchmarks.fixtures import bundled_universe, date_window, fixture_upstream
+
+
+@pytest.fixture
+def client():
+    with fixture_upstream(api, bundled_universe()), TestClient(api.app) as client:
+        yield client
+
+
+def run_body(**fields):
+    start_date, end_date = date_window(bundled_universe())
+    return dict(ticker="MSFT", start_date=start_date, end_date=end_date, persist=False, bootstrap=300, **fields)
+
+
+def test_reported_seed_reproduces_intervals(client):
+    first = client.post("/analytics/run", json=run_body()).json()["bootstrap"]
+    assert 0 <= first["seed"] < 2**63
+
+    replay = client.post("/analytics/run", json=run_body(bootstrap_seed=first["seed"])).json()["bootstrap"]
+    assert replay == first
+
+
+def test_oversized_seed_is_rejected(client):
+    assert client.post("/analytics/run", json=run_body(bootstrap_seed=2**63)).status_code == 422
+
+
+def test_chunks_depend_only_on_seed():
+    rng = np.random.default_rng(3)
+    market = rng.normal(0.01, 0.04, 48)
+    stock = 1.1 * market + rng.normal(0, 0.02, 48)
+
+    def draws(seed, chunk_size):
+        seed, chunks = bootstrap_chunks(1000, seed, chunk_size)
+        return seed, np.concatenate([bootstrap_beta_wacc(stock, market, size, chunk_seed)['beta']
+                                     for chunk_seed, size in chunks])
+
+    seed, betas = draws(None, 250)
+    assert 0 <= seed < 2**63
+    np.testing.assert_array_equal(draws(seed, 250)[1], betas)
+    assert sum(size for _, size in bootstrap_chunks(1000, seed, 300)[1]) == 1000
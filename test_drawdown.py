@@ -0,0 +1,65 @@
+"""
+Drawdown kernel checks
+
+compute_max_drawdown runs the single-pass kernel from assets/mdd.py; it must
+reproduce the original rebase / expanding-max implementation and report
+the peak, trough, recovery and episode statistics of the same curve.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import financial_analytics_api as api
+from assets.mdd import calculate_drawdown_statistics
+from benchmarks.fixtures import RTOL, parity_universes
+
+
+def baseline_max_drawdown(df):
+    """The original pandas implementation"""
+    prices = df['close']
+    rebase = (1 + prices.pct_change().fillna(0)).cumprod() * 100
+    peak = rebase.expanding().max()
+    drawdown = ((rebase - peak) / peak) * 100
+    df = df.copy()
+    df['monthly_return'] = prices.pct_change()
+    df['rebase_100'] = rebase
+    df['rolling_max'] = peak
+    df['drawdown'] = drawdown / 100
+    return df, drawdown.min()
+
+
+@pytest.mark.parametrize("name,universe", parity_universes())
+def test_drawdown_kernel_matches_pandas(name, universe):
+    for symbol, df in universe.items():
+        monthly_df = api.compute_monthly_returns(df)
+        enhanced_df, max_drawdown = api.compute_max_drawdown(monthly_df)
+        expected_df, expected_max_drawdown = baseline_max_drawdown(monthly_df)
+        pd.testing.assert_frame_equal(enhanced_df, expected_df, rtol=RTOL)
+        assert max_drawdown == pytest.approx(expected_max_drawdown, rel=RTOL)
+
+
+def test_drawdown_statistics():
+    prices = [100, 120, 90, 60, 130, 110, 120]
+    stats = calculate_drawdown_statistics(prices, top_n=5)
+
+    assert stats['max_drawdown'] == pytest.approx(-50.0)
+    assert (stats['peak_index'], stats['trough_index'], stats['recovery_index']) == (1, 3, 4)
+    assert stats['time_under_water'] == 2
+    assert [(e['peak_index'], e['trough_index'], e['recovery_index'], e['duration']) for e in stats['episodes']] == \
+        [(1, 3, 4, 3), (4, 5, None, 2)]
+    assert stats['episodes'][1]['depth'] == pytest.approx((110 / 130 - 1) * 100)
+
+
+def test_drawdown_statistics_by_column():
+    prices = np.array([[100, 100], [80, 110], [np.nan, 120], [100, 90]])
+    stats = calculate_drawdown_statistics(prices)
+
+    for j in range(prices.shape[1]):
+        column = calculate_drawdown_statistics(prices[:, j])
+        np.testing.assert_allclose(stats['drawdown'][:, j], column['drawdown'], rtol=RTOL)
+        assert stats['max_drawdown'][j] == column['max_drawdown']
+        assert stats['recovery_index'][j] == column['recovery_index']
+        assert stats['episodes'][j] == column['episodes']
+    assert stats['recovery_index'] == [3, None]
+    assert stats['time_under_water'].tolist() == [2, 1]
@@ -0,0 +1,59 @@
+"""
+Execution checks
+
+Blocking calls run on the I/O and CPU executors so the event loop keeps
+serving; both executors and the artifact writer come back after an app
+shutdown/startup cycle.
+"""
+
+import asyncio
+import os
+import time
+
+from fastapi.testclient import TestClient
+
+import financial_analytics_api as api
+from benchmarks.fixtures import bundled_universe, date_window, fixture_upstream
+from metrics import stage, start_request_timings
+from result_cache import ResultCache
+
+
+def test_blocking_work_does_not_stall_the_loop():
+    async def main():
+        started = time.perf_counter()
+        slow = asyncio.gather(api.run_io(time.sleep, 0.3), api.run_cpu(time.sleep, 0.3))
+        await asyncio.sleep(0.01)  # Scheduled while both sleeps are running
+        ticked = time.perf_counter() - started
+        await slow
+        return ticked
+
+    assert asyncio.run(main()) < 0.2
+
+
+def test_stage_timings_reach_the_request_record():
+    def timed_step():
+        with stage("fetch"):
+            time.sleep(0.01)
+
+    async def main():
+        timings = start_request_timings()
+        await api.run_io(timed_step)
+        return timings
+
+    assert asyncio.run(main())["fetch"] >= 0.01
+
+
+def test_app_serves_again_after_restart(monkeypatch, tmp_path):
+    universe = bundled_universe()
+    start_date, end_date = date_window(universe)
+    monkeypatch.setattr(api, "ANALYTICS_OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(api, "result_cache", ResultCache(max_entries=0))
+    body = dict(ticker="MSFT", start_date=start_date, end_date=end_date)
+
+    with fixture_upstream(api, universe):
+        for _ in range(2):
+            with TestClient(api.app) as client:
+                assert client.post("/analytics/run", json=body).status_code == 200
+                api.artifact_writer.flush()
+
+    assert len(os.listdir(tmp_path)) == 2
@@ -0,0 +1,51 @@
+"""
+Dashboard checks
+
+The Streamlit page is run headless with its API calls routed to the app
+in-process; it must get its frames from one non-persisting Arrow request.
+"""
+
+import os
+from unittest import mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+import financial_analytics_api as api
+from benchmarks.fixtures import bundled_universe, fixture_upstream
+
+# The dashboard's own dependencies (streamlit, plotly) are not in requirements.txt
+AppTest = pytest.importorskip("streamlit.testing.v1").AppTest
+pytest.importorskip("plotly")
+
+PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "firstpage.py")
+
+
+@pytest.fixture
+def posted():
+    """Requests the page sends, answered by the API"""
+    calls = []
+    with fixture_upstream(api, bundled_universe()), TestClient(api.app) as client:
+        def post(url, json=None, headers=None, timeout=None):
+            calls.append({"url": url, "json": json, "headers": headers})
+            return client.post(url.removeprefix(os.getenv("ANALYTICS_API_URL", "http://localhost:8000")),
+                               json=json, headers=headers)
+
+        with mock.patch("requests.post", post):
+            yield calls
+
+
+def test_page_loads_analytics_without_persisting(posted):
+    page = AppTest.from_file(PAGE, default_timeout=60).run()
+
+    assert not page.exception
+    assert not page.error
+    [call] = posted
+    assert call["url"].endswith("/analytics/run")
+    assert call["json"]["ticker"] == "MSFT" and call["json"]["persist"] is False
+    assert call["headers"]["Accept"] == api.ARROW_STREAM_MEDIA_TYPE
+
+    page.button[0].click().run()
+    assert not page.exception
+    assert not page.error
+    assert len(posted) == 1  # The rerun is served from st.cache_data
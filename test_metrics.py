@@ -0,0 +1,83 @@
+"""
+/metrics and Server-Timing checks
+
+Requests must show up in the Prometheus exposition as request and stage
+histograms and cache / error counters; with SERVER_TIMING on, responses
+carry their stage durations.
+"""
+
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+import financial_analytics_api as api
+from benchmarks.fixtures import bundled_universe, date_window, fixture_upstream
+from metrics import MetricsRegistry
+
+
+@pytest.fixture
+def client():
+    with fixture_upstream(api, bundled_universe()), TestClient(api.app) as client:
+        yield client
+
+
+def scrape(client):
+    """{'name{labels}': value} from /metrics"""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    return {sample: float(value) for sample, value in
+            (line.rsplit(" ", 1) for line in response.text.splitlines() if not line.startswith("#"))}
+
+
+def delta(before, after, sample):
+    return after.get(sample, 0.0) - before.get(sample, 0.0)
+
+
+def test_requests_are_counted(client):
+    start_date, end_date = date_window(bundled_universe())
+    body = dict(ticker="MSFT", start_date=start_date, end_date=end_date, persist=False, curve_points=37)
+    before = scrape(client)
+    assert client.post("/analytics/run", json=body).status_code == 200
+    assert client.post("/analytics/run", json=body).status_code == 200
+    assert client.post("/analytics/run", json=dict(body, ticker="MISSING")).status_code == 500
+    after = scrape(client)
+
+    run = 'analytics_request_duration_seconds_count{endpoint="/analytics/run",status="%s"}'
+    assert delta(before, after, run % 200) == 2
+    assert delta(before, after, run % 500) == 1
+    assert delta(before, after, 'analytics_cache_requests_total{cache="result",result="miss"}') == 2
+    assert delta(before, after, 'analytics_cache_requests_total{cache="result",result="hit"}') == 1
+    assert delta(before, after, 'analytics_stage_duration_seconds_count{stage="fetch"}') == 2
+    assert delta(before, after, 'analytics_stage_duration_seconds_count{stage="beta"}') == 1
+    assert delta(before, after, 'analytics_errors_total{endpoint="/analytics/run",error="ValueError"}') == 1
+
+
+def test_server_timing_header(client, monkeypatch):
+    start_date, end_date = date_window(bundled_universe())
+    body = dict(ticker="NVDA", start_date=start_date, end_date=end_date, persist=False, curve_points=41)
+    assert "server-timing" not in client.post("/analytics/run", json=body).headers
+
+    monkeypatch.setattr(api, "SERVER_TIMING", True)
+    header = client.post("/analytics/run", json=dict(body, curve_points=43)).headers["server-timing"]
+    entries = dict(re.fullmatch(r"(\w+);dur=([\d.]+)", entry).groups() for entry in header.split(", "))
+    assert {"fetch", "beta", "serialize", "total"} <= set(entries)
+    assert float(entries["total"]) >= float(entries["fetch"])
+
+
+def test_histogram_exposition():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, path='a"b')
+    registry.counter("calls_total", "Calls").inc(3)
+
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{path="a\\"b",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{path="a\\"b",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{path="a\\"b",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{path="a\\"b"} 3' in lines
+    assert "calls_total 3" in lines and "# TYPE latency_seconds histogram" in lines
+    with pytest.raises(ValueError):
+        registry.counter("latency_seconds", "Not a counter")
@@ -0,0 +1,61 @@
+"""
+NDJSON output checks
+
+Accept: application/x-ndjson must carry the same analytics as the JSON
+body, one line per ticker, for every value a response can hold.
+"""
+
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import financial_analytics_api as api
+from benchmarks.fixtures import assert_close, bundled_universe, date_window, fixture_upstream
+
+NDJSON = {"accept": api.NDJSON_MEDIA_TYPE}
+
+
+@pytest.fixture
+def client():
+    with fixture_upstream(api, bundled_universe()), TestClient(api.app) as client:
+        yield client
+
+
+def window_body(**fields):
+    start_date, end_date = date_window(bundled_universe())
+    return dict(start_date=start_date, end_date=end_date, persist=False, **fields)
+
+
+def ndjson_lines(response):
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(api.NDJSON_MEDIA_TYPE)
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_unseeded_bootstrap_streams(client):
+    body = window_body(ticker="MSFT", bootstrap=200)
+    [line] = ndjson_lines(client.post("/analytics/run", json=body, headers=NDJSON))
+
+    seeded = window_body(ticker="MSFT", bootstrap=200, bootstrap_seed=line["bootstrap"]["seed"])
+    assert_close(line, client.post("/analytics/run", json=seeded).json())
+
+
+def test_batch_streams_one_line_per_ticker(client):
+    body = window_body(tickers=["MSFT", "MISSING"])
+    lines = ndjson_lines(client.post("/analytics/batch", json=body, headers=NDJSON))
+    expected = client.post("/analytics/batch", json=body).json()["results"]
+
+    assert sorted(line["ticker"] for line in lines) == ["MISSING", "MSFT"]
+    for line in lines:
+        assert_close(line, next(r for r in expected if r["ticker"] == line["ticker"]), line["ticker"])
+
+
+def test_ndjson_line_encodes_any_value():
+    values = {"big": 2**64, "scalar": np.float64(0.5), "array": np.arange(3), "nan": float("nan")}
+    line = api.ndjson_line(api.BatchTickerResult.model_construct(ticker="X", status="ok", result=values))
+
+    assert line.endswith(b"\n") and line.count(b"\n") == 1
+    assert json.loads(line)["result"]["big"] == 2**64
+    assert json.loads(line)["result"]["array"] == [0, 1, 2]
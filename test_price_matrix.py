@@ -0,0 +1,81 @@
+"""
+Price matrix checks
+
+Slices are read-only views of the mapped files, appends become visible to
+open readers only once committed, and analytics served from the matrix
+equal the ones pulled through the upstream / store path.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import financial_analytics_api as api
+from benchmarks.fixtures import assert_close, bundled_universe, date_window, fixture_upstream
+from price_matrix import PriceMatrix
+
+
+def bars(dates, closes):
+    return pd.DataFrame({"datetime": pd.to_datetime(dates), "close": closes})
+
+
+def test_slices_are_views_of_the_mapped_columns(tmp_path):
+    matrix = PriceMatrix.create(str(tmp_path), {
+        "AAA": bars(["2024-01-01", "2024-02-01", "2024-03-01", "2024-04-01"], [1.0, 2.0, 3.0, 4.0]),
+        "LATE": bars(["2024-03-01", "2024-04-01"], [30.0, 40.0]),
+        "GAPS": bars(["2024-01-01", "2024-04-01"], [5.0, 8.0]),
+    })
+    assert matrix.symbols == ["AAA", "GAPS", "LATE"] and len(matrix) == 4
+
+    window = matrix.slice("AAA", "2024-02-01", "2024-03-31")
+    assert window.close.tolist() == [2.0, 3.0]
+    assert not window.close.flags.writeable and isinstance(window.close.base, np.memmap)
+
+    late = matrix.slice("LATE")  # Rows before the listing are trimmed, still a view
+    assert list(pd.DatetimeIndex(late.dates)) == list(pd.to_datetime(["2024-03-01", "2024-04-01"]))
+    assert isinstance(late.close.base, np.memmap)
+    assert matrix.slice("GAPS").close.tolist() == [5.0, 8.0]
+    assert matrix.slice("MISSING") is None
+
+
+def test_append_and_recreate(tmp_path):
+    directory = str(tmp_path)
+    PriceMatrix.create(directory, {"AAA": bars(["2024-01-01"], [1.0]), "BBB": bars(["2024-01-01"], [2.0])})
+    reader = PriceMatrix(directory)
+    assert len(reader) == 1
+
+    writer = PriceMatrix(directory)
+    assert writer.append({"AAA": bars(["2024-02-01"], [1.5])}) == 1
+    assert len(reader) == 2
+    assert reader.slice("AAA").close.tolist() == [1.0, 1.5]
+    assert reader.slice("BBB").close.tolist() == [2.0]
+
+    with pytest.raises(ValueError):
+        writer.append({"AAA": bars(["2024-02-01"], [9.0])})  # Not after the last row
+    with pytest.raises(ValueError):
+        writer.append({"CCC": bars(["2024-03-01"], [9.0])})  # Needs a new generation
+
+    PriceMatrix.create(directory, {"CCC": bars(["2024-03-01"], [9.0])})
+    assert reader.symbols == ["CCC"]
+    assert sorted(os.listdir(directory)) == ["close-2.f64", "dates-2.i8", "meta.json"]
+
+
+def test_run_from_matrix_matches_upstream(tmp_path, monkeypatch):
+    universe = bundled_universe()
+    start_date, end_date = date_window(universe)
+    body = dict(ticker="NFLX", start_date=start_date, end_date=end_date, persist=False)
+
+    with fixture_upstream(api, universe) as upstream, TestClient(api.app) as client:
+        api.result_cache.clear()
+        expected = client.post("/analytics/run", json=body).json()
+
+        monkeypatch.setattr(api, "price_matrix", PriceMatrix.create(str(tmp_path), universe))
+        api.result_cache.clear()
+        upstream.calls = 0
+        from_matrix = client.post("/analytics/run", json=body).json()
+        assert upstream.calls == 0  # Stock and benchmark both came from the matrix
+
+    assert_close(from_matrix, expected)
@@ -0,0 +1,81 @@
+"""
+Price store checks
+
+A StockDataPuller backed by the store only asks upstream for the ranges it
+has not fetched yet; the fixture upstream counts those calls.
+"""
+
+import pandas as pd
+
+from benchmarks.fixtures import FixtureStockDataPuller, load_bundled, synthetic_universe
+from data_pull import StockDataPuller
+from price_store import PriceStore
+
+
+def fixture_puller(store, universe):
+    FixtureStockDataPuller.universe = universe
+    FixtureStockDataPuller.calls = 0
+    return FixtureStockDataPuller("test-key", store=store, client=object())
+
+
+def test_second_pull_is_served_from_store(tmp_path):
+    universe = synthetic_universe(1, 72, start="2019-12-01")
+    puller = fixture_puller(PriceStore(str(tmp_path)), universe)
+
+    # The store-backed path of the real puller, with the fixture as its upstream
+    first = StockDataPuller.get_monthly_data(puller, "SYN0000")
+    assert FixtureStockDataPuller.calls == 1
+    second = StockDataPuller.get_monthly_data(puller, "SYN0000")
+    assert FixtureStockDataPuller.calls == 1
+
+    pd.testing.assert_frame_equal(second.reset_index(drop=True), first.reset_index(drop=True))
+    expected = universe["SYN0000"]
+    expected = expected[expected["datetime"] <= pd.Timestamp(puller.END_DATE)]
+    assert first["close"].tolist() == expected["close"].tolist()
+
+
+def test_missing_ranges_only_cover_unfetched_dates(tmp_path):
+    store = PriceStore(str(tmp_path))
+    assert store.missing_ranges("MSFT", "1month", "2020-01-01", "2020-12-31") == \
+        [(pd.Timestamp("2020-01-01"), pd.Timestamp("2020-12-31"))]
+
+    bars = pd.DataFrame({"datetime": pd.date_range("2020-01-01", periods=12, freq="MS"), "close": range(12)})
+    store.append("MSFT", "1month", bars, "2020-01-01", "2020-12-31")
+    assert store.missing_ranges("MSFT", "1month", "2020-03-01", "2020-09-30") == []
+    assert store.missing_ranges("MSFT", "1month", "2019-12-01", "2021-03-31") == [
+        (pd.Timestamp("2019-12-01"), pd.Timestamp("2019-12-31")),
+        (pd.Timestamp("2021-01-01"), pd.Timestamp("2021-03-31")),
+    ]
+
+
+def test_revision_changes_only_when_history_is_rewritten(tmp_path):
+    store = PriceStore(str(tmp_path))
+    months = pd.date_range("2020-01-01", periods=3, freq="MS")
+    store.append("MSFT", "1month", pd.DataFrame({"datetime": months, "close": [1.0, 2.0, 3.0]}),
+                 "2020-01-01", "2020-03-31")
+    assert store.revision("MSFT", "1month") == 0
+
+    # Appending past the covered end keeps the revision
+    store.append("MSFT", "1month", pd.DataFrame({"datetime": [pd.Timestamp("2020-04-01")], "close": [4.0]}),
+                 "2020-04-01", "2020-04-30")
+    assert store.revision("MSFT", "1month") == 0
+
+    # Correcting a stored bar bumps it
+    store.append("MSFT", "1month", pd.DataFrame({"datetime": [pd.Timestamp("2020-02-01")], "close": [2.5]}),
+                 "2020-02-01", "2020-02-29")
+    assert store.revision("MSFT", "1month") == 1
+    assert store.load("MSFT", "1month")["close"].tolist() == [1.0, 2.5, 3.0, 4.0]
+
+
+def test_import_csv_round_trip(tmp_path):
+    store = PriceStore(str(tmp_path))
+    bundled = load_bundled("MSFT")
+    path = tmp_path / "MSFT_monthly.csv"
+    bundled.to_csv(path, index=False)
+
+    symbol, count = store.import_csv(str(path))
+    assert (symbol, count) == ("MSFT", len(bundled))
+    assert store.coverage("MSFT", "1month")[1] == bundled["datetime"].max() + pd.offsets.MonthEnd(0)
+    loaded = store.load("MSFT", "1month")
+    assert loaded["close"].tolist() == bundled["close"].tolist()
+    assert store.symbols("1month") == ["MSFT"]
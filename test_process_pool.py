@@ -0,0 +1,96 @@
+"""
+Process pool checks
+
+CPU_EXECUTOR=process must give the same responses as the thread executor,
+with arrays handed to the workers through shared memory.
+"""
+
+import asyncio
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import financial_analytics_api as api
+from arrow_ipc import read_tables
+from benchmarks.fixtures import (
+    RTOL, assert_close, date_window, fixture_upstream, stock_symbols, synthetic_universe
+)
+from process_pool import AnalyticsProcessPool, SharedArrays, _sum_chunk, attach, chunk_ranges
+
+
+@pytest.fixture(scope="module")
+def process_pool():
+    pool = AnalyticsProcessPool(max_workers=2)
+    yield pool
+    pool.shutdown()
+
+
+def with_executor(monkeypatch, pool, func, *args):
+    """Await an API stage with `pool` as the process pool (None: thread executor)"""
+    monkeypatch.setattr(api, "process_pool", pool)
+    monkeypatch.setattr(api, "BATCH_CHUNK_SIZE", 2)
+    monkeypatch.setattr(api, "SENSITIVITY_CHUNK_SIZE", 20)
+    return asyncio.run(func(*args))
+
+
+def test_process_pool_matches_thread_executor(monkeypatch, process_pool):
+    universe = synthetic_universe(7, 120, seed=5)
+    start_date, end_date = date_window(universe)
+    tickers = stock_symbols(universe) + ["MISSING"]
+    with fixture_upstream(api, universe):
+        spy_monthly = api.benchmark_cache.window("SPY", start_date, end_date)
+        fetched = [api._fetch_one(ticker, start_date, end_date) for ticker in tickers]
+        stock_df = api.datapull(tickers[0], start_date, end_date)
+
+    sweep = dict(tax_rates=np.linspace(0.1, 0.4, 4), risk_free_rates=np.linspace(0, 0.06, 7),
+                 de_ratios=np.linspace(0, 1, 11))
+    results = {}
+    for mode, pool in (("thread", None), ("process", process_pool)):
+        batch = with_executor(monkeypatch, pool, api.compute_batch_stage, tickers, fetched, spy_monthly, "json")
+        beta = with_executor(monkeypatch, pool, api.compute_batch_stage, tickers, fetched, spy_monthly, "beta")
+        arrow = with_executor(monkeypatch, pool, api.compute_batch_stage, tickers, fetched, spy_monthly, "arrow")
+        sensitivity = with_executor(monkeypatch, pool, api.compute_sensitivity_stage, tickers[0], stock_df,
+                                    start_date, end_date, spy_monthly, *sweep.values(), 100)
+        enhanced_df, *_ = api.prepare_ticker_returns(stock_df)
+        bootstrap = with_executor(monkeypatch, pool, api.compute_bootstrap_summary, tickers[0], enhanced_df,
+                                  spy_monthly, 1000, 7)
+        results[mode] = {
+            'batch': [result.model_dump() for result in batch],
+            'beta': [result.model_dump() for result in beta],
+            'arrow': read_tables(arrow),
+            'sensitivity': sensitivity.model_dump(),
+            'bootstrap': bootstrap.model_dump(),
+        }
+
+    thread, process = results["thread"], results["process"]
+    assert thread['batch'][-1]['status'] == "error"
+    for key in ('batch', 'beta', 'sensitivity', 'bootstrap'):
+        assert_close(process[key], thread[key], key)
+    for name, table in thread['arrow'].items():
+        pd.testing.assert_frame_equal(process['arrow'][name], table, rtol=RTOL)
+
+
+def test_chunk_ranges_cover_every_item():
+    assert chunk_ranges(0, workers=4) == []
+    assert chunk_ranges(10, workers=4) == [(0, 3), (3, 6), (6, 9), (9, 10)]
+    assert chunk_ranges(10, chunk_size=4, workers=2) == [(0, 4), (4, 8), (8, 10)]
+    assert chunk_ranges(3, workers=8) == [(0, 1), (1, 2), (2, 3)]
+
+
+def test_shared_arrays_reach_the_workers(process_pool):
+    values = np.arange(10_000, dtype=float)
+
+    async def partial_sums(handle):
+        return await process_pool.map_chunks(_sum_chunk, chunk_ranges(len(values), workers=3), handle)
+
+    with SharedArrays({'values': values, 'labels': np.array(["a", "bc"])}) as handle:
+        assert sum(asyncio.run(partial_sums(handle))) == values.sum()
+        with attach(handle) as arrays:
+            assert arrays['labels'].tolist() == ["a", "bc"]
+            assert not arrays['values'].flags.writeable
+
+    # The creating process unlinks the block when the with block ends
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=handle.name)
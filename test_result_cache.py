@@ -0,0 +1,114 @@
+"""
+Result cache checks
+
+Entries expire by TTL and by data stamp, the LRU stays within its entry and
+byte limits, the SQLite backend is shared between caches, and the API only
+touches the backend off the event loop.
+"""
+
+import asyncio
+import threading
+import time
+
+from starlette.requests import Request
+
+import financial_analytics_api as api
+from benchmarks.fixtures import bundled_universe, date_window, fixture_upstream
+from result_cache import ResultCache, SQLiteResultBackend
+
+
+class RecordingBackend:
+    """In-memory backend that records which thread each call ran on"""
+
+    def __init__(self):
+        self.results = {}
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.current_thread().name)
+        return self.results.get(key)
+
+    def set(self, key, result):
+        self.threads.append(threading.current_thread().name)
+        self.results[key] = result
+
+
+def test_result_cache_backend_runs_off_event_loop(monkeypatch):
+    universe = bundled_universe()
+    start_date, end_date = date_window(universe)
+    backend = RecordingBackend()
+    monkeypatch.setattr(api, "result_cache", ResultCache(backend=backend))
+    request = api.AnalyticsRequest(ticker="MSFT", start_date=start_date, end_date=end_date, persist=False)
+    http_request = Request({"type": "http", "headers": []})
+
+    async def run_twice():
+        first = await api.run_financial_analytics(request, http_request)
+        api.result_cache._entries.clear()  # Second call has to come from the backend
+        second = await api.run_financial_analytics(request, http_request)
+        return first, second, threading.current_thread().name
+
+    with fixture_upstream(api, universe):
+        first, second, loop_thread = asyncio.run(run_twice())
+
+    assert second.body == first.body
+    assert len(backend.threads) == 3  # miss, write, hit
+    assert loop_thread not in backend.threads
+
+
+def test_entries_expire_by_ttl_and_data_stamp():
+    cache = ResultCache(ttl_seconds=0.2)
+    cache.put("key", b"body", "application/json", data_stamp=100.0)
+
+    assert cache.get("key", data_stamp=100.0).body == b"body"
+    assert cache.get("key", data_stamp=99.0) is not None
+    assert cache.get("key", data_stamp=101.0) is None  # Benchmark refreshed after the entry was computed
+    assert len(cache) == 0
+
+    cache.put("key", b"body", "application/json")
+    time.sleep(0.25)
+    assert cache.get("key") is None
+
+
+def test_lru_limits_entries_and_bytes():
+    cache = ResultCache(max_entries=2, max_bytes=10)
+    for key in "abc":
+        cache.put(key, b"123", "application/json")
+    assert cache.get("a") is None and len(cache) == 2
+
+    cache.get("b")  # Most recently used survives the next eviction
+    cache.put("d", b"1234", "application/json")
+    assert cache.get("b") is not None and cache.get("c") is None
+    cache.put("e", b"12345678901", "application/json")  # Larger than max_bytes: not kept
+    assert cache.get("e") is None and len(cache) == 2
+
+
+def test_sqlite_backend_is_shared(tmp_path):
+    backend = SQLiteResultBackend(str(tmp_path / "results" / "cache.db"))
+    writer = ResultCache(backend=backend)
+    reader = ResultCache(backend=SQLiteResultBackend(backend.path))
+
+    writer.put("key", b"body", "application/x-ndjson", data_stamp=5.0)
+    result = reader.get("key", data_stamp=5.0)
+    assert (result.body, result.media_type) == (b"body", "application/x-ndjson")
+    assert reader.get_local("key", data_stamp=5.0) is not None  # Copied into the local LRU
+
+    expired = ResultCache(ttl_seconds=-1, backend=backend)
+    expired.put("old", b"body", "application/json")
+    assert backend.get("old") is None
+
+    writer.clear()
+    assert ResultCache(backend=backend).get("key") is None
+
+
+def cache_key(output="json", **fields):
+    request = api.AnalyticsRequest(**{"ticker": "MSFT", "start_date": "2020-01-01", "end_date": "2024-12-31",
+                                      **fields})
+    return api.result_cache_key(request, "MSFT", output)
+
+
+def test_cache_key_normalizes_request():
+    assert cache_key(start_date="2020-01-01T00:00:00") == cache_key()
+    assert cache_key(persist=False) != cache_key()
+    assert cache_key("arrow") != cache_key()
+    assert cache_key(bootstrap=100) is None  # Unseeded intervals are not reproducible
+    assert cache_key(bootstrap=100, bootstrap_seed=1) != cache_key(bootstrap=100, bootstrap_seed=2)
@@ -0,0 +1,57 @@
+"""
+Monthly returns checks
+
+compute_monthly_returns takes a NumPy fast path for one bar per consecutive
+month and falls back to resampling otherwise; both must give the rows the
+original resample('M').last() + pct_change() implementation gave.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import financial_analytics_api as api
+from assets.returns import is_consecutive_monthly, month_end_labels
+from benchmarks.fixtures import RTOL, parity_universes, synthetic_universe
+
+
+def baseline_monthly_returns(df):
+    """The original resampling implementation"""
+    df = df.copy()
+    df['datetime'] = pd.to_datetime(df['datetime'])
+    df.set_index('datetime', inplace=True)
+    monthly_df = df.resample('M').last()
+    monthly_df['monthly_return'] = monthly_df['close'].pct_change()
+    return monthly_df.reset_index().dropna(subset=['monthly_return'])
+
+
+@pytest.mark.parametrize("name,universe", parity_universes())
+def test_monthly_returns_fast_path_matches_resample(name, universe):
+    for symbol, df in universe.items():
+        pd.testing.assert_frame_equal(api.compute_monthly_returns(df), baseline_monthly_returns(df),
+                                      check_dtype=False, rtol=RTOL)
+
+
+def irregular_inputs():
+    monthly = synthetic_universe(1, 36)["SYN0000"]
+    gap = monthly.drop(index=[10, 11]).reset_index(drop=True)
+    missing_close = monthly.copy()
+    missing_close.loc[5, 'close'] = np.nan
+    days = pd.date_range("2020-01-01", "2021-12-31", freq="B")
+    daily = pd.DataFrame({'datetime': days, 'close': 100 * np.cumprod(1 + np.sin(np.arange(len(days))) / 100)})
+    return [("gap", gap), ("missing_close", missing_close), ("daily", daily)]
+
+
+@pytest.mark.parametrize("name,df", irregular_inputs())
+def test_irregular_input_falls_back_to_resample(name, df):
+    pd.testing.assert_frame_equal(api.compute_monthly_returns(df), baseline_monthly_returns(df),
+                                  check_dtype=False, rtol=RTOL)
+
+
+def test_month_helpers():
+    dates = np.array(['2024-01-01', '2024-02-15', '2024-03-31'], dtype='datetime64[ns]')
+    assert is_consecutive_monthly(dates)
+    assert not is_consecutive_monthly(dates[[0, 2]])
+    assert not is_consecutive_monthly(dates[:0])
+    np.testing.assert_array_equal(month_end_labels(dates),
+                                  np.array(['2024-01-31', '2024-02-29', '2024-03-31'], dtype='datetime64[ns]'))
@@ -0,0 +1,69 @@
+"""
+Rolling beta and drawdown checks
+
+The rolling maximum drawdown is compared with a direct scan of every
+window; the endpoint is exercised through its dedicated request model.
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import financial_analytics_api as api
+from assets.beta import calculate_betas
+from assets.mdd import calculate_rolling_drawdown
+from benchmarks.fixtures import RTOL, bundled_universe, date_window, fixture_upstream, parity_universes
+
+
+def baseline_rolling_max_drawdown(rebase, window):
+    """Maximum drawdown of each trailing window, measured from the peak inside it"""
+    result = []
+    for end in range(len(rebase)):
+        in_window = rebase[max(0, end - window + 1):end + 1]
+        peak = np.maximum.accumulate(in_window)
+        result.append(((in_window - peak) / peak).min() * 100)
+    return np.array(result)
+
+
+@pytest.mark.parametrize("name,universe", parity_universes())
+@pytest.mark.parametrize("window", [1, 2, 12, 36])
+def test_rolling_max_drawdown_matches_window_scan(name, universe, window):
+    for symbol, df in universe.items():
+        drawdown_df = calculate_rolling_drawdown(df['close'], window)
+        expected = baseline_rolling_max_drawdown(drawdown_df['Rebase'].to_numpy(), window)
+        np.testing.assert_allclose(drawdown_df['Rolling Max Drawdown'].to_numpy(), expected, rtol=RTOL, atol=1e-12)
+
+
+@pytest.fixture
+def client():
+    with fixture_upstream(api, bundled_universe()), TestClient(api.app) as client:
+        yield client
+
+
+def rolling_body(**fields):
+    start_date, end_date = date_window(bundled_universe())
+    return dict(ticker="MSFT", start_date=start_date, end_date=end_date, **fields)
+
+
+def test_rolling_endpoint_uses_window_from_body(client):
+    response = client.post("/analytics/rolling", json=rolling_body(window=12))
+    assert response.status_code == 200
+    body = response.json()
+    assert body["window"] == 12
+    assert len(body["dates"]) == len(body["rolling_beta"]) == len(body["rolling_max_drawdown"])
+
+    # First full window of returns: same beta as calculate_betas over those 12 months
+    start_date, end_date = date_window(bundled_universe())
+    enhanced_df, *_ = api.prepare_ticker_returns(api.datapull("MSFT", start_date, end_date))
+    merged = api.align_with_benchmark(enhanced_df, api.benchmark_cache.window("SPY", start_date, end_date))
+    first = calculate_betas(merged['monthly_return_stock'][:12], merged['monthly_return_spy'][:12])['beta'][0]
+    assert next(beta for beta in body["rolling_beta"] if beta is not None) == pytest.approx(first, rel=1e-9)
+
+@pytest.mark.parametrize("field", [dict(bootstrap=100), dict(persist=False), dict(curve_points=10),
+                                   dict(optimizer="refine")])
+def test_rolling_endpoint_rejects_unrelated_fields(client, field):
+    assert client.post("/analytics/rolling", json=rolling_body(**field)).status_code == 422
+
+
+def test_rolling_window_must_cover_two_months(client):
+    assert client.post("/analytics/rolling", json=rolling_body(window=1)).status_code == 422
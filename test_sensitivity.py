@@ -0,0 +1,70 @@
+"""
+/analytics/sensitivity checks
+
+Every grid cell must equal a single WACC curve run with that scenario's
+assumptions; grids beyond SENSITIVITY_MAX_POINTS evaluated points and
+assumptions outside their domain are rejected before any data is fetched.
+"""
+
+import itertools
+
+import pytest
+from fastapi.testclient import TestClient
+
+import financial_analytics_api as api
+from assets.wacc import calculate_unlevered_beta, calculate_wacc_curve
+from benchmarks.fixtures import bundled_universe, date_window, fixture_upstream
+
+
+@pytest.fixture
+def client():
+    with fixture_upstream(api, bundled_universe()), TestClient(api.app) as client:
+        yield client
+
+
+def sensitivity_body(**fields):
+    start_date, end_date = date_window(bundled_universe())
+    return dict(ticker="MSFT", start_date=start_date, end_date=end_date, **fields)
+
+
+def test_grid_matches_single_curves(client):
+    body = sensitivity_body(tax_rate={"start": 0.1, "stop": 0.35, "steps": 2},
+                            risk_free_rate={"start": 0.0, "stop": 0.05, "steps": 3},
+                            de_ratio={"start": 0.0, "stop": 1.5, "steps": 2}, curve_points=40)
+    response = client.post("/analytics/sensitivity", json=body)
+    assert response.status_code == 200
+    result = response.json()
+
+    start_date, end_date = date_window(bundled_universe())
+    with fixture_upstream(api, bundled_universe()):
+        beta, spy_returns = api.sensitivity_beta(api.datapull("MSFT", start_date, end_date), start_date, end_date,
+                                                 api.benchmark_cache.window("SPY", start_date, end_date))
+    assert result["beta"] == pytest.approx(beta, rel=1e-12)
+
+    for (i, tax), (j, risk_free), (k, de) in itertools.product(*(enumerate(result[axis]) for axis in result["dims"])):
+        unlevered_beta = calculate_unlevered_beta(beta, de, 1.0, tax)
+        _, optimal_wacc, optimal_debt_ratio = calculate_wacc_curve(unlevered_beta, spy_returns,
+                                                                   api.debt_ratio_grid(40), risk_free, tax)
+        assert result["unlevered_beta"][i][j][k] == pytest.approx(unlevered_beta, rel=1e-12)
+        assert result["optimal_wacc"][i][j][k] == pytest.approx(optimal_wacc, rel=1e-12)
+        assert result["optimal_debt_ratio"][i][j][k] == pytest.approx(optimal_debt_ratio, rel=1e-12)
+
+
+def test_cap_counts_curve_points(client, monkeypatch):
+    monkeypatch.setattr(api, "SENSITIVITY_MAX_POINTS", 1000)
+    body = sensitivity_body(de_ratio={"start": 0.0, "stop": 1.0, "steps": 10})
+
+    response = client.post("/analytics/sensitivity", json=dict(body, curve_points=101))
+    assert response.status_code == 400
+    assert "limit is 1000 points" in response.json()["detail"]
+    assert client.post("/analytics/sensitivity", json=dict(body, curve_points=100)).status_code == 200
+
+
+@pytest.mark.parametrize("field,sweep", [
+    ("tax_rate", {"start": -0.1, "stop": 0.3, "steps": 3}),
+    ("tax_rate", {"start": 0.2, "stop": 1.0, "steps": 3}),
+    ("de_ratio", {"start": -0.5, "stop": 0.5, "steps": 3}),
+])
+def test_out_of_domain_assumptions_are_rejected(client, field, sweep):
+    response = client.post("/analytics/sensitivity", json=sensitivity_body(**{field: sweep}))
+    assert response.status_code == 400
@@ -0,0 +1,160 @@
+"""
+Twelve Data client checks against a local fake upstream
+
+The fake serves the synthetic fixture universe in Twelve Data's
+time_series format (one symbol unwrapped, several keyed by symbol, unknown
+symbols as per-symbol errors) and records every call it receives.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+from benchmarks.fixtures import synthetic_universe
+from td_client import RateLimitError, TokenBucket, TwelveDataClient, TwelveDataError
+
+UNIVERSE = synthetic_universe(4, 24, start="2022-01-01")
+WINDOW = ("2022-01-01", "2023-12-31")
+
+
+class FakeUpstream(BaseHTTPRequestHandler):
+    calls = []  # Symbols of every time_series call, in arrival order
+    delay = 0.0  # Seconds before answering, to keep a call in flight
+    rate_limited = False
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        query = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        symbols = query["symbol"].split(",")
+        FakeUpstream.calls.append(symbols)
+        time.sleep(FakeUpstream.delay)
+
+        if FakeUpstream.rate_limited:
+            body = {"code": 429, "message": "You have run out of API credits", "status": "error"}
+        else:
+            per_symbol = {symbol: self.series(symbol, query["start_date"], query["end_date"]) for symbol in symbols}
+            body = per_symbol[symbols[0]] if len(symbols) == 1 else per_symbol
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    @staticmethod
+    def series(symbol, start_date, end_date):
+        df = UNIVERSE.get(symbol)
+        if df is None:
+            return {"code": 400, "message": f"**symbol** {symbol} not found", "status": "error"}
+        df = df[(df["datetime"] >= start_date) & (df["datetime"] <= end_date)]
+        values = [{"datetime": row.datetime.strftime("%Y-%m-%d"), "open": str(row.open), "high": str(row.high),
+                   "low": str(row.low), "close": str(row.close), "volume": str(row.volume)}
+                  for row in df.itertuples()]
+        return {"meta": {"symbol": symbol}, "values": values[::-1], "status": "ok"}  # Newest first, as upstream
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeUpstream)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+@pytest.fixture
+def upstream():
+    FakeUpstream.calls = []
+    FakeUpstream.delay = 0.0
+    FakeUpstream.rate_limited = False
+    return FakeUpstream
+
+
+def assert_matches_fixture(df, symbol):
+    expected = UNIVERSE[symbol]
+    assert df["datetime"].tolist() == expected["datetime"].tolist()
+    assert df["close"].tolist() == pytest.approx(expected["close"].tolist(), rel=1e-12)
+    assert (df["symbol"] == symbol).all()
+
+
+def test_lone_fetch_is_sent_without_waiting(base_url, upstream):
+    client = TwelveDataClient("key", base_url=base_url, credits_per_minute=600, batch_window=1.0)
+    started = time.perf_counter()
+    df = client.time_series("SYN0000", "1month", *WINDOW)
+    assert time.perf_counter() - started < 0.5
+    assert upstream.calls == [["SYN0000"]]
+    assert_matches_fixture(df, "SYN0000")
+
+
+def test_identical_requests_share_one_call(base_url, upstream):
+    upstream.delay = 0.2
+    client = TwelveDataClient("key", base_url=base_url, credits_per_minute=600)
+    futures = [client.submit("syn0001", "1month", *WINDOW) for _ in range(5)]
+    assert all(future is futures[0] for future in futures)
+    assert_matches_fixture(futures[0].result(), "SYN0001")
+    assert upstream.calls == [["SYN0001"]]
+
+
+def test_queued_symbols_are_combined_and_split(base_url, upstream):
+    upstream.delay = 0.2
+    client = TwelveDataClient("key", base_url=base_url, credits_per_minute=600, max_batch_symbols=8)
+    first = client.submit("SYN0000", "1month", *WINDOW)
+    time.sleep(0.05)  # First call is in flight; the rest queue behind it
+    symbols = ["SYN0001", "NOPE", "SYN0002", "SYN0003"]
+    with ThreadPoolExecutor(len(symbols)) as pool:
+        futures = dict(zip(symbols, pool.map(lambda s: client.submit(s, "1month", *WINDOW), symbols)))
+
+    assert_matches_fixture(first.result(), "SYN0000")
+    for symbol in ("SYN0001", "SYN0002", "SYN0003"):
+        assert_matches_fixture(futures[symbol].result(), symbol)
+    with pytest.raises(TwelveDataError, match="NOPE"):
+        futures["NOPE"].result()
+    assert upstream.calls[0] == ["SYN0000"]
+    assert sorted(upstream.calls[1]) == sorted(symbols) and len(upstream.calls) == 2
+
+
+def test_different_windows_are_not_combined(base_url, upstream):
+    upstream.delay = 0.1
+    client = TwelveDataClient("key", base_url=base_url, credits_per_minute=600)
+    first = client.submit("SYN0000", "1month", *WINDOW)
+    time.sleep(0.03)
+    second = client.submit("SYN0001", "1month", "2023-01-01", "2023-12-31")
+    third = client.submit("SYN0002", "1month", *WINDOW)
+    for future in (first, second, third):
+        future.result()
+    assert upstream.calls == [["SYN0000"], ["SYN0001"], ["SYN0002"]]  # Oldest queued window goes first
+    assert second.result()["datetime"].min() == pd.Timestamp("2023-01-01")
+
+
+def test_rate_limit_error_reaches_every_caller(base_url, upstream):
+    upstream.rate_limited = True
+    client = TwelveDataClient("key", base_url=base_url, credits_per_minute=600)
+    with pytest.raises(RateLimitError):
+        client.time_series("SYN0000", "1month", *WINDOW)
+
+
+def test_token_bucket_spaces_calls_to_the_credit_rate():
+    bucket = TokenBucket(rate_per_minute=600, capacity=2)  # 10 credits per second
+    started = time.perf_counter()
+    bucket.acquire(2)  # Full bucket: immediate
+    assert time.perf_counter() - started < 0.05
+    bucket.acquire(1)
+    bucket.acquire(1)
+    assert time.perf_counter() - started == pytest.approx(0.2, abs=0.08)
+
+
+def test_client_waits_for_credits(base_url, upstream):
+    client = TwelveDataClient("key", base_url=base_url, credits_per_minute=60)
+    client.bucket = TokenBucket(rate_per_minute=600, capacity=1)
+    started = time.perf_counter()
+    client.time_series("SYN0000", "1month", *WINDOW)
+    client.time_series("SYN0001", "1month", *WINDOW)
+    assert time.perf_counter() - started >= 0.09
+    assert len(upstream.calls) == 2
@@ -0,0 +1,78 @@
+"""
+Universe snapshot checks
+
+The job pulls through the last closed month, its rows agree with
+/analytics/run over the same bars, and the snapshot endpoints only serve
+rows computed under the current model assumptions.
+"""
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import financial_analytics_api as api
+from benchmarks.fixtures import FixtureStockDataPuller, bundled_universe, fixture_upstream, synthetic_universe
+from data_pull import StockDataPuller
+from price_store import PriceStore
+from universe_snapshot import UniverseSnapshot, build_snapshot
+
+SCALARS = ["max_drawdown", "beta", "unlevered_beta", "optimal_wacc", "optimal_debt_ratio"]
+DATES = ["drawdown_peak_date", "drawdown_trough_date", "drawdown_recovery_date"]
+
+
+class StoreFixturePuller(FixtureStockDataPuller):
+    """Fixture upstream behind the real store path (sync_store, then a store load)"""
+
+    get_monthly_data = StockDataPuller.get_monthly_data
+
+
+def build(universe, tmp_path, **assumptions):
+    FixtureStockDataPuller.universe = universe
+    puller = StoreFixturePuller("test-key", store=PriceStore(str(tmp_path / "price_store")), client=object())
+    symbols = [symbol for symbol in universe if symbol != "SPY"]
+    path = str(tmp_path / "snapshot.npy")
+    build_snapshot(puller, symbols, path, de_ratios=api.DE_RATIOS, default_de_ratio=api.DEFAULT_DE_RATIO,
+                   **{"risk_free": api.RISK_FREE_RATE, "tax_rate": api.TAX_RATE, "workers": 0, **assumptions})
+    return path
+
+
+def test_snapshot_pulls_through_last_closed_month(tmp_path):
+    last_closed = StockDataPuller.last_closed_month()
+    n_months = (last_closed.year - 2019) * 12 + last_closed.month - 12 + 1
+    snapshot = UniverseSnapshot(build(synthetic_universe(2, n_months, start="2019-12-01", seed=4), tmp_path))
+
+    rows = snapshot.window("1y") + snapshot.window("3y") + snapshot.window("5y")
+    assert len(rows) == 6
+    assert {row["end_date"] for row in rows} == {last_closed.strftime("%Y-%m-%d")}
+
+
+def test_snapshot_matches_run(tmp_path):
+    universe = bundled_universe()
+    snapshot = UniverseSnapshot(build(universe, tmp_path))
+    assert len(snapshot) == 9
+
+    with fixture_upstream(api, universe), TestClient(api.app) as client:
+        for window in ("1y", "3y", "5y"):
+            for row in snapshot.window(window):
+                body = dict(ticker=row["symbol"], start_date=row["start_date"], end_date=row["end_date"],
+                            persist=False)
+                result = client.post("/analytics/run", json=body).json()
+                for field in SCALARS:
+                    assert row[field] == pytest.approx(result[field], rel=1e-9), (row["symbol"], window, field)
+                for field in DATES:
+                    assert row[field] == result[field], (row["symbol"], window, field)
+
+
+def test_endpoints_serve_current_rows_only(tmp_path, monkeypatch):
+    universe = bundled_universe()
+    monkeypatch.setattr(api, "universe_snapshot", UniverseSnapshot(build(universe, tmp_path)))
+
+    with TestClient(api.app) as client:
+        row = client.get("/analytics/snapshot/msft", params={"window": "3y"}).json()
+        assert (row["ticker"], row["window"], row["months"]) == ("MSFT", "3y", 36)
+        assert [r["ticker"] for r in client.get("/analytics/snapshot").json()["results"]] == ["MSFT", "NFLX", "NVDA"]
+        assert client.get("/analytics/snapshot/SPY").status_code == 404
+
+        monkeypatch.setattr(api, "TAX_RATE", api.TAX_RATE + 0.01)
+        assert client.get("/analytics/snapshot/MSFT").status_code == 404
+        assert client.get("/analytics/snapshot").json()["results"] == []
@@ -0,0 +1,57 @@
+"""
+WACC curve and optimizer checks
+
+The vectorized curve is compared with the original per-debt-ratio loop over
+the scalar helpers in assets/wacc.py.
+"""
+
+import numpy as np
+import pytest
+
+import financial_analytics_api as api
+import assets.wacc as wacc_module
+from assets.wacc import calculate_cost_of_debt, calculate_cost_of_equity, calculate_levered_beta, calculate_wacc
+from benchmarks.fixtures import assert_close, date_window, fixture_upstream, parity_universes, stock_symbols
+
+
+def baseline_wacc_curve(unlevered_beta, spy_returns):
+    """The original scalar loop over a 1% debt-ratio grid"""
+    spy_returns = spy_returns.dropna()
+    wacc_data = []
+    for debt_ratio in np.arange(0.0, 1.00, 0.01):
+        equity_ratio = 1 - debt_ratio
+        relevered_beta = calculate_levered_beta(unlevered_beta, debt_ratio, equity_ratio)
+        cost_of_equity = calculate_cost_of_equity(relevered_beta, spy_returns, 0.04)
+        cost_of_debt = calculate_cost_of_debt(debt_ratio * 100)
+        wacc = calculate_wacc(equity_ratio, debt_ratio, cost_of_equity, cost_of_debt, tax_rate=0.30)
+        wacc_data.append({
+            'debt_ratio': float(debt_ratio),
+            'equity_ratio': float(equity_ratio),
+            'relevered_beta': float(relevered_beta),
+            'cost_of_equity': float(cost_of_equity),
+            'wacc': float(wacc)
+        })
+    optimal_point = min(wacc_data, key=lambda x: x['wacc'])
+    return wacc_data, optimal_point['wacc'], optimal_point['debt_ratio']
+
+
+@pytest.mark.parametrize("name,universe", parity_universes())
+def test_wacc_curve_matches_scalar_loop(name, universe):
+    start_date, end_date = date_window(universe)
+    with fixture_upstream(api, universe):
+        spy_monthly = api.benchmark_cache.window("SPY", start_date, end_date)
+        for symbol in stock_symbols(universe):
+            enhanced_df, _ = api.compute_max_drawdown(api.compute_monthly_returns(api.datapull(symbol)))
+            beta, spy_returns = api.compute_beta(enhanced_df, start_date, end_date, spy_monthly)
+            unlevered_beta = api.compute_unlevered_beta(beta, symbol)
+            assert_close(api.compute_wacc_curve(unlevered_beta, spy_returns),
+                         baseline_wacc_curve(unlevered_beta, spy_returns), symbol)
+
+
+@pytest.mark.parametrize("optimum", [0.25, 0.4, 0.63])
+def test_optimize_wacc_interior_evaluation_count(monkeypatch, optimum):
+    monkeypatch.setattr(wacc_module, "_evaluate_wacc",
+                        lambda *args: {'wacc': (args[2] - optimum) ** 2 + 0.05})
+    _, debt_ratio, evaluations = wacc_module.optimize_wacc(1.0, [0.01] * 12)
+    assert debt_ratio == pytest.approx(optimum, abs=1e-9)
+    assert evaluations == 267
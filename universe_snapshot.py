@@ -0,0 +1,277 @@
+"""
+Universe Snapshot
+
+Precomputed drawdown, beta, unlevered beta and WACC optimum for every
+symbol of a configured universe over the standard trailing windows
+(1y/3y/5y) ending at the last closed month, written to one
+memory-mappable file the /analytics/snapshot endpoints answer from.
+
+The job pulls prices through the last closed month with
+StockDataPuller.pull_data (through the price store, so reruns only fetch
+new bars) and computes symbols in parallel on a process pool, with the
+same IncrementalAnalytics kernel /analytics/state uses. /analytics/run
+does not read the snapshot; where it has the same bars (the fixed Dec
+2019 - Dec 2024 pull, or the price matrix) it gives the same scalars for a
+row's start_date..end_date. The snapshot is a NumPy structured array
+(.npy) sorted by (symbol, window); UniverseSnapshot maps it read-only and
+indexes the rows once, so a lookup is a dict access.
+
+Run it from cron or by hand, e.g. nightly after the month-end close:
+
+    python universe_snapshot.py --symbols MSFT,NFLX,NVDA --workers 4
+"""
+
+import argparse
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from assets.incremental import IncrementalAnalytics
+from assets.returns import month_end_labels
+
+# Trailing windows in monthly returns (a window of n returns spans n + 1 bars)
+STANDARD_WINDOWS = {"1y": 12, "3y": 36, "5y": 60}
+
+SNAPSHOT_DTYPE = np.dtype([
+    ('symbol', 'U16'),
+    ('window', 'U4'),
+    ('start_date', 'datetime64[D]'),  # First bar: the start_date /analytics/run takes for this window
+    ('end_date', 'datetime64[D]'),
+    ('months', 'i4'),
+    ('observations', 'i4'),  # Stock/benchmark return pairs behind beta
+    ('max_drawdown', 'f8'),  # Absolute, in percent (as /analytics/run)
+    ('drawdown_peak_date', 'datetime64[D]'),
+    ('drawdown_trough_date', 'datetime64[D]'),
+    ('drawdown_recovery_date', 'datetime64[D]'),  # NaT while still under water
+    ('beta', 'f8'),
+    ('unlevered_beta', 'f8'),
+    ('market_return', 'f8'),
+    ('optimal_wacc', 'f8'),
+    ('optimal_debt_ratio', 'f8'),
+    ('de_ratio', 'f8'),
+    ('tax_rate', 'f8'),
+    ('risk_free_rate', 'f8'),
+    ('computed_at', 'datetime64[s]'),
+])
+
+
+def compute_symbol_windows(symbol, months, closes, benchmark_returns, end_month, de_ratio,
+                           risk_free=0.04, tax_rate=0.30, windows=None):
+    """
+    Snapshot rows for one symbol (runs in a worker process)
+
+    Parameters:
+    - symbol : str
+    - months : ndarray of datetime64
+        Month-end label of each bar, ascending
+    - closes : ndarray
+        Closing price of each bar
+    - benchmark_returns : Series
+        Benchmark monthly returns indexed by month end
+    - end_month : datetime64
+        Month end every window finishes on
+    - de_ratio : float
+        Debt / equity used to unlever beta
+    - risk_free : float, default 0.04
+    - tax_rate : float, default 0.30
+    - windows : dict, optional
+        {name: monthly returns} (default STANDARD_WINDOWS)
+
+    Returns:
+    - list : row tuples in SNAPSHOT_DTYPE field order; windows the symbol's
+      history does not fully cover (or with under 2 beta pairs) are left out
+    """
+    months = np.asarray(months, dtype='datetime64[ns]')
+    end_month = np.datetime64(end_month, 'ns')
+    computed_at = np.datetime64(datetime.now().replace(microsecond=0))
+    rows = []
+    for name, n_returns in (windows or STANDARD_WINDOWS).items():
+        first_month = (end_month.astype('datetime64[M]') - n_returns + 1).astype('datetime64[D]') - 1
+        in_window = (months >= np.datetime64(first_month, 'ns')) & (months <= end_month)
+        if in_window.sum() != n_returns + 1 or months[in_window][-1] != end_month:
+            continue
+
+        state = IncrementalAnalytics()
+        for month, close in zip(months[in_window], closes[in_window]):
+            month = pd.Timestamp(month)
+            state.append(month.strftime('%Y-%m-%d'), close, benchmark_returns.get(month, np.nan))
+        if state.beta is None:
+            continue
+        unlevered_beta, optimal_wacc, optimal_debt_ratio = state.optimal_wacc(de_ratio, risk_free, tax_rate)
+
+        rows.append((
+            symbol, name, months[in_window][0].astype('datetime64[M]'), end_month.astype('datetime64[D]'),
+            n_returns, state.observations, abs(state.max_drawdown),
+            state.peak_date or 'NaT', state.trough_date or 'NaT', state.recovery_date or 'NaT',
+            state.beta, unlevered_beta, state.market_return, optimal_wacc, optimal_debt_ratio,
+            de_ratio, tax_rate, risk_free, computed_at
+        ))
+    return rows
+
+
+def write_snapshot(path, rows):
+    """Write rows as a sorted structured array, replacing `path` atomically; returns the array"""
+    snapshot = np.array(rows, dtype=SNAPSHOT_DTYPE)
+    snapshot.sort(order=['symbol', 'window'])
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, snapshot)
+    # Readers that already mapped the old file keep a valid view of it
+    os.replace(tmp_path, path)
+    return snapshot
+
+
+def build_snapshot(puller, symbols, path, benchmark="SPY", de_ratios=None, default_de_ratio=0.30,
+                   risk_free=0.04, tax_rate=0.30, workers=None):
+    """
+    Pull the universe and write its standard-window snapshot
+
+    Parameters:
+    - puller : StockDataPuller
+        Configured with a PriceStore, so only missing bars are fetched;
+        prices are pulled through its last_closed_month()
+    - symbols : list of str
+    - path : str
+        Snapshot file (.npy)
+    - benchmark : str, default "SPY"
+    - de_ratios : dict, optional
+        Debt / equity per symbol; others use default_de_ratio
+    - default_de_ratio : float, default 0.30
+    - risk_free : float, default 0.04
+    - tax_rate : float, default 0.30
+    - workers : int, optional
+        Worker processes (default: CPU count); 0 computes in this process
+
+    Returns:
+    - ndarray : the snapshot written
+    """
+    symbols = [s for s in dict.fromkeys(s.strip().upper() for s in symbols) if s and s != benchmark]
+    prices = puller.pull_data([benchmark] + symbols, save_csv=False, end_date=puller.last_closed_month())
+    if benchmark not in prices:
+        raise ValueError(f"No data returned for benchmark {benchmark}")
+
+    benchmark_df = prices.pop(benchmark)
+    benchmark_months = month_end_labels(pd.to_datetime(benchmark_df['datetime']).to_numpy())
+    benchmark_returns = pd.Series(benchmark_df['close'].to_numpy(dtype=float), index=benchmark_months).pct_change()
+    end_month = benchmark_months.max()
+
+    jobs = []
+    for symbol, df in prices.items():
+        jobs.append((symbol, month_end_labels(pd.to_datetime(df['datetime']).to_numpy()),
+                     df['close'].to_numpy(dtype=float), benchmark_returns, end_month,
+                     (de_ratios or {}).get(symbol, default_de_ratio), risk_free, tax_rate))
+
+    if workers == 0:
+        results = [compute_symbol_windows(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(compute_symbol_windows, *zip(*jobs))) if jobs else []
+
+    snapshot = write_snapshot(path, [row for rows in results for row in rows])
+    print(f"Wrote {len(snapshot)} rows for {len(prices)} symbols to {path}")
+    return snapshot
+
+
+class UniverseSnapshot:
+    """
+    Read-only, memory-mapped view of a snapshot file with an in-memory
+    (symbol, window) index
+
+    The file is mapped on first use and mapped again whenever the job
+    replaces it, so a running API picks up new snapshots without a restart.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._view = (None, {})  # (mapped rows, {(symbol, window): row}), swapped as one
+        self._stat = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Map the file if it is new or was replaced since the last call (cheap when unchanged)"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            stat = None
+        signature = stat and (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if signature == self._stat:
+            return
+        with self._lock:
+            if signature == self._stat:
+                return
+            rows = np.load(self.path, mmap_mode='r') if stat else None
+            index = {} if rows is None else {
+                key: i for i, key in enumerate(zip(rows['symbol'].tolist(), rows['window'].tolist()))
+            }
+            self._view = (rows, index)
+            self._stat = signature
+
+    @staticmethod
+    def _to_dict(row):
+        record = {}
+        for name in SNAPSHOT_DTYPE.names:
+            value = row[name]
+            if isinstance(value, np.datetime64):
+                value = None if np.isnat(value) else str(value)
+            elif isinstance(value, np.generic):
+                value = value.item()
+            record[name] = value
+        return record
+
+    def lookup(self, symbol, window):
+        """Snapshot row for (symbol, window) as a dict (dates as YYYY-MM-DD strings), or None"""
+        self.refresh()
+        rows, index = self._view
+        i = index.get((symbol, window))
+        return None if i is None else self._to_dict(rows[i])
+
+    def window(self, window):
+        """Every symbol's row for one window, in symbol order"""
+        self.refresh()
+        rows, _ = self._view
+        if rows is None:
+            return []
+        return [self._to_dict(row) for row in rows[rows['window'] == window]]
+
+    def __len__(self):
+        self.refresh()
+        return len(self._view[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the standard-window universe snapshot")
+    parser.add_argument("--symbols", help="Comma-separated universe (default: $UNIVERSE_SYMBOLS or the puller's symbols)")
+    parser.add_argument("--universe-file", help="File with one symbol per line")
+    parser.add_argument("--output", help="Snapshot path (default: $UNIVERSE_SNAPSHOT_PATH)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (0: compute inline)")
+    args = parser.parse_args()
+
+    # Same store, client and model assumptions as the API
+    from financial_analytics_api import (
+        API_KEY, DE_RATIOS, DEFAULT_DE_RATIO, RISK_FREE_RATE, TAX_RATE, UNIVERSE_SNAPSHOT_PATH,
+        price_store, td_client
+    )
+    from data_pull import StockDataPuller
+
+    puller = StockDataPuller(API_KEY, store=price_store, client=td_client)
+    if args.universe_file:
+        with open(args.universe_file) as f:
+            symbols = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    else:
+        symbols = (args.symbols or os.getenv('UNIVERSE_SYMBOLS', "")).split(",")
+    symbols = [s for s in symbols if s.strip()] or puller.symbols
+
+    build_snapshot(puller, symbols, args.output or UNIVERSE_SNAPSHOT_PATH, de_ratios=DE_RATIOS,
+                   default_de_ratio=DEFAULT_DE_RATIO, risk_free=RISK_FREE_RATE, tax_rate=TAX_RATE,
+                   workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()